@@ -0,0 +1,124 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Canvas Benchmark
+# ------------------------------------------------------------
+"""
+Compares the bytearray Canvas used by flowchart_renderer against the original
+list-of-lists grid filled with one draw_char call per cell.
+
+Both sides draw the same layout; the reported time covers drawing plus joining the
+rows into the final text, and the peak memory is measured with tracemalloc. The
+legacy grid draws connectors straight, the way they were before flowchart_routing,
+so its text is only a baseline: the canvas output is checked for equality against
+the streaming renderer (iter_rows) instead. Run from the repository root:
+
+    python benchmarks/bench_canvas.py
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chart_generator import mixed
+from flowchart_layout import place_nodes, VERTICAL_SPACING, HORIZONTAL_SPACING
+from flowchart_renderer import IncrementalRenderer, iter_rows
+
+
+def legacy_draw(node_positions, max_x, max_y):
+    """The drawing half of generate_flowchart as it was before the compact canvas."""
+    grid_height = max_y + 5; grid_width = max_x + HORIZONTAL_SPACING * 2 + 20
+    grid = [[' ' for _ in range(grid_width)] for _ in range(grid_height)]
+    def draw_char(x, y, char):
+        if 0 <= y < grid_height and 0 <= x < grid_width: grid[y][x] = char
+
+    for pos_data in node_positions.values():
+        x, y, w, h, node = pos_data['x'], pos_data['y'], pos_data['width'], pos_data['height'], pos_data['node']
+
+        draw_char(x, y, '┌'); draw_char(x + w - 1, y, '┐'); draw_char(x, y + h - 1, '└'); draw_char(x + w - 1, y + h - 1, '┘')
+        for i in range(1, w - 1): draw_char(x + i, y, '─'); draw_char(x + i, y + h - 1, '─')
+        for i in range(1, h - 1): draw_char(x, y + i, '│'); draw_char(x + w - 1, y + i, '│')
+
+        text_lines = node['text']
+        if node['isLoop'] and node['loopTarget']:
+            text_lines = text_lines + [f"*Loop to: {node['loopTarget']}"]
+        start_y = y + (h - len(text_lines)) // 2
+        for line_num, line in enumerate(text_lines):
+            display_text = line[:w-2].center(w-2)
+            for i, char in enumerate(display_text):
+                draw_char(x + 1 + i, start_y + line_num, char)
+
+        sources_pos = [node_positions[s_id] for s_id in node['connections'] if s_id in node_positions]
+        if not sources_pos: continue
+
+        target_x_center = x + w // 2
+        if node['type'] == 'merge' or (node['is_end'] and len(sources_pos) > 1):
+            merge_y = y - (VERTICAL_SPACING // 2) - 1
+            min_sx = min(s['x'] + s['width'] // 2 for s in sources_pos); max_sx = max(s['x'] + s['width'] // 2 for s in sources_pos)
+            for i in range(min_sx, max_sx + 1): draw_char(i, merge_y, '─')
+            for s_pos in sources_pos:
+                sx_center = s_pos['x'] + s_pos['width'] // 2
+                for i in range(s_pos['y'] + h, merge_y): draw_char(sx_center, i, '│')
+                draw_char(sx_center, merge_y, '┴')
+            for i in range(merge_y + 1, y): draw_char(target_x_center, i, '│')
+            draw_char(target_x_center, y - 1, '▼')
+        else:
+            s_pos = sources_pos[0]
+            sx_center, sy_center = s_pos['x'] + s_pos['width']//2, s_pos['y'] + h//2
+            if node['direction'] == 'down':
+                for i in range(s_pos['y'] + h, y): draw_char(sx_center, i, '│'); draw_char(sx_center, y-1, '▼')
+            else:
+                for i in range(s_pos['x'] + w, x): draw_char(i, sy_center, '─'); draw_char(x - 1, sy_center, '►')
+
+    return "\n".join("".join(row) for row in grid)
+
+
+def legacy_render(nodes):
+    return legacy_draw(*place_nodes(nodes))
+
+
+def canvas_render(nodes):
+    renderer = IncrementalRenderer()
+    renderer.update(nodes)
+    return renderer.text()
+
+
+def measure(func, nodes):
+    """
+    Returns (seconds, peak bytes, result). The time and the memory peak come from
+    separate calls because tracemalloc slows allocation-heavy code down.
+    """
+    start = time.perf_counter()
+    func(nodes)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = func(nodes)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--right-share", type=float, default=0.35, help="share of right branches (higher = wider charts)")
+    args = parser.parse_args(argv)
+
+    print(f"{'nodes':>7} {'canvas':>11} {'list (s)':>9} {'canvas (s)':>11} {'list peak':>10} {'canvas peak':>12}  output")
+    for size in args.sizes:
+        nodes = mixed(size, seed=size, right_share=args.right_share)
+        legacy_time, legacy_peak, legacy_text = measure(legacy_render, nodes)
+        canvas_time, canvas_peak, canvas_text = measure(canvas_render, nodes)
+        lines = canvas_text.split("\n")
+        shape = f"{len(lines[0])}x{len(lines)}"
+        same = "identical" if "\n".join(iter_rows(nodes)) == canvas_text else "MISMATCH"
+        print(f"{size:>7} {shape:>11} {legacy_time:>9.3f} {canvas_time:>11.3f} "
+              f"{legacy_peak / 2**20:>8.1f}MB {canvas_peak / 2**20:>10.1f}MB  {same}")
+        if same == "MISMATCH":
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
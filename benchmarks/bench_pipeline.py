@@ -0,0 +1,178 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Pipeline Benchmark
+# ------------------------------------------------------------
+"""
+Times each stage of turning a node list into what the builder shows, per chart shape
+and size, and writes the results as JSON so runs can be compared over time.
+
+Stages, timed separately:
+
+    wrap     wrapping every label (wrap_many, starting from an empty wrap cache)
+    layout   place_nodes
+    draw     routing every connector through that layout and drawing it and every
+             box onto the canvas
+    join     joining the canvas rows into the chart text
+    widgets  one input panel refresh after the chart changed (_update_input_layout,
+             which resets the step pickers' default selections)
+
+It runs without a display: the widget stage drives the builder's own refresh code
+against stand-in widgets that only record what they are given, so it measures the
+Python side of the refresh, not Tk's drawing. Canvases above --max-cells cells are
+not drawn (their draw and join entries are null). Run from the repository root:
+
+    python benchmarks/bench_pipeline.py --json results/pipeline.json
+    python benchmarks/bench_pipeline.py --shapes chain fan --sizes 10 1000 100000
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chart_generator import generate, SHAPES
+from flowchart_canvas import Canvas
+from flowchart_layout import place_nodes, UNIFORM_NODE_WIDTH
+from flowchart_labels import wrap_many, wrap_cached
+from flowchart_renderer import canvas_size, iter_layout_ops
+from flowchart_store import NodeStore
+
+STAGES = ("wrap", "layout", "draw", "join", "widgets")
+
+
+class HeadlessWidget:
+    """Stands in for a Tk widget or variable: remembers values and options, ignores geometry."""
+
+    def __init__(self, value=""):
+        self.value = value
+        self.options = {}
+
+    def get(self, *args):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+    def __getitem__(self, key):
+        return self.options.get(key, ())
+
+    def __setitem__(self, key, value):
+        self.options[key] = value
+
+    def config(self, **options):
+        self.options.update(options)
+
+    def grid(self, **options): pass
+    def grid_forget(self): pass
+    def delete(self, *args): pass
+
+
+def headless_app(nodes):
+    """A FlowchartBuilderApp holding nodes whose widgets are all HeadlessWidgets."""
+    from flowchart_builder_python_12 import FlowchartBuilderApp
+    from flowchart_history import History
+    from flowchart_picker import StepIndex
+
+    class HeadlessApp(FlowchartBuilderApp):
+        def __init__(self, nodes):
+            self.nodes = NodeStore(nodes)
+            self.flowchart_ended = False
+            self.history = History()
+            self.node_type_var = HeadlessWidget("regular")
+            self.is_loop_var = HeadlessWidget(False)
+            self._placements, self._combobox_versions, self._model_version = {}, {}, 0
+            self._step_index = StepIndex(self._node_option)
+            self._step_index.extend(node for node in self.nodes if not node.is_end)
+
+        def __getattr__(self, name):
+            if name.startswith("__"): raise AttributeError(name)
+            widget = HeadlessWidget()
+            setattr(self, name, widget)
+            return widget
+
+    return HeadlessApp(nodes)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def run_case(shape, size, seed, max_cells, widgets=True):
+    """Times every stage for one chart and returns a result dict."""
+    nodes = generate(shape, size, seed)
+    result = {"shape": shape, "nodes": size, "seed": seed}
+
+    labels = [" ".join(node["text"]) for node in nodes]
+    wrap_cached.cache_clear()
+    result["wrap"], _ = timed(wrap_many, labels, UNIFORM_NODE_WIDTH - 4)
+
+    result["layout"], (node_positions, max_x, max_y) = timed(place_nodes, nodes)
+    width, height = canvas_size(max_x, max_y)
+    result["canvas_width"], result["canvas_height"] = width, height
+
+    if width * height <= max_cells:
+        def draw():
+            canvas = Canvas(width, height)
+            for _, ops in iter_layout_ops(node_positions):
+                canvas.draw(ops)
+            return canvas
+        result["draw"], canvas = timed(draw)
+        result["join"], text = timed(canvas.text)
+        result["text_chars"] = len(text)
+        del canvas, text
+    else:
+        result["draw"] = result["join"] = None
+
+    if widgets:
+        app = headless_app(nodes)
+        app._model_version += 1 # as after an edit, so every combobox is refilled
+        result["widgets"], _ = timed(app._update_input_layout)
+    else:
+        result["widgets"] = None
+    return result
+
+
+def format_seconds(value):
+    return f"{value:.4f}" if value is not None else "-"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-cells", type=float, default=5e7, help="largest canvas (width x height) to draw")
+    parser.add_argument("--no-widgets", action="store_true", help="skip the widget refresh stage")
+    parser.add_argument("--json", metavar="FILE", help="write the results to FILE ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'shape':>7} {'nodes':>7} {'canvas':>13} " + " ".join(f"{stage + ' (s)':>11}" for stage in STAGES), file=sys.stderr)
+    for shape in args.shapes:
+        for size in args.sizes:
+            result = run_case(shape, size, args.seed, args.max_cells, not args.no_widgets)
+            results.append(result)
+            shape_text = f"{result['canvas_width']}x{result['canvas_height']}"
+            print(f"{shape:>7} {size:>7} {shape_text:>13} " + " ".join(f"{format_seconds(result[stage]):>11}" for stage in STAGES), file=sys.stderr)
+
+    if args.json:
+        report = {
+            "benchmark": "pipeline", "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine(),
+            "results": results,
+        }
+        if args.json == "-":
+            json.dump(report, sys.stdout, indent=1); sys.stdout.write("\n")
+        else:
+            out_dir = os.path.dirname(args.json)
+            if out_dir: os.makedirs(out_dir, exist_ok=True)
+            with open(args.json, "w", encoding="utf-8") as f: json.dump(report, f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Placement Benchmark
+# ------------------------------------------------------------
+"""
+Compares the indexed node placement in flowchart_layout against the original
+quadratic collision loop from generate_flowchart.
+
+For every size both engines run on the same mixed chart from chart_generator and their layouts are
+checked for equality; the legacy loop is skipped above --legacy-max nodes because
+it takes minutes there. Run from the repository root:
+
+    python benchmarks/bench_placement.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flowchart_layout import (place_nodes, UNIFORM_NODE_WIDTH, UNIFORM_NODE_HEIGHT,
+                              VERTICAL_SPACING, HORIZONTAL_SPACING)
+from chart_generator import mixed
+
+
+def legacy_place_nodes(nodes):
+    """The placement half of generate_flowchart as it was before the spatial index."""
+    node_positions = {}; max_x, max_y = 0, 0
+    node_width, node_height = UNIFORM_NODE_WIDTH, UNIFORM_NODE_HEIGHT
+
+    def is_overlapping(r1, r2): return not (r1['x'] + r1['width'] < r2['x'] or r1['x'] > r2['x'] + r2['width'] or r1['y'] + r1['height'] < r2['y'] or r1['y'] > r2['y'] + r2['height'])
+
+    for node in nodes:
+        x, y = 0, 0
+        if not node['connections']: x, y = 0, 0
+        else:
+            sources_pos = [node_positions[s_id] for s_id in node['connections'] if s_id in node_positions]
+            if not sources_pos: continue
+            if node['type'] == 'merge' or (node['is_end'] and len(sources_pos) > 1):
+                avg_x = sum(p['x'] for p in sources_pos) // len(sources_pos); max_source_y = max(p['y'] + p['height'] for p in sources_pos)
+                x, y = avg_x, max_source_y + VERTICAL_SPACING
+            else:
+                source_pos = sources_pos[0]
+                if node['direction'] == 'down': x, y = source_pos['x'], source_pos['y'] + source_pos['height'] + VERTICAL_SPACING
+                else: x, y = source_pos['x'] + source_pos['width'] + HORIZONTAL_SPACING, source_pos['y']
+
+        new_node_rect = {'x': x, 'y': y, 'width': node_width, 'height': node_height}
+        collided = True
+        while collided:
+            collided = False
+            for placed_pos in node_positions.values():
+                if is_overlapping(new_node_rect, placed_pos): new_node_rect['y'] = placed_pos['y'] + placed_pos['height'] + 1; collided = True; break
+        x, y = new_node_rect['x'], new_node_rect['y']
+        node_positions[node['id']] = {'x': x, 'y': y, 'width': node_width, 'height': node_height, 'node': node}
+        max_x = max(max_x, x + node_width); max_y = max(max_y, y + node_height)
+    return node_positions, max_x, max_y
+
+
+def synthetic_chart(size, seed=0, right_share=0.3):
+    """A mixed chart from chart_generator, by the name the placement tests have always used."""
+    return mixed(size, seed, right_share)
+
+
+def layout_key(node_positions):
+    return [(node_id, pos['x'], pos['y']) for node_id, pos in node_positions.items()]
+
+
+def best_of(repeat, func, *args):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--legacy-max", type=int, default=2000, help="largest size to run the legacy loop on")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'nodes':>8} {'indexed (s)':>12} {'us/node':>9} {'legacy (s)':>11} {'speedup':>8}  layout")
+    for size in args.sizes:
+        nodes = mixed(size, seed=size)
+        indexed_time, indexed = best_of(args.repeat, place_nodes, nodes)
+        legacy_col, speedup_col, check = "-", "-", "not checked"
+        if size <= args.legacy_max:
+            legacy_time, legacy = best_of(1, legacy_place_nodes, nodes)
+            legacy_col, speedup_col = f"{legacy_time:.4f}", f"{legacy_time / indexed_time:.1f}x"
+            check = "identical" if layout_key(legacy[0]) == layout_key(indexed[0]) else "MISMATCH"
+            if check == "MISMATCH":
+                print(f"layout mismatch at {size} nodes", file=sys.stderr)
+                return 1
+        print(f"{size:>8} {indexed_time:>12.4f} {indexed_time / size * 1e6:>9.1f} {legacy_col:>11} {speedup_col:>8}  {check}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Synthetic Charts
+# ------------------------------------------------------------
+"""
+Deterministic synthetic flowcharts for the benchmarks.
+
+Every shape returns node dicts in the same form as FlowchartBuilderApp.nodes and the
+same output for the same (size, seed):
+
+    chain   one long run of down steps
+    fan     rows of right branches hanging off a spine of down steps, about
+            sqrt(size) boxes wide, so the canvas grows in both directions
+    ladder  two parallel steps merged back together on every rung
+    loops   a down chain where every step carries a "*Loop to:" note
+    mixed   random down steps, right branches and merges off recent steps
+"""
+import math
+import random
+
+SHAPES = ("chain", "fan", "ladder", "loops", "mixed")
+
+
+def make_node(n, text, connections=(), direction="down", node_type="regular", loop_target=""):
+    return {"id": f"node-{n}", "text": [text], "type": node_type, "connections": list(connections),
+            "direction": direction if connections else None, "isLoop": bool(loop_target),
+            "loopTarget": loop_target, "is_end": False}
+
+
+def chain(size, seed=0):
+    nodes = [make_node(1, "Start")]
+    for n in range(2, size + 1):
+        nodes.append(make_node(n, f"Step {n}", [nodes[-1]["id"]]))
+    return nodes
+
+
+def fan(size, seed=0):
+    width = max(2, math.isqrt(size))
+    nodes = [make_node(1, "Start")]
+    hub = nodes[0]
+    for n in range(2, size + 1):
+        if (n - 2) % width == 0:
+            # A new hub below the last one; the row's branches go right from it.
+            hub = make_node(n, f"Hub {n}", [hub["id"]])
+            nodes.append(hub)
+        else:
+            nodes.append(make_node(n, f"Branch {n}", [nodes[-1]["id"]], direction="right"))
+    return nodes
+
+
+def ladder(size, seed=0):
+    nodes = [make_node(1, "Start")]
+    rung = nodes[0]
+    n = 2
+    while n <= size:
+        left = make_node(n, f"Left {n}", [rung["id"]]); nodes.append(left); n += 1
+        if n > size: break
+        right = make_node(n, f"Right {n}", [rung["id"]], direction="right"); nodes.append(right); n += 1
+        if n > size: break
+        rung = make_node(n, f"Merge {n}", [left["id"], right["id"]], node_type="merge"); nodes.append(rung); n += 1
+    return nodes
+
+
+def loops(size, seed=0):
+    rng = random.Random(seed)
+    nodes = [make_node(1, "Start")]
+    for n in range(2, size + 1):
+        target = nodes[rng.randrange(max(0, len(nodes) - 50), len(nodes))]
+        nodes.append(make_node(n, f"Step {n}", [nodes[-1]["id"]], loop_target=target["text"][0]))
+    return nodes
+
+
+def mixed(size, seed=0, right_share=0.3):
+    rng = random.Random(seed)
+    nodes = [make_node(1, "Start")]
+    for n in range(2, size + 1):
+        recent = nodes[-6:]
+        if len(recent) > 1 and rng.random() < 0.15:
+            nodes.append(make_node(n, f"Step {n}", [s["id"] for s in rng.sample(recent, 2)], node_type="merge"))
+        else:
+            direction = "right" if rng.random() < right_share else "down"
+            nodes.append(make_node(n, f"Step {n}", [rng.choice(recent)["id"]], direction=direction))
+    return nodes
+
+
+def generate(shape, size, seed=0):
+    """Returns a synthetic chart of the given shape with size nodes."""
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown chart shape '{shape}' (choose from {', '.join(SHAPES)}).")
+    return globals()[shape](size, seed)
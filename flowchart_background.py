@@ -0,0 +1,212 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Background Rendering
+# ------------------------------------------------------------
+"""
+Runs layout and drawing on a worker thread so the Tk mainloop never waits on them.
+
+The worker owns an IncrementalRenderer. Each finished render is handed back as a
+CanvasSnapshot, which the viewer can read while the worker is already drawing the
+next one. Results and progress travel through a queue that the Tk thread polls with
+master.after; the worker never touches a widget.
+
+Only the newest request matters: submitting while a render is running makes the
+worker drop the stale one at its next progress check and start on the new list
+from whatever prefix it had already drawn.
+
+Requests are flowchart_history.ChartStates, which never change once made, so
+submitting one copies nothing. The worker compares it with the state it drew last
+and only touches the steps after the prefix they share. Finished renders are kept
+in a RenderCache keyed by the digest of the state (see flowchart_cache), so
+going back to a chart that was already drawn skips layout and drawing altogether.
+"""
+import queue
+import threading
+import time
+
+from flowchart_cache import RenderCache, CachedRender, cache_key, common_length, DEFAULT_BUDGET
+from flowchart_canvas import CanvasSnapshot
+from flowchart_history import EMPTY
+from flowchart_renderer import IncrementalRenderer
+
+POLL_MS = 30 # How often the Tk thread checks for results while a render is running
+PROGRESS_DELAY = 0.25 # Seconds a render runs before it starts reporting progress
+PROGRESS_INTERVAL = 0.1 # Seconds between progress reports
+
+
+class BackgroundRenderer:
+    """
+    Renders chart states on a daemon thread.
+
+    on_done(snapshot, node_count, seconds), on_progress(done, total) and
+    on_error(exception) are called on the Tk thread, and only for the newest request;
+    without on_error a failed render raises from the poll. cache_budget is the memory,
+    in bytes, the render cache may use; its hit and miss counters are on self.cache.
+    """
+
+    def __init__(self, master, on_done, on_progress=None, on_error=None, cache_budget=DEFAULT_BUDGET, **layout_options):
+        self.master = master
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.snapshot = CanvasSnapshot()
+        self._renderer = IncrementalRenderer(**layout_options)
+        self.cache = RenderCache(cache_budget) # only the worker thread changes it
+        self._results = queue.Queue()
+        self._condition = threading.Condition()
+        self._request = None # (generation, state, trace) waiting for the worker
+        self._generation = 0 # generation of the newest request
+        self._finished = 0 # generation of the newest request the worker has finished
+        self._poll_job = None
+        self._waiting = [] # after_render() callbacks for the newest request
+        self._thread = threading.Thread(target=self._run, name="flowchart-renderer", daemon=True)
+        self._thread.start()
+
+    # --- Tk thread ---
+    def submit(self, state, trace=None):
+        """
+        Queues a render of state (a flowchart_history.ChartState), replacing any pending one.
+        With a flowchart_profile.ActionTrace, the render records its phases in it.
+        """
+        with self._condition:
+            self._generation += 1
+            self._request = (self._generation, state, trace)
+            self._condition.notify()
+        if self._poll_job is None:
+            self._poll_job = self.master.after(POLL_MS, self._poll)
+
+    def cancel(self):
+        """
+        Drops the pending request and makes a running render stop at its next progress
+        check. after_render() callbacks still waiting are dropped too.
+        """
+        self._waiting = []
+        with self._condition:
+            self._generation += 1
+            self._request = None
+            self._finished = self._generation
+            self._condition.notify_all()
+
+    def busy(self):
+        with self._condition:
+            return self._finished != self._generation
+
+    def after_render(self, callback):
+        """
+        Calls callback(snapshot) on the Tk thread once the newest request is rendered and
+        delivered, straight away if it already is. If that render fails, on_error reports
+        it and callback is dropped.
+        """
+        self._waiting.append(callback)
+        if self._poll_job is None:
+            self._poll()
+
+    def wait(self):
+        """
+        Blocks until the newest request is rendered, delivers it and returns the snapshot.
+        For scripts and tests: the builder uses after_render(), which never blocks Tk.
+        """
+        if self._poll_job is not None:
+            self.master.after_cancel(self._poll_job); self._poll_job = None
+        with self._condition:
+            while self._finished != self._generation:
+                self._condition.wait()
+        self._poll()
+        return self.snapshot
+
+    def _poll(self):
+        self._poll_job = None
+        # The worker queues its result before it marks a request finished, so once it is
+        # not busy here, everything it will send for the newest request is in the queue.
+        busy = self.busy()
+        while True:
+            try: message = self._results.get_nowait()
+            except queue.Empty: break
+            if message[1] != self._generation: continue # a stale render
+            if message[0] == "error":
+                self._waiting = []
+                if self.on_error is None: raise message[2]
+                self.on_error(message[2])
+            elif message[0] == "progress":
+                if self.on_progress: self.on_progress(*message[2:])
+            else:
+                self.snapshot = message[2]
+                self.on_done(*message[2:])
+        if busy:
+            if self._poll_job is None: self._poll_job = self.master.after(POLL_MS, self._poll)
+        elif self._waiting:
+            waiting, self._waiting = self._waiting, []
+            for callback in waiting: callback(self.snapshot)
+
+    # --- Worker thread ---
+    def _run(self):
+        previous = None # snapshot of the renderer's canvas as it stood after its last completed update
+        rendered = EMPTY # a state with the same content as the nodes the renderer has drawn
+        while True:
+            with self._condition:
+                while self._request is None:
+                    self._condition.wait()
+                generation, state, trace = self._request
+                self._request = None
+
+            start = time.perf_counter()
+            key = cache_key(state)
+            cached = self.cache.get(key)
+            if trace is not None:
+                trace.add_span("cache lookup", start, time.perf_counter(), hit=cached is not None)
+            if cached is not None:
+                # The renderer stays where it was; the next miss carries on from the prefix it shares.
+                self._results.put(("done", generation, cached.snapshot, state.length, time.perf_counter() - start))
+                self._finish(generation)
+                continue
+
+            next_report = [start + PROGRESS_DELAY]
+            def progress(done, total):
+                if self._generation != generation:
+                    return False
+                now = time.perf_counter()
+                if now >= next_report[0]:
+                    self._results.put(("progress", generation, done, total))
+                    next_report[0] = now + PROGRESS_INTERVAL
+                return True
+
+            try:
+                if trace is not None:
+                    self._renderer.stats = {"layout": 0.0, "draw": 0.0, "nodes": 0, "retries": 0}
+                    update_start = time.perf_counter()
+                keep = common_length(rendered, state)
+                update = self._renderer.replace(keep, state.nodes(keep), progress)
+                stats, self._renderer.stats = self._renderer.stats, None
+                rendered = state.ancestor(len(self._renderer.nodes))
+                if update is None:
+                    continue # cancelled; the next request carries on from the nodes already drawn
+                canvas = self._renderer.canvas
+                if trace is not None:
+                    self._trace_update(trace, stats, update_start)
+                    snapshot_start = time.perf_counter()
+                previous = CanvasSnapshot.of(canvas, previous, None if update.full else update.rows)
+                if trace is not None:
+                    trace.add_span("snapshot", snapshot_start, time.perf_counter(), rows_copied=canvas.height if update.full else len(update.rows))
+                self.cache.put(key, CachedRender(previous, self._renderer.layout))
+                self._results.put(("done", generation, previous, state.length, time.perf_counter() - start))
+            except Exception as e:
+                self._renderer.stats = None
+                # Start the next render from scratch and let the Tk thread report the error.
+                self._renderer.clear(); previous = None; rendered = EMPTY
+                self._results.put(("error", generation, e))
+            self._finish(generation)
+
+    def _trace_update(self, trace, stats, update_start):
+        """
+        Adds the renderer's placement and drawing time to trace. Both run interleaved,
+        node by node, so they are recorded as their totals, one after the other.
+        """
+        trace.add_span("render", update_start, time.perf_counter(), nodes_drawn=stats["nodes"])
+        trace.add_span("layout", update_start, update_start + stats["layout"], aggregated=True)
+        trace.add_span("draw", update_start + stats["layout"], update_start + stats["layout"] + stats["draw"], aggregated=True)
+        trace.count(nodes=len(self._renderer.nodes), nodes_drawn=stats["nodes"], collision_retries=stats["retries"],
+                    canvas_width=self._renderer.width, canvas_height=self._renderer.height)
+
+    def _finish(self, generation):
+        with self._condition:
+            self._finished = max(self._finished, generation)
+            self._condition.notify_all()
@@ -7,17 +7,33 @@ A GUI application using tkinter to build and display Unicode-based flowcharts.
 Users can add steps with one or two lines of text, and the application
 will generate a text-based visual representation that can be copied or exported.
 """
+import itertools
 import tkinter as tk
-from tkinter import ttk, scrolledtext, filedialog
-import textwrap # NEW: Importing the textwrap module for automatic text wrapping
+from tkinter import ttk, filedialog
+
+import flowchart_layout
+from flowchart_background import BackgroundRenderer
+from flowchart_file import save_chart, load_chart, BINARY_EXTENSION
+from flowchart_history import History, ChartState, EMPTY, path_between
+from flowchart_io import DefinitionError, load_definition, parse_steps
+from flowchart_profile import Profiler
+from flowchart_labels import wrap_text
+from flowchart_picker import StepIndex, StepPicker
+from flowchart_renderer import write_rows
+from flowchart_store import NodeStore
+from flowchart_viewer import ChartViewer
+
 
 class FlowchartBuilderApp:
     # Defining a UNIFORM BOX SIZE for all nodes
-    UNIFORM_NODE_WIDTH = 25 # Characters wide
+    UNIFORM_NODE_WIDTH = flowchart_layout.UNIFORM_NODE_WIDTH # Characters wide
     # Increased height to accommodate two lines of text + borders.
-    UNIFORM_NODE_HEIGHT = 5 # Lines high - now has room for a third line of text for loop note
-    VERTICAL_SPACING = 3 # Lines between nodes
-    HORIZONTAL_SPACING = 7 # Characters between nodes
+    UNIFORM_NODE_HEIGHT = flowchart_layout.UNIFORM_NODE_HEIGHT # Lines high - now has room for a third line of text for loop note
+    VERTICAL_SPACING = flowchart_layout.VERTICAL_SPACING # Lines between nodes
+    HORIZONTAL_SPACING = flowchart_layout.HORIZONTAL_SPACING # Characters between nodes
+    # The end picker lists the unconnected steps when there are at most this many, and says ALL_UNCONNECTED otherwise.
+    END_PREFILL_LIMIT = 10
+    ALL_UNCONNECTED = "All unconnected steps"
 
     def __init__(self, master):
         self.master = master
@@ -25,14 +41,37 @@ class FlowchartBuilderApp:
         master.geometry("1200x700") # Setting a wider initial window size
         master.resizable(True, True) # Allowing resizing
 
+        # Opt-in per-action timing (FLOWCHART_PROFILE=1 or Tools > Profile Actions, see flowchart_profile).
+        self.profiler = Profiler()
+        self._trace = None # trace of the action being handled
+        self._render_trace = None # trace waiting for its chart to be shown
+        self.profile_var = tk.BooleanVar(value=self.profiler.enabled)
+        menubar = tk.Menu(master)
+        tools_menu = tk.Menu(menubar, tearoff=0)
+        tools_menu.add_checkbutton(label="Profile Actions", variable=self.profile_var, command=self._toggle_profiling)
+        menubar.add_cascade(label="Tools", menu=tools_menu)
+        master.config(menu=menubar)
+
         # Configuring grid for main window to allow resizing
         master.grid_rowconfigure(0, weight=1)
         master.grid_columnconfigure(0, weight=1) # Left panel weight
         master.grid_columnconfigure(1, weight=3) # Right panel weight
 
-        self.nodes = []
-        self.node_id_counter = 0
+        # Ordered node list with an id index, child lists and the set of unconnected steps (see flowchart_store).
+        self.nodes = NodeStore()
         self.flowchart_ended = False
+        # Every edit is recorded as a persistent chart state, so undo/redo never copy the node list (see flowchart_history).
+        self.history = History()
+        self._model_state = EMPTY # the history state self.nodes currently holds
+        self._submitted_state = EMPTY # the state of the last render request
+        # Layout and drawing run on a worker thread that keeps the placed boxes and the
+        # character canvas between edits (see flowchart_background and flowchart_renderer).
+        self.layout_options = dict(node_width=self.UNIFORM_NODE_WIDTH, node_height=self.UNIFORM_NODE_HEIGHT, vertical_spacing=self.VERTICAL_SPACING, horizontal_spacing=self.HORIZONTAL_SPACING)
+        self.renderer = BackgroundRenderer(self.master, self._show_render, self._show_render_progress, self._show_render_error, **self.layout_options)
+        self._render_progress_shown = False
+        # Rendered rows read from an opened chart file, shown until the chart is next rendered.
+        self._loaded_render = None
+        self._retired_render = None # a loaded render still on screen while its replacement is drawn
 
         # --- Input Panel (Left Side) ---
         self.input_frame = ttk.Frame(master, padding="15", relief="groove", borderwidth=2)
@@ -46,11 +85,16 @@ class FlowchartBuilderApp:
         self.lbl_start_node = ttk.Label(self.input_frame, text="1. Enter text for the start step:")
         self.start_node_text_input = tk.Text(self.input_frame, height=2, width=50, wrap=tk.WORD, font=("TkDefaultFont", 9))
         self.btn_add_start_node = ttk.Button(self.input_frame, text="Add Start Node", command=self.add_start_node)
+        # Or a whole chart at once, as an indented outline or an edge list (see flowchart_io.parse_outline / parse_edge_list).
+        self.lbl_import_steps = ttk.Label(self.input_frame, text="...or paste all the steps (an indented outline, or 'A -> B' lines):")
+        self.import_text_input = tk.Text(self.input_frame, height=6, width=50, wrap=tk.NONE, font=("TkDefaultFont", 9))
+        self.btn_import_steps = ttk.Button(self.input_frame, text="Import Pasted Steps", command=self.import_pasted_steps)
+        self.btn_import_file = ttk.Button(self.input_frame, text="Import from File...", command=self.import_steps_file)
 
         self.lbl_node_type_select = ttk.Label(self.input_frame, text="2. Choose Node Type:")
         self.node_type_var = tk.StringVar(value="regular")
-        self.rb_regular_step = ttk.Radiobutton(self.input_frame, text="Regular Step", variable=self.node_type_var, value="regular", command=self._update_input_layout)
-        self.rb_merge_step = ttk.Radiobutton(self.input_frame, text="Merge Step", variable=self.node_type_var, value="merge", command=self._update_input_layout)
+        self.rb_regular_step = ttk.Radiobutton(self.input_frame, text="Regular Step", variable=self.node_type_var, value="regular", command=self._options_changed)
+        self.rb_merge_step = ttk.Radiobutton(self.input_frame, text="Merge Step", variable=self.node_type_var, value="merge", command=self._options_changed)
 
         self.lbl_next_node = ttk.Label(self.input_frame, text="3. Enter text for the next step:")
         self.next_node_text_input = tk.Text(self.input_frame, height=2, width=50, wrap=tk.WORD, font=("TkDefaultFont", 9))
@@ -58,33 +102,46 @@ class FlowchartBuilderApp:
         # NEW: Adding a persistent label to inform the user about auto-wrapping.
         self.lbl_char_limit_note = ttk.Label(self.input_frame, text=f"(Max {self.UNIFORM_NODE_WIDTH - 4} chars per line - text will auto-wrap)", font=("TkDefaultFont", 8, "italic"))
 
-        self.lbl_connect_to = ttk.Label(self.input_frame, text="4. Connect from which previous step?")
-        self.source_node_combobox = ttk.Combobox(self.input_frame, state="readonly")
+        # Step pickers search the steps as you type instead of listing them all (see flowchart_picker).
+        self._step_index = StepIndex(self._node_option) # every non-end step, searchable by label
+        self.lbl_connect_to = ttk.Label(self.input_frame, text="4. Connect from which previous step? (type to search)")
+        self.source_node_combobox = StepPicker(self.input_frame, self._step_index)
         self.lbl_merge_source1 = ttk.Label(self.input_frame, text="4a. Connect Source 1:")
-        self.merge_source1_combobox = ttk.Combobox(self.input_frame, state="readonly")
+        self.merge_source1_combobox = StepPicker(self.input_frame, self._step_index)
         self.lbl_merge_source2 = ttk.Label(self.input_frame, text="4b. Connect Source 2:")
-        self.merge_source2_combobox = ttk.Combobox(self.input_frame, state="readonly")
+        self.merge_source2_combobox = StepPicker(self.input_frame, self._step_index)
         self.lbl_branch_direction = ttk.Label(self.input_frame, text="5. How should the connection branch?")
         self.branch_direction_var = tk.StringVar(value="down")
         self.rb_down = ttk.Radiobutton(self.input_frame, text="Down", variable=self.branch_direction_var, value="down")
         self.rb_right = ttk.Radiobutton(self.input_frame, text="Right", variable=self.branch_direction_var, value="right")
         self.is_loop_var = tk.BooleanVar(value=False)
-        self.chk_is_loop = ttk.Checkbutton(self.input_frame, text="Is this step part of a loop?", variable=self.is_loop_var, command=self._update_input_layout)
+        self.chk_is_loop = ttk.Checkbutton(self.input_frame, text="Is this step part of a loop?", variable=self.is_loop_var, command=self._options_changed)
         self.lbl_loop_target = ttk.Label(self.input_frame, text="*Loop to:")
-        self.loop_target_combobox = ttk.Combobox(self.input_frame, state="readonly")
+        self.loop_target_combobox = StepPicker(self.input_frame, self._step_index)
         self.btn_add_step = ttk.Button(self.input_frame, text="Add Step", command=self.add_next_node)
         self.lbl_end_node_source = ttk.Label(self.input_frame, text='6. Before clicking "Add End of Flowchart", choose the step/s where to add the "End of Flowchart".', wraplength=400)
-        self.end_node_combobox = ttk.Combobox(self.input_frame, state="readonly")
+        self.end_node_combobox = StepPicker(self.input_frame, self._step_index, multiple=True, empty_matches=self._sink_options)
         self.btn_end_flowchart = ttk.Button(self.input_frame, text='Add "End of Flowchart"', command=self.end_flowchart, state=tk.DISABLED)
 
         self.btn_delete_last_step = ttk.Button(self.input_frame, text="Delete Last Step", command=self.delete_last_node, state=tk.DISABLED)
+        self.btn_undo = ttk.Button(self.input_frame, text="Undo", command=self.undo, state=tk.DISABLED)
+        self.btn_redo = ttk.Button(self.input_frame, text="Redo", command=self.redo, state=tk.DISABLED)
         self.btn_reset = ttk.Button(self.input_frame, text="Reset Flowchart", command=self.reset_flowchart)
 
         self.status_text_var = tk.StringVar(value="")
         self.status_bar = ttk.Label(self.input_frame, textvariable=self.status_text_var, relief=tk.SUNKEN, anchor=tk.W)
-        self.status_bar.grid(row=21, column=0, columnspan=2, pady=(10, 0), sticky="ew")
 
+        # Refreshes are coalesced into one idle-time pass (see _request_refresh). The layout
+        # pass remembers where each widget is gridded and only touches the ones that move,
+        # and the step pickers only get new default selections when the node model has changed since they were set.
+        self._refresh_job = None
+        self._pending_layout = self._pending_render = False
+        self._placements = {}
+        self._model_version = 0
+        self._combobox_versions = {}
         self._update_input_layout()
+        master.bind_all("<Control-z>", lambda e: self.undo())
+        master.bind_all("<Control-y>", lambda e: self.redo())
 
         # --- Output Panel (Right Side) ---
         self.output_frame = ttk.Frame(master, padding="15", relief="groove", borderwidth=2)
@@ -93,98 +150,177 @@ class FlowchartBuilderApp:
         self.output_frame.grid_columnconfigure(0, weight=1)
 
         ttk.Label(self.output_frame, text="Generated Unicode Flowchart", font=("TkDefaultFont", 14, "bold")).grid(row=0, column=0, pady=(0, 10), sticky="ew")
-        self.flowchart_text = scrolledtext.ScrolledText(self.output_frame, wrap=tk.NONE, width=120, height=25, font=("Consolas", 10), bg="#1e1e1e", fg="#33ff33", insertbackground="#33ff33")
-        self.flowchart_text.grid(row=1, column=0, sticky="nsew")
-        self.flowchart_text.insert(tk.END, "Your flowchart will appear here.")
-        self.flowchart_text.config(state=tk.DISABLED)
+        # The viewer only holds the rows and columns that are on screen (see flowchart_viewer).
+        self.flowchart_view = ChartViewer(self.output_frame, font=("Consolas", 10), width=120, height=25, bg="#1e1e1e", fg="#33ff33", insertbackground="#33ff33")
+        self.flowchart_view.grid(row=1, column=0, sticky="nsew")
+        self.flowchart_view.show_message("Your flowchart will appear here.")
 
         self.output_actions_frame = ttk.Frame(self.output_frame)
         self.output_actions_frame.grid(row=2, column=0, sticky="ew", pady=(10, 0))
-        self.output_actions_frame.grid_columnconfigure((0, 1), weight=1)
+        self.output_actions_frame.grid_columnconfigure((0, 1, 2, 3), weight=1)
         self.btn_copy = ttk.Button(self.output_actions_frame, text="Copy to Clipboard", command=self.copy_to_clipboard)
         self.btn_copy.grid(row=0, column=0, padx=5, sticky="ew")
         self.btn_export = ttk.Button(self.output_actions_frame, text="Export to .txt", command=self.export_to_txt)
         self.btn_export.grid(row=0, column=1, padx=5, sticky="ew")
+        self.btn_save_chart = ttk.Button(self.output_actions_frame, text="Save Chart...", command=self.save_chart)
+        self.btn_save_chart.grid(row=0, column=2, padx=5, sticky="ew")
+        self.btn_open_chart = ttk.Button(self.output_actions_frame, text="Open Chart...", command=self.open_chart)
+        self.btn_open_chart.grid(row=0, column=3, padx=5, sticky="ew")
 
     def _update_status(self, message, is_warning=False):
         """Displays a message in the status bar for a few seconds."""
         self.status_text_var.set(message)
         self.master.after(3000, lambda: self.status_text_var.set(""))
 
+    def _request_refresh(self, layout=True, render=False):
+        """Schedules the input panel (and optionally the chart) to be refreshed once Tk is idle."""
+        self._pending_layout |= layout; self._pending_render |= render
+        if self._refresh_job is None:
+            self._refresh_job = self.master.after_idle(self._flush_refresh)
+
+    def _flush_refresh(self):
+        """Runs a pending refresh right away. Actions call this first so they never read stale widgets."""
+        if self._refresh_job is not None:
+            self.master.after_cancel(self._refresh_job); self._refresh_job = None
+        layout, render = self._pending_layout, self._pending_render
+        self._pending_layout = self._pending_render = False
+        if self._trace is None:
+            if layout: self._update_input_layout()
+            if render: self.generate_flowchart()
+            return
+        if layout:
+            with self._trace.span("panel"): self._update_input_layout()
+        if render: self.generate_flowchart()
+        # Still set if no render was requested (or needed); the action is complete.
+        if self._trace is not None:
+            self._finish_trace(self._trace); self._trace = None
+
+    def _options_changed(self):
+        self._begin_trace("Change Options")
+        self._request_refresh()
+
+    def _toggle_profiling(self):
+        self.profiler.enabled = self.profile_var.get()
+        self._update_status(f"Profiling on. Traces are written to {self.profiler.trace_dir}" if self.profiler.enabled else "Profiling off.")
+
+    def _begin_trace(self, action):
+        """Starts timing an action when profiling is on. Actions call this right after their first _flush_refresh."""
+        if not self.profiler.enabled: return
+        if self._trace is not None: self._finish_trace(self._trace)
+        self._trace = self.profiler.start(action)
+        self._request_refresh(layout=False) # makes sure the trace is finished even if the action changes nothing
+
+    def _finish_trace(self, trace):
+        """Writes a finished action's trace and shows its summary in the status bar."""
+        try:
+            self.profiler.finish(trace)
+        except OSError as e:
+            self._update_status(f"Error: Failed to write the profiling trace: {e}", is_warning=True)
+            return
+        self._update_status(f"{self.status_text_var.get()} [{trace.summary()}]".strip())
+
+    def _nodes_changed(self, added=None, removed=None):
+        """Keeps the step index in step with a node that was just added or removed."""
+        if added is not None and not added.is_end: self._step_index.append(added)
+        if removed is not None and not removed.is_end: self._step_index.pop()
+        self._model_version += 1
+
     def _update_input_layout(self):
         """
         Consolidates all layout logic into a single method.
         This method is called to show or hide widgets based on the current state.
         """
-        for widget in self.input_frame.winfo_children():
-            if widget.grid_info() and int(widget.grid_info().get('row', 0)) != 0:
-                widget.grid_forget()
+        placements = []
+        def place(widget, **options): placements.append((widget, options))
 
         current_row = 1
         if not self.nodes:
-            self.lbl_start_node.grid(row=current_row, column=0, columnspan=2, pady=(10, 2), sticky="w"); current_row += 1
-            self.start_node_text_input.grid(row=current_row, column=0, columnspan=2, pady=(0, 2), sticky="ew"); current_row += 1
-            self.lbl_char_limit_note.grid(row=current_row, column=0, columnspan=2, pady=(0, 5), sticky="w"); current_row += 1
-            self.btn_add_start_node.grid(row=current_row, column=0, columnspan=2, pady=(0, 10), sticky="ew"); current_row += 1
+            place(self.lbl_start_node, row=current_row, column=0, columnspan=2, pady=(10, 2), sticky="w"); current_row += 1
+            place(self.start_node_text_input, row=current_row, column=0, columnspan=2, pady=(0, 2), sticky="ew"); current_row += 1
+            place(self.lbl_char_limit_note, row=current_row, column=0, columnspan=2, pady=(0, 5), sticky="w"); current_row += 1
+            place(self.btn_add_start_node, row=current_row, column=0, columnspan=2, pady=(0, 10), sticky="ew"); current_row += 1
+            place(self.lbl_import_steps, row=current_row, column=0, columnspan=2, pady=(10, 2), sticky="w"); current_row += 1
+            place(self.import_text_input, row=current_row, column=0, columnspan=2, pady=(0, 5), sticky="ew"); current_row += 1
+            place(self.btn_import_steps, row=current_row, column=0, pady=(0, 10), padx=(0, 5), sticky="ew")
+            place(self.btn_import_file, row=current_row, column=1, pady=(0, 10), sticky="ew"); current_row += 1
             self.btn_end_flowchart.config(state=tk.DISABLED)
         else:
-            self.lbl_node_type_select.grid(row=current_row, column=0, columnspan=2, pady=(10, 2), sticky="w"); current_row += 1
-            self.rb_regular_step.grid(row=current_row, column=0, sticky="w", padx=(0, 10))
-            self.rb_merge_step.grid(row=current_row, column=1, sticky="w"); current_row += 1
-            self.lbl_next_node.grid(row=current_row, column=0, columnspan=2, pady=(10, 2), sticky="w"); current_row += 1
-            self.next_node_text_input.grid(row=current_row, column=0, columnspan=2, pady=(0, 2), sticky="ew"); current_row += 1
-            self.lbl_char_limit_note.grid(row=current_row, column=0, columnspan=2, pady=(0, 5), sticky="w"); current_row += 1
+            place(self.lbl_node_type_select, row=current_row, column=0, columnspan=2, pady=(10, 2), sticky="w"); current_row += 1
+            place(self.rb_regular_step, row=current_row, column=0, sticky="w", padx=(0, 10))
+            place(self.rb_merge_step, row=current_row, column=1, sticky="w"); current_row += 1
+            place(self.lbl_next_node, row=current_row, column=0, columnspan=2, pady=(10, 2), sticky="w"); current_row += 1
+            place(self.next_node_text_input, row=current_row, column=0, columnspan=2, pady=(0, 2), sticky="ew"); current_row += 1
+            place(self.lbl_char_limit_note, row=current_row, column=0, columnspan=2, pady=(0, 5), sticky="w"); current_row += 1
 
             if self.node_type_var.get() == "regular":
-                self.lbl_connect_to.grid(row=current_row, column=0, columnspan=2, pady=(0, 2), sticky="w"); current_row += 1
-                self.source_node_combobox.grid(row=current_row, column=0, columnspan=2, pady=(0, 5), sticky="ew"); current_row += 1
+                place(self.lbl_connect_to, row=current_row, column=0, columnspan=2, pady=(0, 2), sticky="w"); current_row += 1
+                place(self.source_node_combobox, row=current_row, column=0, columnspan=2, pady=(0, 5), sticky="ew"); current_row += 1
                 self.update_source_node_combobox(is_merge=False)
             else: # merge
-                self.lbl_merge_source1.grid(row=current_row, column=0, pady=(0, 2), sticky="w")
-                self.merge_source1_combobox.grid(row=current_row, column=1, pady=(0, 5), sticky="ew"); current_row += 1
-                self.lbl_merge_source2.grid(row=current_row, column=0, pady=(0, 2), sticky="w")
-                self.merge_source2_combobox.grid(row=current_row, column=1, pady=(0, 5), sticky="ew"); current_row += 1
+                place(self.lbl_merge_source1, row=current_row, column=0, pady=(0, 2), sticky="w")
+                place(self.merge_source1_combobox, row=current_row, column=1, pady=(0, 5), sticky="ew"); current_row += 1
+                place(self.lbl_merge_source2, row=current_row, column=0, pady=(0, 2), sticky="w")
+                place(self.merge_source2_combobox, row=current_row, column=1, pady=(0, 5), sticky="ew"); current_row += 1
                 self.update_source_node_combobox(is_merge=True)
 
-            self.lbl_branch_direction.grid(row=current_row, column=0, columnspan=2, pady=(10, 2), sticky="w"); current_row += 1
-            self.rb_down.grid(row=current_row, column=0, sticky="w", padx=(0, 10))
-            self.rb_right.grid(row=current_row, column=1, sticky="w"); current_row += 1
-            self.chk_is_loop.grid(row=current_row, column=0, columnspan=2, pady=(10, 2), sticky="w"); current_row += 1
+            place(self.lbl_branch_direction, row=current_row, column=0, columnspan=2, pady=(10, 2), sticky="w"); current_row += 1
+            place(self.rb_down, row=current_row, column=0, sticky="w", padx=(0, 10))
+            place(self.rb_right, row=current_row, column=1, sticky="w"); current_row += 1
+            place(self.chk_is_loop, row=current_row, column=0, columnspan=2, pady=(10, 2), sticky="w"); current_row += 1
 
             if self.is_loop_var.get():
-                self.lbl_loop_target.grid(row=current_row, column=0, columnspan=2, pady=(0, 2), sticky="w"); current_row += 1
-                self.loop_target_combobox.grid(row=current_row, column=0, columnspan=2, pady=(0, 5), sticky="ew"); current_row += 1
+                place(self.lbl_loop_target, row=current_row, column=0, columnspan=2, pady=(0, 2), sticky="w"); current_row += 1
+                place(self.loop_target_combobox, row=current_row, column=0, columnspan=2, pady=(0, 5), sticky="ew"); current_row += 1
                 self.update_loop_target_combobox()
 
-            self.btn_add_step.grid(row=current_row, column=0, columnspan=2, pady=(20, 10), sticky="ew"); current_row += 1
-            self.lbl_end_node_source.grid(row=current_row, column=0, columnspan=2, pady=(10, 2), sticky="w"); current_row += 1
-            self.end_node_combobox.grid(row=current_row, column=0, columnspan=2, pady=(0, 5), sticky="ew"); current_row += 1
+            place(self.btn_add_step, row=current_row, column=0, columnspan=2, pady=(20, 10), sticky="ew"); current_row += 1
+            place(self.lbl_end_node_source, row=current_row, column=0, columnspan=2, pady=(10, 2), sticky="w"); current_row += 1
+            place(self.end_node_combobox, row=current_row, column=0, columnspan=2, pady=(0, 5), sticky="ew"); current_row += 1
             self.btn_end_flowchart.config(state=tk.NORMAL if not self.flowchart_ended else tk.DISABLED)
 
-        self.btn_end_flowchart.grid(row=current_row + 1, column=0, columnspan=2, pady=(10, 5), sticky="ew")
-        self.btn_delete_last_step.grid(row=current_row + 2, column=0, columnspan=2, pady=(5, 5), sticky="ew")
-        self.btn_reset.grid(row=current_row + 3, column=0, columnspan=2, pady=(5, 0), sticky="ew")
+        place(self.btn_end_flowchart, row=current_row + 1, column=0, columnspan=2, pady=(10, 5), sticky="ew")
+        place(self.btn_delete_last_step, row=current_row + 2, column=0, columnspan=2, pady=(5, 5), sticky="ew")
+        place(self.btn_undo, row=current_row + 3, column=0, pady=(5, 5), padx=(0, 5), sticky="ew")
+        place(self.btn_redo, row=current_row + 3, column=1, pady=(5, 5), sticky="ew")
+        place(self.btn_reset, row=current_row + 4, column=0, columnspan=2, pady=(5, 0), sticky="ew")
+        place(self.status_bar, row=21, column=0, columnspan=2, pady=(10, 0), sticky="ew")
+        self._apply_placements(placements)
 
         self._update_delete_button_state()
         self._update_end_node_combobox()
 
+    def _apply_placements(self, placements):
+        """Grids only the widgets whose placement changed and forgets the ones no longer wanted."""
+        wanted = dict(placements)
+        for widget in [w for w in self._placements if w not in wanted]:
+            widget.grid_forget(); del self._placements[widget]
+        for widget, options in placements:
+            if self._placements.get(widget) != options:
+                widget.grid(**options); self._placements[widget] = options
+
+    def _picker_out_of_date(self, combo):
+        """True if the node model changed since the default selection of combo was last set (and marks it as set)."""
+        if self._combobox_versions.get(combo) == self._model_version:
+            return False
+        self._combobox_versions[combo] = self._model_version
+        return True
+
     def _update_delete_button_state(self):
         if len(self.nodes) > 1 and not self.flowchart_ended:
             self.btn_delete_last_step.config(state=tk.NORMAL)
         else:
             self.btn_delete_last_step.config(state=tk.DISABLED)
+        self.btn_undo.config(state=tk.NORMAL if self.history.can_undo() else tk.DISABLED)
+        self.btn_redo.config(state=tk.NORMAL if self.history.can_redo() else tk.DISABLED)
 
     # NEW: Helper function to wrap text to fit within node width.
     def _wrap_text(self, text, width):
         """Wraps text from a single string into a list of strings."""
-        lines = text.split('\n')
-        wrapped_lines = []
-        for line in lines:
-            # Using textwrap to handle wrapping long lines gracefully.
-            wrapped_lines.extend(textwrap.wrap(line, width=width, break_long_words=True))
-        return wrapped_lines
+        return wrap_text(text, width)
 
     def add_start_node(self):
+        self._flush_refresh()
+        self._begin_trace("Add Start Node")
         raw_text = self.start_node_text_input.get("1.0", tk.END).strip()
 
         # MODIFIED: Removed manual length check and implemented auto-wrapping.
@@ -195,22 +331,14 @@ class FlowchartBuilderApp:
             self._update_status("Input Error: Please enter text for the start node.", is_warning=True)
             return
 
-        self.node_id_counter += 1
-        node_id = f"node-{self.node_id_counter}"
-        self.nodes.append({
-            "id": node_id, "text": node_text_lines, "type": "regular",
-            "connections": [], "direction": None, "isLoop": False,
-            "loopTarget": "", "is_end": False
-        })
+        self._add_node(node_text_lines, type="regular", connections=[], direction=None)
         self.start_node_text_input.delete("1.0", tk.END)
-        self._update_input_layout()
-        self.update_source_node_combobox()
-        self._update_delete_button_state()
-        self._update_end_node_combobox()
-        self.generate_flowchart()
+        self._request_refresh(render=True)
         self._update_status(f"Start node '{node_text_lines[0]}' added.")
 
     def add_next_node(self):
+        self._flush_refresh()
+        self._begin_trace("Add Step")
         if self.flowchart_ended:
             self._update_status("Flowchart Ended: Please reset to create a new one.", is_warning=True)
             return
@@ -230,14 +358,21 @@ class FlowchartBuilderApp:
                 self._update_status("Input Error: Please select a previous step to connect to.", is_warning=True)
                 return
             parsed_source_id = self._parse_combobox_selection(selected_source_id_text)
-            if parsed_source_id: connections.append(parsed_source_id)
+            if parsed_source_id not in self.nodes:
+                self._update_status(f"Input Error: '{selected_source_id_text}' does not match any existing step.", is_warning=True)
+                return
+            connections.append(parsed_source_id)
         else: # merge
             s1_text = self.merge_source1_combobox.get(); s2_text = self.merge_source2_combobox.get()
             if not s1_text or not s2_text:
                 self._update_status("Input Error: Please select both sources for the merge step.", is_warning=True)
                 return
             p1_id = self._parse_combobox_selection(s1_text); p2_id = self._parse_combobox_selection(s2_text)
-            if p1_id and p2_id: connections.extend([p1_id, p2_id])
+            for text, node_id in ((s1_text, p1_id), (s2_text, p2_id)):
+                if node_id not in self.nodes:
+                    self._update_status(f"Input Error: '{text}' does not match any existing step.", is_warning=True)
+                    return
+            connections.extend([p1_id, p2_id])
             if p1_id == p2_id:
                 self._update_status("Input Error: Merge sources must be distinct.", is_warning=True)
                 return
@@ -250,58 +385,87 @@ class FlowchartBuilderApp:
                  self._update_status("Input Error: Please choose the loop target text.", is_warning=True)
                  return
             loop_target_node_id = self._parse_combobox_selection(loop_target_text)
-            loop_target_node = next((n for n in self.nodes if n['id'] == loop_target_node_id), None)
+            loop_target_node = self.nodes.get(loop_target_node_id)
             if not loop_target_node:
                 self._update_status(f"Input Error: Loop target '{loop_target_text}' does not match any existing step.", is_warning=True)
                 return
-            loop_target_text = loop_target_node['text'][0]
-
-        self.node_id_counter += 1; node_id = f"node-{self.node_id_counter}"
-        self.nodes.append({
-            "id": node_id, "text": node_text_lines, "type": self.node_type_var.get(),
-            "connections": connections, "direction": self.branch_direction_var.get(),
-            "isLoop": is_loop, "loopTarget": loop_target_text, "is_end": False
-        })
+            loop_target_text = loop_target_node.text[0]
+
+        self._add_node(node_text_lines, type=self.node_type_var.get(), connections=connections,
+                       direction=self.branch_direction_var.get(), isLoop=is_loop, loopTarget=loop_target_text)
         self.next_node_text_input.delete("1.0", tk.END); self.is_loop_var.set(False);
-        self._update_input_layout()
-        self.update_source_node_combobox()
-        self._update_delete_button_state()
-        self._update_end_node_combobox()
-        self.generate_flowchart()
+        self._request_refresh(render=True)
         self._update_status(f"Step '{node_text_lines[0]}' added.")
 
     def delete_last_node(self):
+        self._flush_refresh()
+        self._begin_trace("Delete Last Step")
         if len(self.nodes) == 1:
             self._update_status("Delete Error: The start node cannot be deleted.", is_warning=True)
             return
 
-        last_node = self.nodes.pop()
-
-        if last_node['is_end']:
-            self.flowchart_ended = False
-            for widget in [self.next_node_text_input, self.source_node_combobox, self.merge_source1_combobox, self.merge_source2_combobox, self.btn_add_step, self.rb_regular_step, self.rb_merge_step, self.chk_is_loop, self.loop_target_combobox]:
-                widget.config(state=tk.NORMAL)
-            for combo in [self.source_node_combobox, self.merge_source1_combobox, self.merge_source2_combobox, self.loop_target_combobox]:
-                combo.config(state="readonly")
-            self.btn_end_flowchart.config(state=tk.NORMAL)
+        # The state before the last step was added already exists, so deleting records no new one.
+        self.history.record(self.history.current.parent)
+        self._go_to(self.history.current)
+        self._update_status("Last step has been deleted.")
 
-        if self.nodes:
-            self.node_id_counter = int(self.nodes[-1]['id'].split('-')[1])
-        else:
-            self.node_id_counter = 0
+    def undo(self):
+        self._flush_refresh()
+        self._begin_trace("Undo")
+        state = self.history.undo()
+        if state is None:
+            self._update_status("Nothing to undo.", is_warning=True)
+            return
+        self._go_to(state)
+        self._update_status(f"Undone. The flowchart has {len(self.nodes)} steps.")
+
+    def redo(self):
+        self._flush_refresh()
+        self._begin_trace("Redo")
+        state = self.history.redo()
+        if state is None:
+            self._update_status("Nothing to redo.", is_warning=True)
+            return
+        self._go_to(state)
+        self._update_status(f"Redone. The flowchart has {len(self.nodes)} steps.")
 
-        self.update_source_node_combobox()
-        self.update_loop_target_combobox()
-        self._update_delete_button_state()
-        self._update_end_node_combobox()
-        self.generate_flowchart()
-        self._update_status("Last step has been deleted.")
+    def _go_to(self, state):
+        """
+        Brings the node model to a history state, popping and re-adding only the steps
+        that differ, and shows that state's render right away when it is still cached.
+        """
+        pops, appended = path_between(self._model_state, state)
+        for _ in range(pops): self._nodes_changed(removed=self.nodes.pop())
+        for node in appended: self._nodes_changed(added=self.nodes.append(node))
+        self._model_state = state
+
+        if self.flowchart_ended != state.ended:
+            self.flowchart_ended = state.ended
+            if self.flowchart_ended: self._disable_step_inputs()
+            else: self._enable_step_inputs()
+        render = state.render()
+        if render is not None and self.nodes:
+            self._release_loaded_render()
+            self.flowchart_view.show(render)
+        self._request_refresh(render=True)
+
+    def _node_option(self, node):
+        """Combobox text for a node, e.g. 'Load data (ID: 3)'."""
+        short_id = node.id[len(NodeStore.ID_PREFIX):] if node.id.startswith(NodeStore.ID_PREFIX) else node.id
+        return f"{node.text[0]} (ID: {short_id})"
 
     def _parse_combobox_selection(self, selected_text):
-        try: return "node-" + selected_text.split('(ID: ')[1][:-1]
-        except IndexError: return None
+        try: short_id = selected_text.split('(ID: ')[1][:-1]
+        except IndexError:
+            # Typed into a picker without choosing from its list: take the newest step with exactly that label.
+            node = self._step_index.find(selected_text) if selected_text.strip() else None
+            return node.id if node is not None else None
+        node_id = NodeStore.ID_PREFIX + short_id
+        return node_id if node_id in self.nodes or short_id not in self.nodes else short_id
 
     def end_flowchart(self):
+        self._flush_refresh()
+        self._begin_trace("End Flowchart")
         if self.flowchart_ended:
             self._update_status("Flowchart Ended: Flowchart already ended.", is_warning=True)
             return
@@ -315,78 +479,104 @@ class FlowchartBuilderApp:
         # have to intentionally delete the content for it to be empty.
         # This change streamlines the process based on the expected workflow.
 
-        selected_nodes_list = selected_nodes_text.split(', ')
-        end_connections = [self._parse_combobox_selection(s) for s in selected_nodes_list if self._parse_combobox_selection(s)]
+        selected_nodes_list = [text.strip() for text in selected_nodes_text.split(',')]
+        end_connections = []
+        for text in selected_nodes_list:
+            if text == self.ALL_UNCONNECTED: end_connections.extend(node.id for node in self.nodes.sinks())
+            else: end_connections.append(self._parse_combobox_selection(text))
+        end_connections = [node_id for node_id in dict.fromkeys(end_connections) if node_id]
 
         if not end_connections:
             self._update_status("Input Error: No valid steps were selected to connect to 'End'.", is_warning=True)
             return
 
-        self.node_id_counter += 1
-        end_node_id = f"node-{self.node_id_counter}"
-        self.nodes.append({
-            "id": end_node_id, "text": ["End of Flowchart"], "type": "regular",
-            "connections": end_connections, "direction": "down",
-            "isLoop": False, "loopTarget": "", "is_end": True
-        })
+        self._add_node(["End of Flowchart"], type="regular", connections=end_connections, direction="down", is_end=True)
         self.flowchart_ended = True
         self._update_status("'End of Flowchart' step has been added.")
+        self._disable_step_inputs()
+        self._request_refresh(render=True)
+
+    def _add_node(self, text, **fields):
+        """Adds a step to the node model and records the new chart state for undo."""
+        node = self.nodes.add(text, **fields)
+        self._nodes_changed(added=node)
+        self._model_state = self._model_state.push(node)
+        self.history.record(self._model_state)
+
+    def _enable_step_inputs(self):
+        for widget in [self.next_node_text_input, self.source_node_combobox, self.merge_source1_combobox, self.merge_source2_combobox, self.btn_add_step, self.rb_regular_step, self.rb_merge_step, self.chk_is_loop, self.loop_target_combobox]:
+            widget.config(state=tk.NORMAL)
+        self.end_node_combobox.config(state=tk.NORMAL)
+        self.btn_end_flowchart.config(state=tk.NORMAL)
+
+    def _disable_step_inputs(self):
         for widget in [self.next_node_text_input, self.source_node_combobox, self.merge_source1_combobox, self.merge_source2_combobox, self.btn_add_step, self.btn_end_flowchart, self.rb_regular_step, self.rb_merge_step, self.chk_is_loop, self.loop_target_combobox, self.end_node_combobox]:
             widget.config(state=tk.DISABLED)
 
-        self.generate_flowchart()
-        self._update_delete_button_state()
-
     def update_source_node_combobox(self, is_merge=False):
-        node_options = [f"{node['text'][0]} (ID: {node['id'].split('-')[1]})" for node in self.nodes if not node['is_end']]
+        # Only the newest steps are needed as defaults; the pickers search the rest on demand.
+        # Like the end picker, a selection is only reset when the chart changed, so toggling options keeps it.
         if is_merge:
-            self.merge_source1_combobox['values'] = node_options; self.merge_source2_combobox['values'] = node_options
-            if node_options:
-                if len(node_options) >= 1: self.merge_source1_combobox.set(node_options[-1])
-                if len(node_options) >= 2: self.merge_source2_combobox.set(node_options[-2])
-                elif len(node_options) == 1: self.merge_source2_combobox.set(node_options[-1])
-            else: self.merge_source1_combobox.set(""); self.merge_source2_combobox.set("")
-        else:
-            self.source_node_combobox['values'] = node_options
-            if node_options: self.source_node_combobox.set(node_options[-1])
-            else: self.source_node_combobox.set("")
+            if self._picker_out_of_date(self.merge_source1_combobox):
+                recent = self._step_index.recent(2)
+                self.merge_source1_combobox.set(recent[0] if recent else "")
+                self.merge_source2_combobox.set(recent[-1] if recent else "")
+        elif self._picker_out_of_date(self.source_node_combobox):
+            recent = self._step_index.recent(1)
+            self.source_node_combobox.set(recent[0] if recent else "")
 
     def update_loop_target_combobox(self):
-        node_options = [f"{node['text'][0]} (ID: {node['id'].split('-')[1]})" for node in self.nodes if not node['is_end']]
-        self.loop_target_combobox['values'] = node_options
-        if node_options:
-            self.loop_target_combobox.set(node_options[-1])
-        else:
-            self.loop_target_combobox.set("")
+        if self._picker_out_of_date(self.loop_target_combobox):
+            recent = self._step_index.recent(1)
+            self.loop_target_combobox.set(recent[0] if recent else "")
+
+    def _sink_options(self, limit):
+        """Option text of the first limit unconnected steps, what the end picker lists before anything is typed."""
+        return [self._node_option(node) for node in itertools.islice(self.nodes.sinks(), limit)]
 
     def _update_end_node_combobox(self):
-        all_source_ids = set(conn for node in self.nodes for conn in node['connections'])
-        unconnected_node_options = [f"{node['text'][0]} (ID: {node['id'].split('-')[1]})" for node in self.nodes if node['id'] not in all_source_ids and not node['is_end']]
-        self.end_node_combobox['values'] = unconnected_node_options
-        self.end_node_combobox.set(", ".join(unconnected_node_options))
+        # The store keeps the unconnected steps up to date, no need to collect every connection here.
+        # The prefilled selection is only rebuilt when the chart changed, so toggling options keeps any edits.
+        if self._picker_out_of_date(self.end_node_combobox):
+            sinks = self._sink_options(self.END_PREFILL_LIMIT + 1)
+            self.end_node_combobox.set(", ".join(sinks) if len(sinks) <= self.END_PREFILL_LIMIT else self.ALL_UNCONNECTED)
 
     def reset_flowchart(self):
-        self.nodes = []; self.node_id_counter = 0; self.flowchart_ended = False
-        self.start_node_text_input.delete("1.0", tk.END); self.next_node_text_input.delete("1.0", tk.END)
+        self._flush_refresh()
+        self._begin_trace("Reset Flowchart")
+        # Reset is an edit like any other, so it can be undone.
+        self.history.record(EMPTY)
+        self._clear_chart()
+        self._request_refresh()
+        self._update_status("Flowchart has been reset.")
+
+    def _clear_chart(self):
+        self.nodes.clear(); self.flowchart_ended = False
+        self._model_state = EMPTY
+        self._step_index.clear(); self._nodes_changed()
+        self.start_node_text_input.delete("1.0", tk.END); self.next_node_text_input.delete("1.0", tk.END); self.import_text_input.delete("1.0", tk.END)
         self.is_loop_var.set(False); self.loop_target_combobox.set(""); self.node_type_var.set("regular")
-        self.flowchart_text.config(state=tk.NORMAL)
-        self.flowchart_text.delete(1.0, tk.END); self.flowchart_text.insert(tk.END, "Your flowchart will appear here.")
-        self.flowchart_text.config(state=tk.DISABLED)
+        self.renderer.cancel()
+        self.flowchart_view.show_message("Your flowchart will appear here.")
+        self._release_loaded_render()
         for widget in [self.start_node_text_input, self.next_node_text_input, self.btn_add_step, self.rb_regular_step, self.rb_merge_step, self.chk_is_loop]:
              widget.config(state=tk.NORMAL)
         for combo in [self.source_node_combobox, self.merge_source1_combobox, self.merge_source2_combobox, self.loop_target_combobox, self.end_node_combobox]:
-             combo.config(state="readonly")
+             combo.config(state=tk.NORMAL)
         self.btn_end_flowchart.config(state=tk.DISABLED)
-        self._update_input_layout()
-        self.update_source_node_combobox()
-        self.update_loop_target_combobox()
-        self._update_delete_button_state()
-        self._update_end_node_combobox()
-        self._update_status("Flowchart has been reset.")
 
     def copy_to_clipboard(self):
-        flowchart_content = self.flowchart_text.get("1.0", tk.END).strip()
-        if flowchart_content and flowchart_content != "Your flowchart will appear here.":
+        self._flush_refresh()
+        if self._loaded_render is not None:
+            self._copy_render(self._loaded_render)
+            return
+        # The viewer only holds what is on screen, so the full chart comes from the renderer once it has caught up.
+        if self.renderer.busy(): self._update_status("The flowchart will be copied once it has been rendered.")
+        self.renderer.after_render(self._copy_render)
+
+    def _copy_render(self, render):
+        flowchart_content = render.text().strip() if self.nodes else ""
+        if flowchart_content:
             sanitized_content = flowchart_content.replace('\xa0', ' ')
             self.master.clipboard_clear()
             self.master.clipboard_append(sanitized_content)
@@ -395,101 +585,156 @@ class FlowchartBuilderApp:
             self._update_status("Empty: There is no flowchart to copy.", is_warning=True)
 
     def export_to_txt(self):
-        flowchart_content = self.flowchart_text.get("1.0", tk.END).strip()
-        if not flowchart_content or flowchart_content == "Your flowchart will appear here.":
+        self._flush_refresh()
+        if not self.nodes:
             self._update_status("Empty: There is no flowchart to export.", is_warning=True)
             return
         filepath = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")], title="Save Flowchart As")
+        if not filepath:
+            return
+        if self._loaded_render is not None:
+            self._export_render(filepath, self._loaded_render)
+            return
+        # Written from the renderer's snapshot once it has caught up, so the Tk thread never lays the chart out itself.
+        if self.renderer.busy(): self._update_status("The flowchart will be exported once it has been rendered.")
+        self.renderer.after_render(lambda render: self._export_render(filepath, render))
+
+    def _export_render(self, filepath, render):
+        try:
+            # Streamed row by row, so the full text is never held in memory or read back from the widget.
+            with open(filepath, 'w', encoding='utf-8') as f: write_rows((render.row_text(y) for y in range(render.height)), f, strip=True)
+            self._update_status(f"Flowchart successfully saved to:\n{filepath}")
+        except Exception as e:
+            self._update_status(f"Error: Failed to save file: {e}", is_warning=True)
+
+    def save_chart(self):
+        self._flush_refresh()
+        if not self.nodes:
+            self._update_status("Empty: There is no flowchart to save.", is_warning=True)
+            return
+        filepath = filedialog.asksaveasfilename(defaultextension=BINARY_EXTENSION, filetypes=[("Flowchart Files", f"*{BINARY_EXTENSION}"), ("Flowchart JSON", "*.json"), ("All Files", "*.*")], title="Save Chart As")
         if filepath:
-            try:
-                with open(filepath, 'w', encoding='utf-8') as f: f.write(flowchart_content)
-                self._update_status(f"Flowchart successfully saved to:\n{filepath}")
-            except Exception as e:
-                self._update_status(f"Error: Failed to save file: {e}", is_warning=True)
+            # The rendered rows are saved with the steps, so opening the file shows the chart without laying it out again.
+            # An opened chart is rendered afresh first: its rows are mapped from the file, which may be the one being replaced.
+            if self._loaded_render is not None: self.generate_flowchart()
+            if self.renderer.busy(): self._update_status("The chart will be saved once it has been rendered.")
+            self.renderer.after_render(lambda snapshot: self._write_chart(filepath, snapshot))
+
+    def _write_chart(self, filepath, snapshot):
+        # The snapshot is the render of the state submitted last, so the two are saved together.
+        try:
+            save_chart(filepath, self._submitted_state.nodes(), (snapshot.row_text(y) for y in range(snapshot.height)), **self.layout_options)
+            self._update_status(f"Chart successfully saved to:\n{filepath}")
+        except Exception as e:
+            self._update_status(f"Error: Failed to save chart: {e}", is_warning=True)
+
+    def open_chart(self):
+        self._flush_refresh()
+        filepath = filedialog.askopenfilename(filetypes=[("Flowchart Files", f"*{BINARY_EXTENSION} *.json"), ("All Files", "*.*")], title="Open Chart")
+        if not filepath:
+            return
+        try:
+            nodes, render = load_chart(filepath, **self.layout_options)
+        except (OSError, DefinitionError) as e:
+            self._update_status(f"Error: Failed to open chart: {e}", is_warning=True)
+            return
+
+        self._begin_trace("Open Chart")
+        self._replace_chart(nodes)
+        if render is None:
+            self._request_refresh(render=True)
+        else:
+            # Shown straight from the file; layout only runs once the chart is edited.
+            self._loaded_render = render
+            self.flowchart_view.show(render)
+        self._update_status(f"Opened {len(nodes)} steps from:\n{filepath}")
+
+    def import_pasted_steps(self):
+        self._flush_refresh()
+        self._import_steps(self.import_text_input.get("1.0", tk.END), "the pasted text")
+
+    def import_steps_file(self):
+        self._flush_refresh()
+        filepath = filedialog.askopenfilename(filetypes=[("Step Lists", "*.txt *.md"), ("Flowchart JSON", "*.json"), ("All Files", "*.*")], title="Import Steps")
+        if filepath:
+            self._import_steps(None, filepath)
+
+    def _import_steps(self, text, source):
+        """Replaces the chart with the steps in text (or in the file source), laid out and rendered once."""
+        self._begin_trace("Import Steps")
+        try:
+            nodes = parse_steps(text, self.UNIFORM_NODE_WIDTH) if text is not None else load_definition(source, self.UNIFORM_NODE_WIDTH)
+            nodes = NodeStore(nodes)
+        except (OSError, DefinitionError) as e:
+            self._update_status(f"Error: Failed to import {source}: {e}", is_warning=True)
+            return
+        self._replace_chart(nodes)
+        self._request_refresh(render=True)
+        self._update_status(f"Imported {len(nodes)} steps from {source}.")
+
+    def _replace_chart(self, nodes):
+        """Swaps in a whole new NodeStore as a single edit, with one option list rebuild."""
+        self._clear_chart()
+        self.nodes = nodes
+        self._model_state = ChartState.of(nodes)
+        self.history.record(self._model_state)
+        self._step_index.extend(node for node in nodes if not node.is_end); self._nodes_changed()
+        self.flowchart_ended = any(node.is_end for node in nodes)
+        if self.flowchart_ended: self._disable_step_inputs()
+
+    def _release_loaded_render(self):
+        """Closes the rows of an opened chart file once the viewer no longer shows them."""
+        for render in (self._loaded_render, self._retired_render):
+            if render is not None: render.close()
+        self._loaded_render = self._retired_render = None
 
     def generate_flowchart(self):
         if not self.nodes:
-            self.flowchart_text.config(state=tk.NORMAL); self.flowchart_text.delete(1.0, tk.END)
-            self.flowchart_text.insert(tk.END, "No nodes added yet. Start by adding a node!"); self.flowchart_text.config(state=tk.DISABLED)
+            self.renderer.cancel()
+            self.flowchart_view.show_message("No nodes added yet. Start by adding a node!")
+            self._release_loaded_render()
             return
 
-        node_positions = {}; max_x, max_y = 0, 0
-        node_width, node_height = self.UNIFORM_NODE_WIDTH, self.UNIFORM_NODE_HEIGHT
-
-        def is_overlapping(r1, r2): return not (r1['x'] + r1['width'] < r2['x'] or r1['x'] > r2['x'] + r2['width'] or r1['y'] + r1['height'] < r2['y'] or r1['y'] > r2['y'] + r2['height'])
-
-        for node in self.nodes:
-            x, y = 0, 0
-            if not node['connections']: x, y = 0, 0
-            else:
-                sources_pos = [node_positions[s_id] for s_id in node['connections'] if s_id in node_positions]
-                if not sources_pos: continue
-                if node['type'] == 'merge' or (node['is_end'] and len(sources_pos) > 1):
-                    avg_x = sum(p['x'] for p in sources_pos) // len(sources_pos); max_source_y = max(p['y'] + p['height'] for p in sources_pos)
-                    x, y = avg_x, max_source_y + self.VERTICAL_SPACING
-                else:
-                    source_pos = sources_pos[0]
-                    if node['direction'] == 'down': x, y = source_pos['x'], source_pos['y'] + source_pos['height'] + self.VERTICAL_SPACING
-                    else: x, y = source_pos['x'] + source_pos['width'] + self.HORIZONTAL_SPACING, source_pos['y']
-
-            new_node_rect = {'x': x, 'y': y, 'width': node_width, 'height': node_height}
-            collided = True
-            while collided:
-                collided = False
-                for placed_pos in node_positions.values():
-                    if is_overlapping(new_node_rect, placed_pos): new_node_rect['y'] = placed_pos['y'] + placed_pos['height'] + 1; collided = True; break
-            x, y = new_node_rect['x'], new_node_rect['y']
-            node_positions[node['id']] = {'x': x, 'y': y, 'width': node_width, 'height': node_height, 'node': node}
-            max_x = max(max_x, x + node_width); max_y = max(max_y, y + node_height)
-
-        grid_height = max_y + 5; grid_width = max_x + self.HORIZONTAL_SPACING * 2 + 20
-        grid = [[' ' for _ in range(grid_width)] for _ in range(grid_height)]
-        def draw_char(x, y, char):
-            if 0 <= y < grid_height and 0 <= x < grid_width: grid[y][x] = char
-
-        for pos_data in node_positions.values():
-            x, y, w, h, node = pos_data['x'], pos_data['y'], pos_data['width'], pos_data['height'], pos_data['node']
-
-            draw_char(x, y, '┌'); draw_char(x + w - 1, y, '┐'); draw_char(x, y + h - 1, '└'); draw_char(x + w - 1, y + h - 1, '┘')
-            for i in range(1, w - 1): draw_char(x + i, y, '─'); draw_char(x + i, y + h - 1, '─')
-            for i in range(1, h - 1): draw_char(x, y + i, '│'); draw_char(x + w - 1, y + i, '│')
-
-            text_lines = node['text']
-            if node['isLoop'] and node['loopTarget']:
-                loop_note = f"*Loop to: {node['loopTarget']}"
-                text_lines = text_lines + [loop_note]
-
-            start_y = y + (h - len(text_lines)) // 2
-            for line_num, line in enumerate(text_lines):
-                display_text = line[:w-2].center(w-2)
-                for i, char in enumerate(display_text):
-                    draw_char(x + 1 + i, start_y + line_num, char)
-
-            sources_pos = [node_positions[s_id] for s_id in node['connections'] if s_id in node_positions]
-            if not sources_pos: continue
-
-            target_x_center = x + w // 2
-            if node['type'] == 'merge' or (node['is_end'] and len(sources_pos) > 1):
-                merge_y = y - (self.VERTICAL_SPACING // 2) - 1
-                min_sx = min(s['x'] + s['width'] // 2 for s in sources_pos); max_sx = max(s['x'] + s['width'] // 2 for s in sources_pos)
-                for i in range(min_sx, max_sx + 1): draw_char(i, merge_y, '─')
-                for s_pos in sources_pos:
-                    sx_center = s_pos['x'] + s_pos['width'] // 2
-                    for i in range(s_pos['y'] + h, merge_y): draw_char(sx_center, i, '│')
-                    draw_char(sx_center, merge_y, '┴')
-                for i in range(merge_y + 1, y): draw_char(target_x_center, i, '│')
-                draw_char(target_x_center, y - 1, '▼')
-            else:
-                s_pos = sources_pos[0]
-                sx_center, sy_center = s_pos['x'] + s_pos['width']//2, s_pos['y'] + h//2
-                if node['direction'] == 'down':
-                    for i in range(s_pos['y'] + h, y): draw_char(sx_center, i, '│'); draw_char(sx_center, y-1, '▼')
-                else:
-                    for i in range(s_pos['x'] + w, x): draw_char(i, sy_center, '─'); draw_char(x - 1, sy_center, '►')
-
-        final_flowchart_text = "\n".join("".join(row) for row in grid)
-        self.flowchart_text.config(state=tk.NORMAL); self.flowchart_text.delete(1.0, tk.END)
-        self.flowchart_text.insert(tk.END, final_flowchart_text); self.flowchart_text.config(state=tk.DISABLED)
+        # The opened file's rows stay on screen until the new render replaces them.
+        if self._loaded_render is not None:
+            self._retired_render, self._loaded_render = self._loaded_render, None
+        # Drawn in the background: only the appended/removed node is placed and drawn, and a render
+        # still running for an older version of the chart is dropped. _show_render picks up the result.
+        self.renderer.submit(self._model_state, self._trace)
+        self._submitted_state = self._model_state
+        if self._trace is not None:
+            # A render still on its way for an earlier action has been superseded by this one.
+            if self._render_trace is not None: self._finish_trace(self._render_trace)
+            self._render_trace, self._trace = self._trace, None
+
+    def _show_render_progress(self, done, total):
+        self._render_progress_shown = True
+        self.status_text_var.set(f"Rendering flowchart... {done * 100 // total}% ({done}/{total} steps)")
+
+    def _show_render_error(self, error):
+        trace, self._render_trace = self._render_trace, None
+        self._render_progress_shown = False
+        self._update_status(f"Error: Failed to render the flowchart: {error}", is_warning=True)
+        if trace is not None: self._finish_trace(trace)
+
+    def _show_render(self, snapshot, node_count, seconds):
+        trace, self._render_trace = self._render_trace, None
+        if trace is not None:
+            with trace.span("view"): self.flowchart_view.show(snapshot)
+        else:
+            self.flowchart_view.show(snapshot)
+        self._submitted_state.pair_render(snapshot)
+        self._release_loaded_render()
+        if trace is not None:
+            self._render_progress_shown = False
+            self._finish_trace(trace) # its summary replaces the timing line
+            return
+        timing = f"Rendered {node_count} steps in {seconds * 1000:.0f} ms."
+        if self._render_progress_shown:
+            self._render_progress_shown = False
+            self._update_status(timing)
+        else:
+            self._update_status(f"{self.status_text_var.get()} {timing}".strip())
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,150 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Render Cache
+# ------------------------------------------------------------
+"""
+A content-addressed cache of finished renders.
+
+Every chart state is identified by a digest of its steps: a BLAKE2b hash of the
+state's newest node chained onto the digest of its parent, so the digest covers all
+of its nodes. Two different charts would need a 128-bit collision to share one, so
+a lookup trusts equal digests and never compares the nodes themselves. States built
+from different node objects (a step deleted and added again, a chart reset and
+opened again) still share digests, so a chart that was already drawn comes straight
+out of the cache, and the renderer can keep every step it has already placed.
+
+The cache holds one entry per finished render, which in the builder means one per
+step the user has passed through, so undoing back to an earlier state is a hit.
+Consecutive snapshots share most of their rows (see flowchart_canvas), so the
+cache counts every shared row and row tuple once, by reference counting, and
+evicts the least recently used entries while that total passes the memory budget.
+"""
+import hashlib
+import sys
+from collections import OrderedDict, namedtuple
+
+DEFAULT_BUDGET = 64 * 2**20 # Bytes of cached renders kept by default
+ENTRY_OVERHEAD = 256 # Rough bytes of bookkeeping per entry on top of its rows
+DIGEST_SIZE = 16 # Bytes of each prefix digest
+
+# snapshot is a CanvasSnapshot, layout the renderer's placed-node chain (see flowchart_renderer.layout_positions).
+CachedRender = namedtuple("CachedRender", "snapshot layout")
+
+
+def node_digest(node, previous=b""):
+    """
+    Digest of one step chained onto the digest of the steps before it: 16 bytes of
+    BLAKE2b over the previous digest and the repr of the step's fields.
+    """
+    fields = (node['id'], node['text'], node['type'], node['connections'], node['direction'],
+              node['isLoop'], node['loopTarget'], node['is_end'])
+    return hashlib.blake2b(previous + repr(fields).encode("utf-8", "surrogatepass"), digest_size=DIGEST_SIZE).digest()
+
+
+def state_digest(state):
+    """
+    The prefix digest of a flowchart_history.ChartState. It is stored on the state,
+    so only the steps added since the newest state that already has one are hashed.
+    """
+    pending = []
+    while state.digest is None and state.node is not None:
+        pending.append(state); state = state.parent
+    digest = state.digest or b""
+    for state in reversed(pending):
+        digest = state.digest = node_digest(state.node, digest)
+    return digest
+
+
+def common_length(state_a, state_b):
+    """
+    Length of the longest prefix two chart states have in common, by content. Costs
+    O(distance) from the shorter state back to that prefix.
+    """
+    state_a, state_b = state_a.ancestor(state_b.length), state_b.ancestor(state_a.length)
+    while state_a is not state_b and state_digest(state_a) != state_digest(state_b):
+        state_a, state_b = state_a.parent, state_b.parent
+    return state_a.length
+
+
+def cache_key(state):
+    return (state.length, state_digest(state))
+
+
+class RenderCache:
+    """LRU map from cache_key() to CachedRender, bounded by the bytes its snapshots hold together."""
+
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict() # key -> CachedRender
+        self._rows = _SharedParts()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """Bytes held by the cached snapshots, every shared part counted once, plus the entry bookkeeping."""
+        return self._rows.size + len(self._entries) * ENTRY_OVERHEAD
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, render):
+        """Stores render under key, evicting older entries while the cache is over budget."""
+        old = self._entries.pop(key, None)
+        if old is not None: self._rows.remove(old.snapshot.root)
+        self._entries[key] = render
+        self._rows.add(render.snapshot.root)
+        while self.size > self.budget:
+            _, evicted = self._entries.popitem(last=False)
+            self._rows.remove(evicted.snapshot.root)
+            if evicted is render: break # too big to keep on its own
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear(); self._rows = _SharedParts()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "bytes": self.size, "budget": self.budget, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+class _SharedParts:
+    """
+    Reference counts of the parts of snapshot row trees: tuples and row bytes. A part
+    is counted in size when its first reference arrives and dropped with its last,
+    so a subtree shared by many snapshots is walked and counted once.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._counts = {} # id(part) -> [references, part]; holding the part keeps its id unique
+
+    def add(self, root):
+        stack = [root]
+        while stack:
+            part = stack.pop()
+            entry = self._counts.get(id(part))
+            if entry is not None:
+                entry[0] += 1; continue
+            self._counts[id(part)] = [1, part]
+            self.size += sys.getsizeof(part)
+            if type(part) is tuple: stack.extend(child for child in part if child is not None)
+
+    def remove(self, root):
+        stack = [root]
+        while stack:
+            part = stack.pop()
+            entry = self._counts[id(part)]
+            entry[0] -= 1
+            if entry[0]: continue
+            del self._counts[id(part)]
+            self.size -= sys.getsizeof(part)
+            if type(part) is tuple: stack.extend(child for child in part if child is not None)
@@ -0,0 +1,234 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Character Canvas
+# ------------------------------------------------------------
+"""
+A compact character canvas for drawing flowcharts.
+
+Each row is a bytearray holding one fixed-width UTF-32 code unit per cell, so a cell
+costs 4 bytes instead of an 8-byte pointer to a one-character string, and whole runs
+of characters are written with a single slice assignment. Writes are clipped to the
+canvas like draw_char always was.
+
+Connectors are drawn in join mode: where a line-drawing character lands on another
+one, the cell gets the character with the strokes of both (│ over ─ is ┼, └ over │
+is ├), so lines that meet or cross stay readable. Arrow heads are kept.
+
+CanvasSnapshot is an immutable copy of a canvas that other threads can read while
+the canvas keeps being drawn on.
+"""
+CELL_CODEC = "utf-32-le"
+CELL_SIZE = 4
+BLANK_CELL = " ".encode(CELL_CODEC)
+ROW_BITS = 5
+ROW_FANOUT = 1 << ROW_BITS # rows (or subtrees) per tuple of a CanvasSnapshot
+ROW_MASK = ROW_FANOUT - 1
+
+# Line-drawing characters by the directions their strokes leave the cell in.
+UP, DOWN, LEFT, RIGHT = 1, 2, 4, 8
+LINE_ARMS = {
+    '│': UP | DOWN, '─': LEFT | RIGHT, '┌': DOWN | RIGHT, '┐': DOWN | LEFT, '└': UP | RIGHT, '┘': UP | LEFT,
+    '├': UP | DOWN | RIGHT, '┤': UP | DOWN | LEFT, '┬': DOWN | LEFT | RIGHT, '┴': UP | LEFT | RIGHT, '┼': UP | DOWN | LEFT | RIGHT,
+}
+LINE_GLYPHS = {arms: char for char, arms in LINE_ARMS.items()}
+LINE_GLYPHS.update({UP: '│', DOWN: '│', LEFT: '─', RIGHT: '─'}) # a stroke that stops in the cell
+ARROWS = '▲▼◄►'
+# (character on the canvas, line character drawn over it) -> what the cell shows.
+_JOINED = {(old, new): LINE_GLYPHS[old_arms | new_arms] for old, old_arms in LINE_ARMS.items() for new, new_arms in LINE_ARMS.items()}
+_JOINED.update({(arrow, new): arrow for arrow in ARROWS for new in LINE_ARMS})
+
+
+def join_line(old, new):
+    """The character a cell holding old shows once new is drawn over it in join mode."""
+    return _JOINED.get((old, new), new)
+
+
+class Canvas:
+    """
+    Grid of characters stored as one bytearray per row.
+
+    When journal is a list, every write appends (y, x, previous bytes) to it so the
+    write can be undone with restore(). Rows touched by writes are added to dirty.
+    """
+
+    def __init__(self, width=0, height=0):
+        self.width = self.height = 0
+        self.rows = []
+        self.journal = None
+        self.dirty = set()
+        self.resize(width, height)
+
+    def resize(self, width, height):
+        """Grows or shrinks the canvas, padding with spaces. Returns True if the width changed."""
+        width_changed = width != self.width
+        if width > self.width:
+            padding = BLANK_CELL * (width - self.width)
+            for row in self.rows: row.extend(padding)
+        elif width < self.width:
+            for row in self.rows: del row[width * CELL_SIZE:]
+        self.width = width
+        if height > self.height:
+            blank_row = BLANK_CELL * width
+            self.rows.extend(bytearray(blank_row) for _ in range(height - self.height))
+            self.dirty.update(range(self.height, height))
+        elif height < self.height:
+            del self.rows[height:]
+        self.height = height
+        return width_changed
+
+    def write(self, x, y, text):
+        """Writes a horizontal run of characters starting at (x, y)."""
+        if not 0 <= y < self.height or not text: return
+        if x < 0:
+            text = text[-x:]; x = 0
+        if x + len(text) > self.width:
+            text = text[:max(self.width - x, 0)]
+        if not text: return
+        row, start, end = self.rows[y], x * CELL_SIZE, (x + len(text)) * CELL_SIZE
+        if self.journal is not None: self.journal.append((y, x, bytes(row[start:end])))
+        row[start:end] = text.encode(CELL_CODEC)
+        self.dirty.add(y)
+
+    def join(self, x, y, text):
+        """Like write(), but line-drawing characters join the lines already there (see join_line)."""
+        if not 0 <= y < self.height: return
+        start, stop = max(x, 0), min(x + len(text), self.width)
+        if start >= stop: return
+        text = text[start - x:stop - x]
+        old = self.rows[y][start * CELL_SIZE:stop * CELL_SIZE]
+        if old != BLANK_CELL * len(text):
+            text = "".join([_JOINED.get(pair, pair[1]) for pair in zip(old.decode(CELL_CODEC), text)])
+        self.write(start, y, text)
+
+    def hline(self, x0, x1, y, char):
+        """Fills columns x0 .. x1 - 1 of row y with char."""
+        if x1 > x0: self.write(x0, y, char * (x1 - x0))
+
+    def vline(self, x, y0, y1, char, join=False):
+        """Fills rows y0 .. y1 - 1 of column x with char (joining the lines there, with join=True)."""
+        if not 0 <= x < self.width: return
+        y0, y1 = max(y0, 0), min(y1, self.height)
+        if y0 >= y1: return
+        cell, start, end = char.encode(CELL_CODEC), x * CELL_SIZE, (x + 1) * CELL_SIZE
+        rows, journal = self.rows, self.journal
+        for y in range(y0, y1):
+            row = rows[y]
+            if journal is not None: journal.append((y, x, bytes(row[start:end])))
+            if join and row[start:end] != BLANK_CELL:
+                row[start:end] = join_line(row[start:end].decode(CELL_CODEC), char).encode(CELL_CODEC)
+            else:
+                row[start:end] = cell
+        self.dirty.update(range(y0, y1))
+
+    def draw(self, ops):
+        """
+        Applies (x, y0, y1, text, join) operations, writing text at column x on rows
+        y0 .. y1 - 1; with join set, lines are joined with the ones already drawn.
+        """
+        for x, y0, y1, text, join in ops:
+            if y1 - y0 == 1: (self.join if join else self.write)(x, y0, text)
+            elif len(text) == 1: self.vline(x, y0, y1, text, join)
+            else:
+                for y in range(y0, y1): (self.join if join else self.write)(x, y, text)
+
+    def blit(self, x, y, lines):
+        """Writes a block of text lines, one per row, starting at (x, y)."""
+        for offset, line in enumerate(lines):
+            self.write(x, y + offset, line)
+
+    def restore(self, journal):
+        """Undoes the writes recorded in journal (newest first)."""
+        for y, x, old in reversed(journal):
+            if y < self.height:
+                self.rows[y][x * CELL_SIZE:x * CELL_SIZE + len(old)] = old
+                self.dirty.add(y)
+
+    def row_text(self, y, start=0, stop=None):
+        """Returns row y, or just columns start .. stop - 1 of it."""
+        if start == 0 and stop is None:
+            return self.rows[y].decode(CELL_CODEC)
+        return self.rows[y][start * CELL_SIZE:None if stop is None else stop * CELL_SIZE].decode(CELL_CODEC)
+
+    def text(self):
+        return "\n".join(row.decode(CELL_CODEC) for row in self.rows)
+
+
+class CanvasSnapshot:
+    """
+    Read-only copy of a Canvas, stored as one bytes object per row.
+
+    The rows sit in a tree of ROW_FANOUT-wide tuples. Snapshots taken one after
+    another share every subtree that did not change, so taking one after a small
+    edit builds new tuples only on the paths down to the edited rows, however tall
+    the canvas is.
+    """
+
+    def __init__(self, width=0, rows=()):
+        self.width = width
+        rows = list(rows)
+        self.height = len(rows)
+        self._shift = 0
+        while ROW_FANOUT << self._shift < len(rows): self._shift += ROW_BITS
+        self.root = _tree(rows, self._shift)
+
+    @classmethod
+    def of(cls, canvas, previous=None, changed=None):
+        """
+        Copies canvas. If previous is a snapshot of the same canvas and changed lists
+        every row drawn on since, only those rows are copied.
+        """
+        if previous is None or changed is None or previous.width != canvas.width:
+            return cls(canvas.width, map(bytes, canvas.rows))
+        snapshot = cls(canvas.width)
+        snapshot.height, snapshot._shift, snapshot.root = canvas.height, previous._shift, previous.root
+        while ROW_FANOUT << snapshot._shift < canvas.height:
+            snapshot.root = (snapshot.root,) + (None,) * (ROW_FANOUT - 1); snapshot._shift += ROW_BITS
+        # Rows past a shrunk canvas are dropped from the tree, so they are not kept alive.
+        items = [(y, bytes(canvas.rows[y])) for y in sorted(changed) if y < canvas.height]
+        items += [(y, None) for y in range(canvas.height, previous.height)]
+        if items:
+            snapshot.root = _assign(snapshot.root, snapshot._shift, items)
+        return snapshot
+
+    def row(self, y):
+        """Row y as UTF-32 bytes."""
+        node, shift = self.root, self._shift
+        while shift:
+            node = node[(y >> shift) & ROW_MASK]; shift -= ROW_BITS
+        return node[y & ROW_MASK]
+
+    def row_text(self, y, start=0, stop=None):
+        if start == 0 and stop is None:
+            return self.row(y).decode(CELL_CODEC)
+        return self.row(y)[start * CELL_SIZE:None if stop is None else stop * CELL_SIZE].decode(CELL_CODEC)
+
+    def rows(self, start, stop, col_start=0, col_stop=None):
+        """Returns rows start .. stop - 1, cut to columns col_start .. col_stop - 1."""
+        return [self.row_text(y, col_start, col_stop) for y in range(max(start, 0), min(stop, self.height))]
+
+    def text(self):
+        return "\n".join(self.row(y).decode(CELL_CODEC) for y in range(self.height))
+
+
+def _tree(rows, shift):
+    """The tree of tuples holding rows, with the given shift at its root."""
+    if shift == 0:
+        return tuple(rows) + (None,) * (ROW_FANOUT - len(rows))
+    span = 1 << shift
+    children = [_tree(rows[i:i + span], shift - ROW_BITS) for i in range(0, len(rows), span)]
+    return tuple(children) + (None,) * (ROW_FANOUT - len(children))
+
+
+def _assign(node, shift, items):
+    """A copy of node (None for an empty subtree) with the (index, row) items set, indices sorted."""
+    children = list(node) if node is not None else [None] * ROW_FANOUT
+    if shift == 0:
+        for y, row in items: children[y & ROW_MASK] = row
+        return tuple(children)
+    start = 0
+    while start < len(items):
+        slot = (items[start][0] >> shift) & ROW_MASK
+        stop = start + 1
+        while stop < len(items) and (items[stop][0] >> shift) & ROW_MASK == slot: stop += 1
+        children[slot] = _assign(children[slot], shift - ROW_BITS, items[start:stop])
+        start = stop
+    return tuple(children)
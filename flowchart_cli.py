@@ -0,0 +1,227 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Command Line Renderer
+# ------------------------------------------------------------
+"""
+Renders flowchart definition files to Unicode text without starting the GUI.
+
+    python flowchart_cli.py charts/*.json -o rendered/
+    python flowchart_cli.py docs/workflows/ -o rendered/ -j 0
+    find . -name '*.json' | python flowchart_cli.py --files-from - -o rendered/ -j 8
+    python flowchart_cli.py pipeline.json --stdout
+
+Each input file is written to <output dir>/<file name>.txt; directories are searched
+for *.json files and mirrored under the output directory. Files named directly may
+also be plain-text step lists (outlines or edge lists). With -j the charts are
+rendered by a pool of worker processes, and each output file is written as soon as
+its chart is done; a progress line with the running throughput is printed for each.
+Files that fail to load, and files whose output would overwrite the output of another
+input (same name in different directories), are reported and skipped; the exit status
+is 1 if any file failed.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from flowchart_io import load_definition, DefinitionError
+from flowchart_renderer import write_flowchart
+
+# Batches waiting in the pool per worker. Keeps memory flat however many files come in.
+BATCHES_IN_FLIGHT_PER_WORKER = 4
+
+
+def output_path(input_path, output_dir):
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir or os.path.dirname(input_path), stem + ".txt")
+
+
+def render_file(input_path, out_path):
+    """Renders one definition file, streaming the rows into the text file."""
+    nodes = load_definition(input_path)
+    out_dir = os.path.dirname(out_path)
+    if out_dir: os.makedirs(out_dir, exist_ok=True)
+    with open(out_path, 'w', encoding='utf-8') as f: write_flowchart(nodes, f)
+
+
+def iter_jobs(inputs, output_dir, files_from=None):
+    """
+    Yields (input path, output path, walked root) lazily, expanding directories as it
+    goes. walked root is the directory a file was found in (searched from), or None
+    for a file named directly.
+    """
+    def paths():
+        yield from inputs
+        if files_from:
+            with (sys.stdin if files_from == "-" else open(files_from, encoding="utf-8")) as listing:
+                for line in listing:
+                    if line.strip(): yield line.strip()
+
+    for path in paths():
+        if not os.path.isdir(path):
+            yield path, output_path(path, output_dir), None
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            relative_dir = os.path.relpath(dirpath, path)
+            for name in sorted(filenames):
+                if name.endswith(".json"):
+                    yield os.path.join(dirpath, name), output_path(name, os.path.join(output_dir, relative_dir) if output_dir else dirpath), path
+
+
+def path_key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def skip_collisions(jobs, report):
+    """
+    Passes the jobs from iter_jobs through as (input path, output path), dropping any
+    whose output path is already taken by another input file; report(input path,
+    message) is called for each one dropped. A file named twice is only rendered once.
+
+    Memory stays bounded by what was named, not by what directories hold: files named
+    directly are remembered by output path, but a walked directory is only remembered
+    by where its tree is mirrored. Whether it already wrote a given output is looked
+    up on disk, as the input file that would have been mirrored there.
+    """
+    claimed = {} # output path of a named file -> the input writing it
+    mirrors = {} # walked root -> the output directory mirroring it
+    for input_path, out_path, root in jobs:
+        key = path_key(out_path)
+        owner = claimed.get(key) or mirrored_owner(mirrors, root, out_path)
+        if owner is None:
+            if root is None: claimed[key] = input_path
+            elif root not in mirrors:
+                relative_dir = os.path.relpath(os.path.dirname(input_path), root)
+                mirrors[root] = os.path.normpath(os.path.join(os.path.dirname(out_path), os.path.relpath(".", relative_dir)))
+            yield input_path, out_path
+        elif path_key(owner) != path_key(input_path):
+            report(input_path, f"{out_path} is already the output of {owner}")
+
+
+def mirrored_owner(mirrors, own_root, out_path):
+    """The input file of a directory walked earlier (other than own_root) that was written to out_path, if any."""
+    stem = os.path.splitext(os.path.basename(out_path))[0]
+    for root, mirror in mirrors.items():
+        if root == own_root: continue
+        relative_dir = os.path.relpath(os.path.dirname(path_key(out_path)), path_key(mirror))
+        if relative_dir == os.pardir or relative_dir.startswith(os.pardir + os.sep): continue
+        candidate = os.path.normpath(os.path.join(root, relative_dir, stem + ".json"))
+        if os.path.isfile(candidate): return candidate
+    return None
+
+
+def error_text(e):
+    """What to report for a file that failed: the message, with the exception type when it was unexpected."""
+    return str(e) if isinstance(e, (OSError, DefinitionError)) else f"{type(e).__name__}: {e}"
+
+
+def render_batch(jobs):
+    """Worker entry point: renders a list of jobs and returns (input, output, error) for each."""
+    results = []
+    for input_path, out_path in jobs:
+        try:
+            render_file(input_path, out_path)
+            results.append((input_path, out_path, None))
+        except Exception as e: # one bad file must not stop the others
+            results.append((input_path, out_path, error_text(e)))
+    return results
+
+
+def batch_results(future, batch):
+    """The results of a finished batch, or an error for each of its jobs if its worker failed."""
+    try:
+        return future.result()
+    except Exception as e:
+        return [(input_path, out_path, error_text(e)) for input_path, out_path in batch]
+
+
+def iter_batches(jobs, batch_size):
+    batch = []
+    for job in jobs:
+        batch.append(job)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_jobs(jobs, workers=1, batch_size=8):
+    """
+    Renders every job, yielding results in completion order.
+    Only a bounded number of batches is submitted to the pool at any time.
+    """
+    if workers == 1:
+        for batch in iter_batches(jobs, batch_size):
+            yield from render_batch(batch)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {} # future -> its batch
+        for batch in iter_batches(jobs, batch_size):
+            pending[pool.submit(render_batch, batch)] = batch
+            if len(pending) >= workers * BATCHES_IN_FLIGHT_PER_WORKER:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done: yield from batch_results(future, pending.pop(future))
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done: yield from batch_results(future, pending.pop(future))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Render flowchart definition files to Unicode text.")
+    parser.add_argument("files", nargs="*", help="JSON flowchart definition files or directories")
+    parser.add_argument("--files-from", metavar="FILE", help="read more input paths from FILE, one per line ('-' for stdin)")
+    parser.add_argument("-o", "--output-dir", help="directory for the .txt files (default: next to each input)")
+    parser.add_argument("--stdout", action="store_true", help="print the rendered charts instead of writing files")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes to render with (0 = one per CPU core)")
+    parser.add_argument("--batch-size", type=int, default=8, help="files handed to a worker at a time")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print errors and the summary")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.files and not args.files_from:
+        parser.error("no input files given")
+
+    if args.stdout:
+        failed = 0
+        for input_path, _, _ in iter_jobs(args.files, None, args.files_from):
+            try:
+                write_flowchart(load_definition(input_path), sys.stdout); sys.stdout.write("\n")
+            except Exception as e:
+                failed += 1
+                print(f"Error: {input_path}: {error_text(e)}", file=sys.stderr)
+        return 1 if failed else 0
+
+    workers = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    rendered, failed = 0, 0
+    def report_collision(input_path, message):
+        nonlocal failed
+        failed += 1
+        print(f"Error: {input_path}: {message}", file=sys.stderr)
+
+    start = time.perf_counter()
+    jobs = skip_collisions(iter_jobs(args.files, args.output_dir, args.files_from), report_collision)
+    for input_path, out_path, error in run_jobs(jobs, workers, max(1, args.batch_size)):
+        if error:
+            failed += 1
+            print(f"Error: {input_path}: {error}", file=sys.stderr)
+            continue
+        rendered += 1
+        if not args.quiet:
+            elapsed = time.perf_counter() - start
+            rate = rendered / elapsed if elapsed > 0 else 0.0
+            print(f"[{rendered + failed}] {input_path} -> {out_path} ({rate:.1f} charts/s)", flush=True)
+    elapsed = time.perf_counter() - start
+    rate = rendered / elapsed if elapsed > 0 else 0.0
+    print(f"Rendered {rendered} chart(s) in {elapsed:.2f}s ({rate:.1f} charts/s) with {workers} worker(s)"
+          + (f"; {failed} failed" if failed else "") + ".", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
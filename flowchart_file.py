@@ -0,0 +1,278 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Chart Files
+# ------------------------------------------------------------
+"""
+Saving and opening whole charts: the node model plus the rendered text.
+
+Two formats are written, picked by file extension:
+
+- .json is readable and hand-editable. It is also a valid flowchart definition
+  (it has a "nodes" list), so flowchart_cli renders it like any other.
+- .ufc is a compact binary file. Every distinct string is stored once, the nodes
+  are packed as fixed-size integer records, and the rendered rows are kept as UTF-8
+  with a row offset table. Opening one decodes the nodes in a few passes and
+  memory-maps the rendered rows, so a 100k-step chart opens in well under a second
+  and only the rows on screen are ever read.
+
+load_chart() recognises the format from the file contents. The rendered text is only
+handed back when it was drawn with the same layout options as the caller's and by
+the current FORMAT_VERSION, so a chart opened with different box sizes, or saved
+before connectors were drawn the way they are now, is simply laid out again.
+
+Binary layout (little-endian), in file order:
+
+    header        HEADER struct (magic, version, layout options, section sizes)
+    string ends   uint32 x strings      end of each string, in characters of the pool
+    string pool   UTF-8, strings_bytes long
+    node records  int32 x 7 per node    id, type, direction, loopTarget, flags, #text, #connections
+    node refs     uint32 x refs         string numbers of each node's text lines, then its connections
+    row data      UTF-8, render_bytes long
+    row offsets   uint64 x (rows + 1)   start of each rendered row, relative to the row data
+"""
+import array
+import gc
+import itertools
+import json
+import mmap
+import os
+import struct
+import sys
+
+from flowchart_io import normalize_nodes, DefinitionError
+from flowchart_layout import UNIFORM_NODE_WIDTH, UNIFORM_NODE_HEIGHT, VERTICAL_SPACING, HORIZONTAL_SPACING
+from flowchart_renderer import iter_rows
+from flowchart_store import Node, NodeStore
+
+FORMAT_NAME = "unicode-flowchart"
+FORMAT_VERSION = 2 # bumped whenever the same nodes render differently; older files keep their nodes
+BINARY_EXTENSION = ".ufc"
+MAGIC = b"UFCHART\0"
+HEADER = struct.Struct("<8sHH4IIIQIIIQ")
+NODE_RECORD_SIZE = 7
+NO_STRING = -1 # direction of a node without a source
+FLAG_LOOP, FLAG_END = 1, 2
+LAYOUT_KEYS = ("node_width", "node_height", "vertical_spacing", "horizontal_spacing")
+DEFAULT_LAYOUT = dict(zip(LAYOUT_KEYS, (UNIFORM_NODE_WIDTH, UNIFORM_NODE_HEIGHT, VERTICAL_SPACING, HORIZONTAL_SPACING)))
+
+
+class ChartFileError(DefinitionError):
+    """Raised when a chart file is damaged or in an unknown format."""
+
+
+class SavedRender:
+    """
+    The rendered chart stored in a chart file, read row by row.
+
+    Answers the same width / height / rows() calls as a CanvasSnapshot, so the
+    viewer can show it directly. data is bytes or an mmap; offsets has one entry
+    per row plus the end of the last row.
+    """
+
+    def __init__(self, width, data, offsets, base=0):
+        self.width = width
+        self._data = data
+        self._offsets = offsets
+        self._base = base
+
+    @classmethod
+    def from_rows(cls, rows):
+        encoded = [row.encode("utf-8") for row in rows]
+        offsets = array.array("Q", [0])
+        for row in encoded: offsets.append(offsets[-1] + len(row))
+        return cls(max((len(row) for row in rows), default=0), b"".join(encoded), offsets)
+
+    @property
+    def height(self):
+        return len(self._offsets) - 1
+
+    def row_text(self, y, start=0, stop=None):
+        row = self._data[self._base + self._offsets[y]:self._base + self._offsets[y + 1]].decode("utf-8")
+        return row if start == 0 and stop is None else row[start:stop]
+
+    def rows(self, start, stop, col_start=0, col_stop=None):
+        """Returns rows start .. stop - 1, cut to columns col_start .. col_stop - 1."""
+        return [self.row_text(y, col_start, col_stop) for y in range(max(start, 0), min(stop, self.height))]
+
+    def text(self):
+        return "\n".join(self.row_text(y) for y in range(self.height))
+
+    def close(self):
+        """Releases the file mapping, if there is one."""
+        if isinstance(self._data, mmap.mmap): self._data.close()
+
+
+def is_binary_path(path):
+    return os.path.splitext(path)[1].lower() == BINARY_EXTENSION
+
+
+def save_chart(path, nodes, rows=None, **layout):
+    """
+    Writes the nodes and their rendered rows to path, in the format its extension asks for.
+    rows is an iterable of the rendered row strings; without it the chart is rendered here.
+    The file is written next to path first and moved into place once complete.
+    """
+    layout = {**DEFAULT_LAYOUT, **layout}
+    if rows is None:
+        rows = iter_rows(nodes, **layout)
+    temp_path = path + ".tmp"
+    try:
+        if is_binary_path(path):
+            with open(temp_path, "wb") as f: _write_binary(f, nodes, rows, layout)
+        else:
+            with open(temp_path, "w", encoding="utf-8") as f: _write_json(f, nodes, rows, layout)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path): os.remove(temp_path)
+
+
+def load_chart(path, **layout):
+    """
+    Reads a chart file and returns (NodeStore, render). render is a SavedRender, or None
+    when the file holds no rendered text for these layout options.
+    """
+    layout = {**DEFAULT_LAYOUT, **layout}
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) == MAGIC:
+            return _read_binary(f, layout)
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except UnicodeDecodeError as e:
+            raise ChartFileError(f"not a chart file (not UTF-8 text: {e.reason} at byte {e.start})") from e
+        except json.JSONDecodeError as e:
+            raise ChartFileError(f"invalid JSON ({e})") from e
+    saved_layout = data.get("layout", {}) if isinstance(data, dict) else {}
+    if not isinstance(saved_layout, dict):
+        raise ChartFileError("'layout' must be an object")
+    node_width = saved_layout.get("node_width", layout["node_width"])
+    if type(node_width) is not int or node_width < 5:
+        raise ChartFileError(f"'node_width' must be a whole number of at least 5, not {node_width!r}")
+    nodes = NodeStore(normalize_nodes(data, node_width))
+    rendered = data.get("rendered") if isinstance(data, dict) else None
+    if not isinstance(rendered, list) or data.get("version") != FORMAT_VERSION or _layout_of(saved_layout) != _layout_of(layout):
+        return nodes, None
+    return nodes, SavedRender.from_rows([str(row) for row in rendered])
+
+
+def _layout_of(options):
+    return tuple(options.get(key) for key in LAYOUT_KEYS)
+
+
+# --- JSON ---
+def _write_json(f, nodes, rows, layout):
+    # One node per line keeps big files diffable and quick to skim.
+    f.write(f'{{"format": {json.dumps(FORMAT_NAME)}, "version": {FORMAT_VERSION},\n')
+    f.write(f' "layout": {json.dumps({key: layout[key] for key in LAYOUT_KEYS})},\n "nodes": [')
+    for n, node in enumerate(nodes):
+        record = node.to_dict() if isinstance(node, Node) else {key: node[key] for key in node}
+        f.write(("," if n else "") + "\n  " + json.dumps(record, ensure_ascii=False))
+    f.write('\n ],\n "rendered": [')
+    for n, row in enumerate(rows):
+        f.write(("," if n else "") + "\n  " + json.dumps(row, ensure_ascii=False))
+    f.write("\n ]\n}\n")
+
+
+# --- Binary ---
+def _native(values):
+    """array.array in the file's byte order (the arrays are written and read as raw memory)."""
+    if sys.byteorder != "little": values.byteswap()
+    return values
+
+
+def _write_binary(f, nodes, rows, layout):
+    strings, numbers = [], {}
+    def number(text):
+        n = numbers.get(text)
+        if n is None:
+            n = numbers[text] = len(strings); strings.append(text)
+        return n
+
+    records, refs = array.array("i"), array.array("I")
+    for node in nodes:
+        text, connections = node['text'], node['connections']
+        direction = node['direction']
+        flags = (FLAG_LOOP if node['isLoop'] else 0) | (FLAG_END if node['is_end'] else 0)
+        records.extend((number(node['id']), number(node['type']), NO_STRING if direction is None else number(direction),
+                        number(node['loopTarget'] or ""), flags, len(text), len(connections)))
+        refs.extend(number(line) for line in text)
+        refs.extend(number(source_id) for source_id in connections)
+
+    ends, length = array.array("I"), 0
+    for text in strings:
+        length += len(text); ends.append(length)
+    pool = "".join(strings).encode("utf-8")
+
+    # The header is written again once the rendered rows have been streamed and measured.
+    header_at = f.tell()
+    f.write(bytes(HEADER.size))
+    for section in (_native(ends), pool, _native(records), _native(refs)):
+        f.write(section)
+    offsets, width = array.array("Q", [0]), 0
+    for row in rows:
+        data = row.encode("utf-8")
+        f.write(data); offsets.append(offsets[-1] + len(data)); width = max(width, len(row))
+    height, render_bytes = len(offsets) - 1, offsets[-1]
+    f.write(_native(offsets))
+    end = f.tell()
+
+    f.seek(header_at)
+    f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, *(layout[key] for key in LAYOUT_KEYS),
+                        len(nodes), len(strings), len(pool), len(refs), width, height, render_bytes))
+    f.seek(end)
+
+
+def _read_array(typecode, data, start, count):
+    values = array.array(typecode)
+    end = start + count * values.itemsize
+    if end > len(data):
+        raise ChartFileError("file is truncated")
+    values.frombytes(data[start:end])
+    return _native(values), end
+
+
+def _read_binary(f, layout):
+    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    keep_mapping = False
+    try:
+        if len(mapped) < HEADER.size:
+            raise ChartFileError("file is truncated")
+        (_, version, _, *saved_layout, node_count, string_count, pool_bytes, ref_count,
+         width, height, render_bytes) = HEADER.unpack_from(mapped)
+        if not 1 <= version <= FORMAT_VERSION:
+            raise ChartFileError(f"unsupported chart file version {version}")
+
+        ends, at = _read_array("I", mapped, HEADER.size, string_count)
+        pool = mapped[at:at + pool_bytes].decode("utf-8"); at += pool_bytes
+        records, at = _read_array("i", mapped, at, node_count * NODE_RECORD_SIZE)
+        refs, at = _read_array("I", mapped, at, ref_count)
+        strings = [pool[start:end] for start, end in zip(itertools.chain((0,), ends), ends)]
+
+        # Hundreds of thousands of small objects are built below; collector passes over
+        # them would cost more than the decoding itself.
+        gc_was_enabled = gc.isenabled(); gc.disable()
+        try:
+            # Resolve every string number in one pass, then cut the per-node lists out of the result.
+            strings.append(None) # NO_STRING (-1) resolves to None
+            referenced = list(map(strings.__getitem__, refs))
+            nodes, ref = [], 0
+            for id_n, type_n, direction_n, loop_n, flags, text_count, connection_count in zip(*[iter(records.tolist())] * NODE_RECORD_SIZE):
+                text_end = ref + text_count; connections_end = text_end + connection_count
+                nodes.append(Node(strings[id_n], referenced[ref:text_end], strings[type_n], referenced[text_end:connections_end],
+                                  strings[direction_n], flags & FLAG_LOOP != 0, strings[loop_n], flags & FLAG_END != 0))
+                ref = connections_end
+            store = NodeStore(nodes)
+        finally:
+            if gc_was_enabled: gc.enable()
+
+        if version != FORMAT_VERSION or tuple(saved_layout) != _layout_of(layout):
+            return store, None
+        offsets, _ = _read_array("Q", mapped, at + render_bytes, height + 1)
+        keep_mapping = True
+        return store, SavedRender(width, mapped, offsets, at)
+    except ChartFileError:
+        raise
+    except (IndexError, ValueError, struct.error) as e:
+        raise ChartFileError(f"damaged chart file ({e})") from e
+    finally:
+        if not keep_mapping: mapped.close()
+
@@ -0,0 +1,120 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Undo History
+# ------------------------------------------------------------
+"""
+Undo and redo for the builder, on persistent chart states.
+
+A ChartState is the newest node plus the state before it was added, so a chart with
+n steps is a chain of n states and every state shares all of its earlier steps with
+the ones it was built from. Recording an edit costs one new state object (or none,
+for a deletion, which just goes back to the parent); the node lists themselves are
+never copied.
+
+Each state can also hold a weak reference to its rendered snapshot. It stays alive
+as long as the render cache or the viewer keeps it, and lets undo and redo show the
+chart again without any layout. The render worker stores the digest of a state's
+nodes on it (see flowchart_cache), so it is worked out once per step.
+"""
+import weakref
+
+
+class ChartState:
+    """An immutable chart: its newest node, and the state it was added to."""
+    __slots__ = ("parent", "node", "length", "digest", "_render", "__weakref__")
+
+    def __init__(self, parent=None, node=None):
+        self.parent = parent
+        self.node = node
+        self.length = parent.length + 1 if parent is not None else 0
+        self.digest = None # set by flowchart_cache.state_digest()
+        self._render = None
+
+    @classmethod
+    def of(cls, nodes):
+        """The state holding nodes, in order."""
+        state = EMPTY
+        for node in nodes: state = state.push(node)
+        return state
+
+    def push(self, node):
+        return ChartState(self, node)
+
+    @property
+    def ended(self):
+        return self.node is not None and bool(self.node.is_end)
+
+    def nodes(self, start=0):
+        """The nodes of this state from position start on, oldest first. Costs O(length - start)."""
+        nodes, state = [], self
+        while state.length > start:
+            nodes.append(state.node); state = state.parent
+        nodes.reverse()
+        return nodes
+
+    def ancestor(self, length):
+        """The state this one was built from that holds its first length nodes."""
+        state = self
+        while state.length > length: state = state.parent
+        return state
+
+    def render(self):
+        """The rendered snapshot paired with this state, if it is still alive."""
+        return self._render() if self._render is not None else None
+
+    def pair_render(self, snapshot):
+        self._render = weakref.ref(snapshot)
+
+
+EMPTY = ChartState()
+
+
+def path_between(source, target):
+    """
+    Returns (pops, nodes): how many nodes to remove from the end of source, and which
+    nodes to append after that, to arrive at target. Costs O(distance) between the two.
+    """
+    a, b = source, target
+    appended = []
+    while a.length > b.length: a = a.parent
+    while b.length > a.length: appended.append(b.node); b = b.parent
+    while a is not b:
+        a = a.parent; appended.append(b.node); b = b.parent
+    appended.reverse()
+    return source.length - a.length, appended
+
+
+class History:
+    """Undo and redo stacks of ChartStates. Each entry is a single reference."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.current = EMPTY
+        self._undo = []
+        self._redo = []
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def record(self, state):
+        """Makes state the current one after an edit; anything that could be redone is dropped."""
+        self._undo.append(self.current)
+        self.current = state
+        self._redo.clear()
+
+    def undo(self):
+        """Steps back to the previous state and returns it (None if there is none)."""
+        if not self._undo: return None
+        self._redo.append(self.current)
+        self.current = self._undo.pop()
+        return self.current
+
+    def redo(self):
+        if not self._redo: return None
+        self._undo.append(self.current)
+        self.current = self._redo.pop()
+        return self.current
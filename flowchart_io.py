@@ -0,0 +1,294 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Flowchart Definition Files
+# ------------------------------------------------------------
+"""
+Reading flowchart definitions from disk.
+
+A definition is JSON: either a list of nodes or an object with a "nodes" list. Each
+node uses the same keys as FlowchartBuilderApp.nodes. Only "id" is required; "text"
+may be a single string, which is wrapped to the node width like typed input is.
+
+    {"nodes": [
+        {"id": "node-1", "text": "Load data"},
+        {"id": "node-2", "text": "Clean data", "connections": ["node-1"], "direction": "down"}
+    ]}
+
+A definition can also be a plain-text step list, either an indented outline or an
+edge list (see parse_outline and parse_edge_list). Step lists are read in a single
+pass into the same node dicts, with every label wrapped in one batch.
+"""
+import heapq
+import json
+import re
+
+from flowchart_layout import UNIFORM_NODE_WIDTH
+from flowchart_labels import wrap_text, wrap_many
+
+NODE_DEFAULTS = {
+    "type": "regular", "connections": [], "direction": "down",
+    "isLoop": False, "loopTarget": "", "is_end": False,
+}
+
+
+class DefinitionError(ValueError):
+    """Raised when a flowchart definition cannot be turned into a node list."""
+
+
+DIRECTIONS = ("down", "right")
+
+
+def normalize_node(raw, node_width=UNIFORM_NODE_WIDTH):
+    """Returns a node dict in the shape the renderer expects, filling in defaults."""
+    if not isinstance(raw, dict) or not raw.get("id"):
+        raise DefinitionError(f"Every node needs an 'id': {raw!r}")
+    node = {"id": str(raw["id"])}
+
+    def invalid(key, expected):
+        return DefinitionError(f"Node '{node['id']}': '{key}' must be {expected}, not {raw[key]!r}.")
+
+    text = raw.get("text", [])
+    if isinstance(text, str):
+        # The node box fits 2 lines of text after wrapping, same as typed input.
+        text = wrap_text(text, node_width - 4)[:2]
+    elif not isinstance(text, list) or not all(isinstance(line, str) for line in text):
+        raise invalid("text", "a string or a list of strings")
+    node["text"] = list(text) or [""]
+    connections = raw.get("connections", [])
+    if not isinstance(connections, list) or not all(isinstance(s_id, (str, int)) and not isinstance(s_id, bool) for s_id in connections):
+        raise invalid("connections", "a list of node ids")
+    node["connections"] = [str(s_id) for s_id in connections]
+    for key in ("type", "loopTarget"):
+        node[key] = raw.get(key, NODE_DEFAULTS[key])
+        if not isinstance(node[key], str): raise invalid(key, "a string")
+    for key in ("isLoop", "is_end"):
+        node[key] = raw.get(key, NODE_DEFAULTS[key])
+        if not isinstance(node[key], bool): raise invalid(key, "true or false")
+    node["direction"] = raw.get("direction", NODE_DEFAULTS["direction"]) if node["connections"] else raw.get("direction")
+    if node["direction"] not in DIRECTIONS and (node["connections"] or node["direction"] is not None):
+        raise invalid("direction", f"one of {', '.join(DIRECTIONS)}")
+    return node
+
+
+def normalize_nodes(data, node_width=UNIFORM_NODE_WIDTH):
+    """Accepts a list of nodes or {"nodes": [...]} and returns normalized node dicts."""
+    if isinstance(data, dict):
+        data = data.get("nodes")
+    if not isinstance(data, list):
+        raise DefinitionError("A flowchart definition must be a list of nodes or an object with a 'nodes' list.")
+    nodes = [normalize_node(raw, node_width) for raw in data]
+    known_ids = set()
+    for node in nodes:
+        if node["id"] in known_ids:
+            raise DefinitionError(f"Duplicate node id '{node['id']}'.")
+        known_ids.add(node["id"])
+    return nodes
+
+
+def load_definition(path, node_width=UNIFORM_NODE_WIDTH):
+    """Reads a flowchart definition file (JSON, or a step list) and returns its node list."""
+    with open(path, encoding="utf-8") as f:
+        try:
+            content = f.read()
+        except UnicodeDecodeError as e:
+            raise DefinitionError(f"not a text file in UTF-8 ({e.reason} at byte {e.start})") from e
+    if not content.lstrip().startswith(("[", "{")):
+        return parse_steps(content, node_width)
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise DefinitionError(f"invalid JSON ({e})") from e
+    return normalize_nodes(data, node_width)
+
+
+# --- Step lists: indented outlines and edge lists ---
+END_LABELS = ("end", "end of flowchart")
+_STEP_LINE = re.compile(r"^(?P<text>.*?)(?:\s+@(?P<id>\S+))?(?:\s*<-\s*(?P<sources>.*?))?(?:\s*~>\s*(?P<loop>.*?))?$")
+_EDGE_LINE = re.compile(r"^(?P<sources>.+?)\s*(?P<arrow>->|=>|~>)\s*(?P<target>.+?)$")
+
+
+class _StepList:
+    """Collects steps in chart order and turns them into node dicts in one go."""
+
+    def __init__(self, node_width):
+        self.node_width = node_width
+        self.steps = [] # [label, source numbers, direction, loop step number or None, is_end]
+        self.refs = {} # @id or label -> number of the latest step with it
+
+    def add(self, label, sources, direction="down", loop=None, is_end=False, ref_id=None):
+        number = len(self.steps)
+        if self.steps and self.steps[-1][4]:
+            raise DefinitionError(f"'{label}' comes after the end of the flowchart.")
+        self.steps.append([label, sources, direction if sources else None, loop, is_end])
+        self.refs[label] = number
+        if ref_id: self.refs["@" + ref_id] = number
+        return number
+
+    def find(self, ref, line_number):
+        ref = ref.strip()
+        number = self.refs.get(ref) if ref.startswith("@") else self.refs.get(ref, self.refs.get("@" + ref))
+        if number is None:
+            raise DefinitionError(f"line {line_number}: no earlier step called '{ref}'.")
+        return number
+
+    def sinks(self):
+        """Numbers of the steps nothing connects from yet."""
+        used = {source for step in self.steps for source in step[1]}
+        return [number for number in range(len(self.steps)) if number not in used]
+
+    def nodes(self):
+        if not self.steps:
+            raise DefinitionError("there are no steps to import.")
+        ids = [f"node-{number + 1}" for number in range(len(self.steps))]
+        # Every label is wrapped to the box like typed input, each distinct label only once.
+        texts = wrap_many([step[0] for step in self.steps], self.node_width - 4)
+        nodes = []
+        for number, (label, sources, direction, loop, is_end) in enumerate(self.steps):
+            nodes.append({
+                "id": ids[number], "text": ["End of Flowchart"] if is_end else (texts[number][:2] or [""]),
+                "type": "merge" if len(sources) > 1 and not is_end else "regular",
+                "connections": [ids[source] for source in sources], "direction": "down" if is_end else direction,
+                "isLoop": loop is not None, "loopTarget": texts[loop][0] if loop is not None and texts[loop] else "",
+                "is_end": is_end,
+            })
+        return nodes
+
+
+def _is_end(label):
+    return label.strip().lower() in END_LABELS
+
+
+def parse_outline(text, node_width=UNIFORM_NODE_WIDTH):
+    """
+    Reads an indented outline, one step per line:
+
+        Load data
+        Clean data
+            > Log rejected rows          (an indented block branches off the line above it)
+            Notify owner
+        Train model <- Clean data, Notify owner      (a merge)
+        Evaluate ~> Train model                      (with a "*Loop to:" note)
+        END
+
+    A line continues down from the line before it at the same indentation, and the
+    first line of an indented block branches right from the line it is indented
+    under; a leading '>' or '|' forces right or down. '<- a, b' names the sources
+    instead, '~> a' adds a loop note, '@name' gives a step a name to refer to it by,
+    and END connects every step left unconnected (or the ones after its '<-').
+    Lines starting with '#' are comments.
+    """
+    steps = _StepList(node_width)
+    blocks = [] # (indent, number of the last step at that indentation)
+    for line_number, raw in enumerate(text.splitlines(), 1):
+        line = raw.expandtabs(4)
+        body = line.strip()
+        if not body or body.startswith("#"): continue
+        indent = len(line) - len(line.lstrip())
+
+        opens_block = not blocks or indent > blocks[-1][0]
+        while blocks and blocks[-1][0] > indent: blocks.pop()
+        if blocks and blocks[-1][0] == indent:
+            previous = blocks.pop()[1]; opens_block = False
+        else:
+            previous = blocks[-1][1] if blocks else None
+
+        direction = "right" if opens_block and blocks else "down"
+        if body[0] in ">|":
+            direction = "right" if body[0] == ">" else "down"
+            body = body[1:].strip()
+        match = _STEP_LINE.match(body)
+        label = match["text"].strip()
+        if not label:
+            raise DefinitionError(f"line {line_number}: a step needs some text.")
+        if match["sources"] is not None:
+            sources = [steps.find(ref, line_number) for ref in match["sources"].split(",") if ref.strip()]
+        elif _is_end(label):
+            sources = steps.sinks()
+        else:
+            sources = [previous] if previous is not None else []
+        loop = steps.find(match["loop"], line_number) if match["loop"] else None
+        number = steps.add(label, sources, direction, loop, _is_end(label), match["id"])
+        blocks.append((indent, number))
+    return steps.nodes()
+
+
+def parse_edge_list(text, node_width=UNIFORM_NODE_WIDTH):
+    """
+    Reads an edge list, one connection per line, steps named by their text:
+
+        Load data -> Clean data
+        Clean data => Log rejected rows        (=> branches right)
+        Clean data, Log rejected rows -> Train model     (several sources make a merge)
+        Train model ~> Load data               (a "*Loop to:" note, not a connection)
+        Train model -> END
+
+    A line with no arrow just declares a step, and a line that is just END connects
+    every step left unconnected to the end, as in an outline. Steps are added in the
+    order they are first mentioned, moved later only where a source has to come
+    first; END always comes last. Lines starting with '#' are comments.
+    """
+    order, sources, directions, loops, end_sources = {}, {}, {}, {}, []
+    end_all = False # a bare END line
+    def mention(label):
+        if label not in order: order[label] = len(order); sources[label] = []
+        return label
+
+    for line_number, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line or line.startswith("#"): continue
+        match = _EDGE_LINE.match(line)
+        if match is None and not any(arrow in line for arrow in ("->", "=>", "~>")):
+            if _is_end(line): end_all = True
+            else: mention(line)
+            continue
+        names = [name.strip() for name in match["sources"].split(",") if name.strip()] if match else []
+        target, arrow = (match["target"].strip(), match["arrow"]) if match else ("", None)
+        if not names or not target:
+            raise DefinitionError(f"line {line_number}: '{line}' needs a step on both sides of the arrow.")
+        if arrow == "~>":
+            loops[mention(names[0])] = mention(target); continue
+        if any(_is_end(name) for name in names):
+            raise DefinitionError(f"line {line_number}: nothing can follow the end of the flowchart.")
+        for name in names: mention(name)
+        if _is_end(target):
+            end_sources.extend(name for name in names if name not in end_sources); continue
+        mention(target)
+        sources[target].extend(name for name in names if name not in sources[target])
+        if arrow == "=>": directions[target] = "right"
+
+    # Kahn's algorithm, always taking the earliest mentioned step that is ready.
+    waiting = {label: len(set(sources[label])) for label in order}
+    children = {}
+    for label in order:
+        for source in set(sources[label]): children.setdefault(source, []).append(label)
+    ready = [order[label] for label, count in waiting.items() if count == 0]
+    heapq.heapify(ready)
+    labels_by_order = list(order)
+    steps = _StepList(node_width)
+    numbers = {}
+    while ready:
+        label = labels_by_order[heapq.heappop(ready)]
+        numbers[label] = steps.add(label, [numbers[source] for source in sources[label]], directions.get(label, "down"))
+        for child in children.get(label, ()):
+            waiting[child] -= 1
+            if waiting[child] == 0: heapq.heappush(ready, order[child])
+    if len(numbers) < len(order):
+        stuck = next(label for label in order if label not in numbers)
+        raise DefinitionError(f"the connections into '{stuck}' go round in a circle (use '~>' for loops).")
+    for label, target in loops.items():
+        steps.steps[numbers[label]][3] = numbers[target]
+    ends = [numbers[name] for name in end_sources]
+    if end_all:
+        ends += [number for number in steps.sinks() if number not in ends]
+    if ends:
+        steps.add("End of Flowchart", ends, is_end=True)
+    return steps.nodes()
+
+
+def is_edge_list(text):
+    """An edge list has at least one '->' or '=>' line; an outline has none ('~>' is used by both)."""
+    return any(("->" in line or "=>" in line) and not line.lstrip().startswith("#") for line in text.splitlines())
+
+
+def parse_steps(text, node_width=UNIFORM_NODE_WIDTH):
+    """Reads a pasted or loaded step list, telling an edge list from an outline by its arrows."""
+    return (parse_edge_list if is_edge_list(text) else parse_outline)(text, node_width)
@@ -0,0 +1,79 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Node Labels
+# ------------------------------------------------------------
+"""
+Fitting step labels into node boxes.
+
+Wrapping is memoized by (text, width), so the same label is only ever wrapped once,
+and labels that obviously fit (or are one unbreakable word) skip textwrap entirely.
+wrap_many() wraps a whole batch, doing the work once per distinct label.
+
+box_ops() turns a label into the finished box: border rows and centred text rows
+as whole strings, ready to be written with one slice assignment per row. Boxes are
+memoized by their text and size, so every box with the same label shares them.
+"""
+import textwrap
+from functools import lru_cache
+
+WRAP_CACHE_SIZE = 65536 # distinct (text, width) pairs remembered
+BOX_CACHE_SIZE = 65536 # distinct (text lines, box size) pairs remembered
+
+
+def wrap_text(text, width):
+    """Wraps text from a single string into a list of strings."""
+    return list(wrap_cached(text, width))
+
+
+@lru_cache(maxsize=WRAP_CACHE_SIZE)
+def wrap_cached(text, width):
+    """wrap_text() as a tuple, memoized."""
+    wrapped_lines = []
+    for line in text.split('\n'):
+        wrapped_lines.extend(_wrap_line(line, width))
+    return tuple(wrapped_lines)
+
+
+def _wrap_line(line, width):
+    """Same result as textwrap.wrap(line, width, break_long_words=True), with fast paths."""
+    if line.isprintable() and not line.strip(' '):
+        return []
+    if len(line) <= width and line.isprintable():
+        # Fits as it is: textwrap would only drop the trailing spaces.
+        return [line.rstrip(' ')]
+    if line.isalnum():
+        # One long word with nowhere to break but the width.
+        return [line[i:i + width] for i in range(0, len(line), width)]
+    return textwrap.wrap(line, width=width, break_long_words=True)
+
+
+def wrap_many(texts, width):
+    """Wraps many labels at once; each distinct label is wrapped a single time."""
+    distinct = {text: None for text in texts}
+    for text in distinct:
+        distinct[text] = wrap_cached(text, width)
+    return [list(distinct[text]) for text in texts]
+
+
+@lru_cache(maxsize=BOX_CACHE_SIZE)
+def box_ops(text_lines, width, height):
+    """
+    The drawing operations of a box holding text_lines (a tuple), relative to its
+    top-left corner, as (dx, dy0, dy1, text). Rows with text are written whole,
+    border to border; the other inner rows only get their two side borders, so
+    anything already drawn inside the box shows through as it always has.
+    """
+    inner = width - 2
+    rows = {}
+    start_y = (height - len(text_lines)) // 2
+    for line_num, line in enumerate(text_lines):
+        rows[start_y + line_num] = line[:inner].center(inner)
+
+    ops = [(0, 0, 1, '┌' + '─' * inner + '┐'), (0, height - 1, height, '└' + '─' * inner + '┘')]
+    for dy in range(1, height - 1):
+        if dy in rows:
+            ops.append((0, dy, dy + 1, '│' + rows.pop(dy) + '│'))
+        else:
+            ops += [(0, dy, dy + 1, '│'), (width - 1, dy, dy + 1, '│')]
+    # Text rows falling on the border rows (or outside the box) are drawn last, as before.
+    ops += [(1, dy, dy + 1, text) for dy, text in sorted(rows.items())]
+    return tuple(ops)
@@ -0,0 +1,140 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Node Placement
+# ------------------------------------------------------------
+"""
+Node placement for the Unicode flowchart builder.
+
+Every node is a uniform box. A node is placed below or to the right of its source
+(or centred under its sources for merges) and then pushed down until it no longer
+touches any box that is already placed. Placed boxes are kept in a spatial index
+so that this collision check only looks at the boxes in the neighbouring columns.
+"""
+import bisect
+
+# Defining a UNIFORM BOX SIZE for all nodes
+UNIFORM_NODE_WIDTH = 25 # Characters wide
+UNIFORM_NODE_HEIGHT = 5 # Lines high - room for two lines of text plus a loop note
+VERTICAL_SPACING = 3 # Lines between nodes
+HORIZONTAL_SPACING = 7 # Characters between nodes
+
+
+class PlacementIndex:
+    """
+    Uniform grid of placed node boxes, bucketed into columns one box wide.
+
+    Two boxes touch when their corners are at most one box width apart horizontally
+    and at most one box height apart vertically, so only the bucket of a box and its
+    two neighbours can hold boxes it touches. Each bucket keeps its boxes sorted by
+    (y, x), which lets the free-slot search walk down a column with bisect.
+    """
+
+    def __init__(self, node_width=UNIFORM_NODE_WIDTH, node_height=UNIFORM_NODE_HEIGHT):
+        self.node_width = node_width
+        self.node_height = node_height
+        self._columns = {}
+        self.count = 0
+        self.retries = 0 # times a box was pushed down past a collision, for profiling
+
+    def add(self, x, y):
+        bisect.insort(self._columns.setdefault(x // self.node_width, []), (y, x))
+        self.count += 1
+
+    def remove(self, x, y):
+        key = x // self.node_width
+        column = self._columns[key]
+        del column[bisect.bisect_left(column, (y, x))]
+        if not column:
+            del self._columns[key]
+        self.count -= 1
+
+    def boxes_in(self, x0, y0, x1, y1):
+        """Returns the (x, y) corners of the placed boxes covering any cell of columns x0 .. x1, rows y0 .. y1."""
+        w, h = self.node_width, self.node_height
+        found = []
+        for key in range((x0 - w + 1) // w, x1 // w + 1):
+            lane = self._columns.get(key)
+            if not lane: continue
+            for i in range(bisect.bisect_left(lane, (y0 - h + 1,)), len(lane)):
+                placed_y, placed_x = lane[i]
+                if placed_y > y1: break
+                if x0 - w < placed_x <= x1: found.append((placed_x, placed_y))
+        return found
+
+    def find_free_y(self, x, y):
+        """
+        Returns the first y at or below the requested one where a box at column x
+        does not touch any placed box. This is the same slot the original
+        "bump below the first overlapping box and rescan" loop settled on.
+        """
+        w, h = self.node_width, self.node_height
+        key = x // w
+        lanes = [lane for lane in (self._columns.get(key - 1), self._columns.get(key), self._columns.get(key + 1)) if lane]
+        # (y - h,) sorts before every (y - h, x) entry, so this finds the first box
+        # whose top is within reach of the new box.
+        cursors = [bisect.bisect_left(lane, (y - h,)) for lane in lanes]
+        moved = True
+        while moved:
+            moved = False
+            for n, lane in enumerate(lanes):
+                i, size = cursors[n], len(lane)
+                while i < size and lane[i][0] <= y + h:
+                    placed_y, placed_x = lane[i]
+                    if placed_y + h >= y and -w <= placed_x - x <= w:
+                        y = placed_y + h + 1; moved = True; self.retries += 1
+                    i += 1
+                cursors[n] = i
+        return y
+
+
+def initial_position(node, node_positions, spacing=(VERTICAL_SPACING, HORIZONTAL_SPACING)):
+    """
+    Returns the (x, y) a node would like to occupy before collisions are resolved,
+    or None when none of its sources has been placed.
+    """
+    if not node['connections']:
+        return 0, 0
+    vertical_spacing, horizontal_spacing = spacing
+    sources_pos = [node_positions[s_id] for s_id in node['connections'] if s_id in node_positions]
+    if not sources_pos:
+        return None
+    if node['type'] == 'merge' or (node['is_end'] and len(sources_pos) > 1):
+        avg_x = sum(p['x'] for p in sources_pos) // len(sources_pos)
+        max_source_y = max(p['y'] + p['height'] for p in sources_pos)
+        return avg_x, max_source_y + vertical_spacing
+    source_pos = sources_pos[0]
+    if node['direction'] == 'down':
+        return source_pos['x'], source_pos['y'] + source_pos['height'] + vertical_spacing
+    return source_pos['x'] + source_pos['width'] + horizontal_spacing, source_pos['y']
+
+
+def place_node(node, node_positions, index, spacing=(VERTICAL_SPACING, HORIZONTAL_SPACING)):
+    """
+    Places a single node, recording it in node_positions and in the index.
+    Returns the new position entry, or None if the node could not be placed.
+    """
+    start = initial_position(node, node_positions, spacing)
+    if start is None:
+        return None
+    x = start[0]
+    y = index.find_free_y(x, start[1])
+    index.add(x, y)
+    pos = {'x': x, 'y': y, 'width': index.node_width, 'height': index.node_height, 'node': node}
+    node_positions[node['id']] = pos
+    return pos
+
+
+def place_nodes(nodes, node_width=UNIFORM_NODE_WIDTH, node_height=UNIFORM_NODE_HEIGHT,
+                vertical_spacing=VERTICAL_SPACING, horizontal_spacing=HORIZONTAL_SPACING):
+    """
+    Computes positions for all nodes in order.
+    Returns (node_positions, max_x, max_y) where node_positions maps node ids to
+    {'x', 'y', 'width', 'height', 'node'} dicts in placement order.
+    """
+    node_positions = {}; max_x, max_y = 0, 0
+    index = PlacementIndex(node_width, node_height)
+    spacing = (vertical_spacing, horizontal_spacing)
+    for node in nodes:
+        pos = place_node(node, node_positions, index, spacing)
+        if pos is None: continue
+        max_x = max(max_x, pos['x'] + node_width); max_y = max(max_y, pos['y'] + node_height)
+    return node_positions, max_x, max_y
@@ -0,0 +1,125 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Step Pickers
+# ------------------------------------------------------------
+"""
+Type-to-search step pickers for charts with thousands of steps.
+
+StepIndex keeps the steps sorted by their case-folded label, so the steps whose label
+starts with what has been typed are found with one bisect, O(log n), and only the
+matches that will actually be shown are turned into option text. Appending or
+removing the last step, the only edits the builder makes, updates the index in place.
+
+StepPicker is an editable combobox over a StepIndex. Its dropdown is never filled
+with the whole chart: every keystroke (and opening the list) fills it with the first
+VISIBLE_MATCHES steps matching the text typed so far. A multiple picker takes a
+comma-separated list and searches on the part after the last comma.
+"""
+import bisect
+import tkinter as tk
+from tkinter import ttk
+
+VISIBLE_MATCHES = 50 # steps shown in a picker's dropdown at once
+SEPARATOR = ", " # between the steps of a multiple picker
+_NAVIGATION_KEYS = {"Up", "Down", "Left", "Right", "Return", "KP_Enter", "Escape", "Tab", "Home", "End", "Prior", "Next",
+                    "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R"}
+
+
+def fold(label):
+    return label.strip().casefold()
+
+
+class StepIndex:
+    """Non-end steps in chart order, searchable by label prefix. format turns a step into its option text."""
+
+    def __init__(self, format=str):
+        self.format = format
+        self.clear()
+
+    def clear(self):
+        self._nodes = [] # in chart order
+        self._keys = [] # sorted (folded label, chart position)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def append(self, node):
+        bisect.insort(self._keys, (fold(node.text[0]), len(self._nodes)))
+        self._nodes.append(node)
+
+    def pop(self):
+        node = self._nodes.pop()
+        key = (fold(node.text[0]), len(self._nodes))
+        del self._keys[bisect.bisect_left(self._keys, key)]
+        return node
+
+    def extend(self, nodes):
+        """Appends many steps, sorting the index once."""
+        start = len(self._nodes)
+        self._nodes.extend(nodes)
+        self._keys.extend((fold(node.text[0]), position) for position, node in enumerate(self._nodes[start:], start))
+        self._keys.sort()
+
+    def recent(self, count=1):
+        """Option text of the newest count steps, newest first."""
+        return [self.format(node) for node in reversed(self._nodes[-count:])] if count > 0 else []
+
+    def search(self, text, limit=VISIBLE_MATCHES):
+        """Option text of up to limit steps whose label starts with text (case-insensitive), by label."""
+        prefix = fold(text)
+        if not prefix:
+            return self.recent(limit)
+        keys, matches = self._keys, []
+        i = bisect.bisect_left(keys, (prefix,))
+        while i < len(keys) and len(matches) < limit and keys[i][0].startswith(prefix):
+            matches.append(self.format(self._nodes[keys[i][1]])); i += 1
+        return matches
+
+    def find(self, label):
+        """The newest step whose whole label is label (case-insensitive), or None."""
+        key = fold(label)
+        i = bisect.bisect_left(self._keys, (key, len(self._nodes)))
+        if i and self._keys[i - 1][0] == key:
+            return self._nodes[self._keys[i - 1][1]]
+        return None
+
+
+class StepPicker(ttk.Combobox):
+    """
+    Editable combobox searching a StepIndex as the user types. empty_matches(limit),
+    if given, supplies the dropdown while nothing has been typed (by default the
+    newest steps).
+    """
+
+    def __init__(self, master, index, multiple=False, empty_matches=None, **options):
+        super().__init__(master, postcommand=self._fill, **options)
+        self.index = index
+        self.multiple = multiple
+        self.empty_matches = empty_matches
+        self._head = "" # what comes before the searched part of a multiple picker's text
+        self.bind("<KeyRelease>", self._typed, add="+")
+        if multiple:
+            self.bind("<<ComboboxSelected>>", self._selected, add="+")
+
+    def _query(self):
+        text = self.get()
+        if not self.multiple:
+            return text
+        cut = text.rfind(SEPARATOR.strip())
+        self._head = text[:cut + 1].rstrip() + " " if cut >= 0 else ""
+        return text[cut + 1:]
+
+    def _fill(self):
+        query = self._query()
+        if not query.strip() and self.empty_matches is not None:
+            self["values"] = list(self.empty_matches(VISIBLE_MATCHES))
+        else:
+            self["values"] = self.index.search(query)
+
+    def _typed(self, event):
+        if event.keysym not in _NAVIGATION_KEYS:
+            self._fill()
+
+    def _selected(self, event):
+        # The combobox puts just the chosen step in the entry; keep the steps before it.
+        self.set(self._head + self.get())
+        self.icursor(tk.END)
@@ -0,0 +1,122 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Profiling
+# ------------------------------------------------------------
+"""
+Opt-in timing of what each user action costs.
+
+With profiling on (FLOWCHART_PROFILE=1 in the environment, or Tools > Profile Actions
+in the app) every action records an ActionTrace: the input panel refresh, placement
+and drawing on the render thread, the snapshot copy and the viewer refresh, plus
+node, collision-retry and canvas-size counts. When the action's chart is on screen
+the trace is written as a Chrome trace event file, which chrome://tracing, Perfetto
+and speedscope open directly, and a one-line summary goes to the status bar.
+
+With profiling off no trace exists, and the instrumented code only tests for None.
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+ENV_VAR = "FLOWCHART_PROFILE"
+DIR_ENV_VAR = "FLOWCHART_PROFILE_DIR"
+SUMMARY_PHASES = ("panel", "layout", "draw", "snapshot", "view") # in the order the status bar lists them
+
+
+def enabled_from_env():
+    return os.environ.get(ENV_VAR, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+class ActionTrace:
+    """
+    Timed spans and counters of one action, as Chrome trace events.
+    Spans may be added from any thread; each thread gets its own track. Every change
+    and every read of the events, counters and totals holds the trace's lock.
+    """
+
+    def __init__(self, action):
+        self.action = action
+        self.start = time.perf_counter()
+        self.events = []
+        self.counters = {}
+        self.totals = {} # span name -> seconds, for the summary
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name, start, end, **args):
+        """Records a span that ran from start to end (perf_counter seconds) on this thread."""
+        thread = threading.current_thread()
+        event = {"ph": "X", "name": name, "cat": "flowchart", "pid": os.getpid(), "tid": thread.ident,
+                 "ts": (start - self.start) * 1e6, "dur": (end - start) * 1e6, "args": args}
+        with self._lock:
+            if thread.ident not in self._threads:
+                self._threads[thread.ident] = thread.name
+                self.events.append({"ph": "M", "name": "thread_name", "pid": os.getpid(), "tid": thread.ident, "args": {"name": thread.name}})
+            self.events.append(event)
+            self.totals[name] = self.totals.get(name, 0.0) + end - start
+
+    def span(self, name, **args):
+        """Context manager timing its block as a span."""
+        return _Span(self, name, args)
+
+    def count(self, **counters):
+        event = {"ph": "C", "name": "counters", "pid": os.getpid(), "tid": threading.get_ident(),
+                 "ts": (time.perf_counter() - self.start) * 1e6, "args": dict(counters)}
+        with self._lock:
+            self.counters.update(counters)
+            self.events.append(event)
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def summary(self):
+        """One line for the status bar, e.g. 'Add Step: 14.2 ms (layout 3.1, draw 6.0, ...)'."""
+        with self._lock:
+            totals, counters = dict(self.totals), dict(self.counters)
+        phases = ", ".join(f"{name} {totals[name] * 1000:.1f}" for name in SUMMARY_PHASES if name in totals)
+        counts = ", ".join(f"{key.replace('_', ' ')} {value}" for key, value in counters.items())
+        return f"{self.action}: {self.elapsed() * 1000:.1f} ms" + (f" ({phases})" if phases else "") + (f" - {counts}" if counts else "")
+
+    def dump(self, path):
+        with self._lock:
+            events, counters = list(self.events), dict(self.counters)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"action": self.action, "counters": counters}}, f)
+
+
+class _Span:
+    __slots__ = ("trace", "name", "args", "started")
+
+    def __init__(self, trace, name, args):
+        self.trace, self.name, self.args = trace, name, args
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.trace.add_span(self.name, self.started, time.perf_counter(), **self.args)
+
+
+class Profiler:
+    """Hands out ActionTraces while enabled and writes each finished one to trace_dir."""
+
+    def __init__(self, enabled=None, trace_dir=None):
+        self.enabled = enabled_from_env() if enabled is None else enabled
+        self.trace_dir = trace_dir or os.environ.get(DIR_ENV_VAR) or os.path.join(tempfile.gettempdir(), "flowchart-traces")
+        self._count = 0
+
+    def start(self, action):
+        """Returns a new trace for action, or None when profiling is off."""
+        return ActionTrace(action) if self.enabled else None
+
+    def finish(self, trace):
+        """Writes trace to its own file and returns the file path."""
+        self._count += 1
+        slug = re.sub(r"[^a-z0-9]+", "-", trace.action.lower()).strip("-") or "action"
+        os.makedirs(self.trace_dir, exist_ok=True)
+        path = os.path.join(self.trace_dir, f"{os.getpid()}-{self._count:04d}-{slug}.trace.json")
+        trace.dump(path)
+        return path
@@ -0,0 +1,313 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Renderer
+# ------------------------------------------------------------
+"""
+Draws placed flowchart nodes onto a character canvas.
+
+This module has no GUI dependencies: render_flowchart() turns a node list (the same
+dicts FlowchartBuilderApp keeps in self.nodes) into the Unicode text, so charts can
+be rendered from scripts, batch jobs and worker processes.
+
+The builder only ever appends a step to the end of its node list or removes the
+last one, so the renderer keeps the placed boxes and the canvas between calls and
+just draws (or erases) that one node and its connectors. Anything else falls back
+to a full rebuild.
+
+Boxes are placed by flowchart_layout exactly as place_nodes() places them. Connectors
+come from flowchart_routing, which routes them clear of the boxes and of the
+connectors drawn before their target. They are drawn in join mode, so the lines
+leaving one step and the sources of a merge meet in junctions.
+
+The placed boxes are also kept as a persistent chain, (earlier chain, position), that
+later edits never change, so a finished layout can be kept (by flowchart_cache) at
+no extra cost.
+"""
+import time
+from collections import namedtuple
+
+from flowchart_canvas import Canvas
+from flowchart_labels import box_ops, wrap_text # wrap_text has always been importable from here
+from flowchart_routing import Occupancy, claim_exits, connector_ops
+from flowchart_layout import (PlacementIndex, place_node, place_nodes, UNIFORM_NODE_WIDTH, UNIFORM_NODE_HEIGHT,
+                              VERTICAL_SPACING, HORIZONTAL_SPACING)
+
+# Returned by IncrementalRenderer.update(). When full is False, rows lists the canvas rows
+# that changed and old_height is the number of rows before the update.
+RenderUpdate = namedtuple("RenderUpdate", "full rows old_height")
+
+# Nodes drawn between calls to an update() progress callback.
+PROGRESS_STEP = 200
+
+
+def render_flowchart(nodes, node_width=UNIFORM_NODE_WIDTH, node_height=UNIFORM_NODE_HEIGHT,
+                     vertical_spacing=VERTICAL_SPACING, horizontal_spacing=HORIZONTAL_SPACING):
+    """Renders a list of node dicts to the flowchart text ("" when there are no nodes)."""
+    renderer = IncrementalRenderer(node_width, node_height, vertical_spacing, horizontal_spacing)
+    renderer.update(nodes)
+    return renderer.text()
+
+
+class IncrementalRenderer:
+    """Keeps the layout and the character canvas of the last rendered node list."""
+
+    def __init__(self, node_width=UNIFORM_NODE_WIDTH, node_height=UNIFORM_NODE_HEIGHT,
+                 vertical_spacing=VERTICAL_SPACING, horizontal_spacing=HORIZONTAL_SPACING):
+        self.node_width = node_width
+        self.node_height = node_height
+        self.vertical_spacing = vertical_spacing
+        self.horizontal_spacing = horizontal_spacing
+        self.stats = None # set to a dict to accumulate timings (see flowchart_profile)
+        self.clear()
+
+    def clear(self):
+        """Forgets everything that has been drawn."""
+        self.nodes = []
+        self.node_positions = {}
+        self.layout = None # persistent chain of placed positions, see layout_positions()
+        self.canvas = Canvas()
+        self._index = PlacementIndex(self.node_width, self.node_height)
+        self._lines = Occupancy()
+        # One entry per drawn node: (position or None, (max_x, max_y) after it, undo journal, claimed cells).
+        self._history = []
+        self._reshaped = False
+        self._old_height = 0 # canvas height at the end of the last completed update
+
+    @property
+    def width(self):
+        return self.canvas.width
+
+    @property
+    def height(self):
+        return self.canvas.height
+
+    def update(self, nodes, progress=None):
+        """
+        Brings the canvas in line with nodes and returns a RenderUpdate.
+        Nodes after the longest common prefix with the last rendered list are erased
+        and redrawn, so appending or removing the last node only touches its cells.
+
+        progress, if given, is called as progress(done, total) every PROGRESS_STEP
+        drawn nodes. If it returns False the update stops early and returns None; the
+        canvas then holds a consistent render of the nodes drawn so far, and the next
+        update carries on from there.
+        """
+        keep = self._common_prefix(nodes)
+        return self.replace(keep, nodes[keep:], progress)
+
+    def replace(self, keep, nodes, progress=None):
+        """
+        Like update(), for a caller that already knows the first keep rendered nodes
+        stay (they may be other objects with the same content) and nodes follow them.
+        Only the rendered nodes after keep and the given nodes are looked at.
+        """
+        if keep == 0 and self.nodes:
+            self.clear()
+            self._reshaped = True
+        while len(self.nodes) > keep:
+            self._pop()
+        total = len(nodes)
+        for done, node in enumerate(nodes, 1):
+            self._append(node)
+            if progress is not None and done % PROGRESS_STEP == 0 and done < total and progress(done, total) is False:
+                return None
+        dirty, self.canvas.dirty = self.canvas.dirty, set()
+        old_height, self._old_height = self._old_height, self.height
+        if self._reshaped:
+            self._reshaped = False
+            return RenderUpdate(True, [], old_height)
+        return RenderUpdate(False, sorted(row for row in dirty if row < self.height), old_height)
+
+    def _common_prefix(self, nodes):
+        """
+        Length of the shared prefix of nodes and the rendered list. Nodes are only
+        ever appended or removed at the end, so the prefix ends at the last position
+        (counting back) where both lists hold the same node object.
+        """
+        for keep in range(min(len(nodes), len(self.nodes)), 0, -1):
+            if nodes[keep - 1] is self.nodes[keep - 1]:
+                return keep
+        return 0
+
+    def row_text(self, row):
+        return self.canvas.row_text(row)
+
+    def rows(self, start, stop, col_start=0, col_stop=None):
+        """Returns rows start .. stop - 1, cut to columns col_start .. col_stop - 1."""
+        return [self.canvas.row_text(row, col_start, col_stop) for row in range(max(start, 0), min(stop, self.height))]
+
+    def text(self):
+        return self.canvas.text()
+
+    def _extent(self):
+        return self._history[-1][1] if self._history else (0, 0)
+
+    def _resize(self, max_x, max_y):
+        if self.canvas.resize(*canvas_size(max_x, max_y, self.horizontal_spacing)):
+            self._reshaped = True # every row changed
+
+    def _append(self, node):
+        self.nodes.append(node)
+        stats = self.stats
+        if stats is not None: start, retries = time.perf_counter(), self._index.retries
+        pos = place_node(node, self.node_positions, self._index, (self.vertical_spacing, self.horizontal_spacing))
+        if stats is not None:
+            placed = time.perf_counter(); stats["layout"] += placed - start; stats["retries"] += self._index.retries - retries
+        max_x, max_y = self._extent()
+        journal, claimed = [], []
+        if pos is not None:
+            self.layout = (self.layout, pos)
+            max_x = max(max_x, pos['x'] + pos['width']); max_y = max(max_y, pos['y'] + pos['height'])
+            self._resize(max_x, max_y)
+            self.canvas.journal, self._lines.journal = journal, claimed
+            self._draw_node(pos)
+            self.canvas.journal = self._lines.journal = None
+        self._history.append((pos, (max_x, max_y), journal, claimed))
+        if stats is not None: stats["draw"] += time.perf_counter() - placed; stats["nodes"] += 1
+
+    def _pop(self):
+        node = self.nodes.pop()
+        pos, _, journal, claimed = self._history.pop()
+        self.canvas.restore(journal)
+        self._lines.release(claimed)
+        if pos is not None:
+            del self.node_positions[node['id']]
+            self.layout = self.layout[0]
+            self._index.remove(pos['x'], pos['y'])
+        self._resize(*self._extent())
+
+    def _draw_node(self, pos_data):
+        """Draws one node box and the connectors from its sources."""
+        self.canvas.draw(node_ops(pos_data, self.node_positions, self.vertical_spacing, self._index, self.horizontal_spacing, self._lines))
+
+
+def layout_positions(layout):
+    """Returns the node_positions dict (in placement order) of a renderer's layout chain."""
+    positions = []
+    while layout is not None:
+        layout, pos = layout
+        positions.append(pos)
+    return {pos['node']['id']: pos for pos in reversed(positions)}
+
+
+def canvas_size(max_x, max_y, horizontal_spacing=HORIZONTAL_SPACING):
+    """Returns (width, height) of the canvas around placed boxes reaching max_x, max_y."""
+    if not max_y:
+        return 0, 0
+    # Same padding generate_flowchart always used around the placed boxes.
+    return max_x + horizontal_spacing * 2 + 20, max_y + 5
+
+
+def node_ops(pos_data, node_positions, vertical_spacing=VERTICAL_SPACING, index=None, horizontal_spacing=HORIZONTAL_SPACING, lines=None):
+    """
+    Returns the drawing operations for one node box and the connectors from its
+    sources, in painting order. Each operation is (x, y0, y1, text, join): text is
+    written at column x on every row from y0 up to y1, so a single character on
+    several rows is a vertical line. Box operations overwrite what is there;
+    connector operations (join=True) join the lines already drawn. index is the
+    PlacementIndex of the boxes placed so far and lines the routing Occupancy of the
+    connectors drawn so far, which connectors are routed clear of. The box's own
+    exits are claimed in lines, whether or not it has sources.
+    """
+    x, y, w, h, node = pos_data['x'], pos_data['y'], pos_data['width'], pos_data['height'], pos_data['node']
+    text_lines = tuple(node['text'])
+    if node['isLoop'] and node['loopTarget']:
+        loop_note = f"*Loop to: {node['loopTarget']}"
+        text_lines = text_lines + (loop_note,)
+    # The finished box rows come from a cache shared by every box with the same label.
+    ops = [(x + dx, y + dy0, y + dy1, text, False) for dx, dy0, dy1, text in box_ops(text_lines, w, h)]
+
+    if lines is not None: claim_exits(pos_data, lines)
+    sources_pos = [node_positions[s_id] for s_id in node['connections'] if s_id in node_positions]
+    if sources_pos:
+        ops += connector_ops(pos_data, sources_pos, index, vertical_spacing, horizontal_spacing, lines)
+    return ops
+
+
+def iter_node_ops(nodes, node_width=UNIFORM_NODE_WIDTH, node_height=UNIFORM_NODE_HEIGHT,
+                  vertical_spacing=VERTICAL_SPACING, horizontal_spacing=HORIZONTAL_SPACING):
+    """Places the nodes with place_nodes() and yields (position, node_ops()) for every placed node."""
+    node_positions, _, _ = place_nodes(nodes, node_width, node_height, vertical_spacing, horizontal_spacing)
+    return iter_layout_ops(node_positions, node_width, node_height, vertical_spacing, horizontal_spacing)
+
+
+def iter_layout_ops(node_positions, node_width=UNIFORM_NODE_WIDTH, node_height=UNIFORM_NODE_HEIGHT,
+                    vertical_spacing=VERTICAL_SPACING, horizontal_spacing=HORIZONTAL_SPACING):
+    """
+    Yields (position, node_ops()) for every position of a finished layout, in
+    placement order, routing each node's connectors clear of the boxes and connectors
+    before it, as IncrementalRenderer does.
+    """
+    placed = {}
+    index, lines = PlacementIndex(node_width, node_height), Occupancy()
+    for node_id, pos_data in node_positions.items():
+        placed[node_id] = pos_data
+        index.add(pos_data['x'], pos_data['y'])
+        yield pos_data, node_ops(pos_data, placed, vertical_spacing, index, horizontal_spacing, lines)
+
+
+def iter_rows(nodes, node_width=UNIFORM_NODE_WIDTH, node_height=UNIFORM_NODE_HEIGHT,
+              vertical_spacing=VERTICAL_SPACING, horizontal_spacing=HORIZONTAL_SPACING):
+    """
+    Yields the rows of the rendered flowchart one at a time, without ever holding
+    the whole canvas. Only the layout, the drawing operations and a single row
+    buffer are kept, so memory grows with the node count and the chart width.
+    """
+    # Operations are bucketed by the first row they touch and painted in their
+    # original order, so overlapping strokes come out exactly as on a full canvas.
+    starts, ends = {}, {}
+    seq, max_x, max_y = 0, 0, 0
+    for pos_data, ops in iter_node_ops(nodes, node_width, node_height, vertical_spacing, horizontal_spacing):
+        max_x = max(max_x, pos_data['x'] + node_width); max_y = max(max_y, pos_data['y'] + node_height)
+        for op in ops:
+            first, last = max(op[1], 0), op[2]
+            if first < last and op[3]:
+                starts.setdefault(first, []).append((seq, op))
+                ends[last] = ends.get(last, 0) + 1
+            seq += 1
+    width, height = canvas_size(max_x, max_y, horizontal_spacing)
+
+    line = Canvas(width, 1)
+    buffer, blank = line.rows[0], bytes(line.rows[0])
+    active = []
+    for y in range(height):
+        if y in ends:
+            active = [item for item in active if item[1][2] > y]
+        if y in starts:
+            active.extend(starts.pop(y)); active.sort()
+        buffer[:] = blank
+        for _, (x, _, _, text, join) in active:
+            (line.join if join else line.write)(x, 0, text)
+        yield line.row_text(0)
+
+
+def write_flowchart(nodes, f, strip=False, **layout):
+    """
+    Streams the rendered flowchart to an open text file, row by row.
+    With strip=True the output matches the chart text with surrounding whitespace
+    stripped, as the builder has always exported it.
+    """
+    write_rows(iter_rows(nodes, **layout), f, strip)
+
+
+def write_rows(rows, f, strip=False):
+    """Writes chart rows to an open text file, stripped as in write_flowchart."""
+    if not strip:
+        for n, row in enumerate(rows):
+            f.write("\n" + row if n else row)
+        return
+
+    # Trailing whitespace can only be dropped once we know nothing else follows it,
+    # so whitespace is held back as [text, repeat count] runs (blank rows repeat).
+    held, started = [], False
+    for row in rows:
+        piece = "\n" + row if started else row.lstrip()
+        content = piece.rstrip()
+        if not content:
+            if not started: continue
+            if held and held[-1][0] == piece: held[-1][1] += 1
+            else: held.append([piece, 1])
+            continue
+        for text, count in held:
+            f.write(text * count)
+        f.write(content); started = True
+        held = [[piece[len(content):], 1]]
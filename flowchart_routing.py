@@ -0,0 +1,440 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Connector Routing
+# ------------------------------------------------------------
+"""
+Paths of the connectors between node boxes.
+
+A connector is worked out as a few points joined by straight strokes. Every point
+gets the line character for the directions its strokes leave it in, so a merge bar
+comes out as └──┬──┘ and a path turning a corner gets ┐ or ┘. The renderer draws
+connectors in join mode (see flowchart_canvas), so where the lines out of one step
+fan out they join into ├, ┬ and so on.
+
+Routes are picked against an Occupancy grid of the connector cells drawn so far, so
+a line keeps clear of the boxes and of the other connectors: the only lines that
+share cells are the ones leaving the same step and the sources of one merge meeting
+in its bar. The cell below and the cell right of every box are kept for the
+connectors that will leave it (see claim_exits), so no other line or arrow head
+covers them. Placement does not know about the lines: a box placed later is drawn
+over any line in its way, as boxes always were.
+
+Each connector first tries a few fixed shapes, best first: straight down or across,
+a detour down a free lane in the gap beside the column into the side or the top of
+its target, a merge bar on one of the rows above its target. The first shape whose
+cells are all clear is drawn. When none is, a search over the grid around the boxes
+looks for the shortest clear path, each turn counting extra. Only when a line is
+boxed in does it cross another, straight over it so the crossing reads as ┼, and
+only when even that is impossible does it run along another line. Routes only look
+at what was drawn before their target, so a chart is routed the same way however it
+is rendered.
+
+The fixed shapes are worked out relative to their source and memoized by the offset
+of their target, so repeated patterns share them and each connector only pays for
+checking their cells.
+"""
+import heapq
+from functools import lru_cache
+
+from flowchart_canvas import UP, DOWN, LEFT, RIGHT, LINE_GLYPHS
+from flowchart_layout import VERTICAL_SPACING, HORIZONTAL_SPACING
+
+ROUTE_CACHE_SIZE = 65536 # distinct route shapes remembered
+TURN_COST = 4 # extra cost of a turn in a searched path, in cells
+CROSSING_COST = 60 # extra cost of crossing another line, once no clear path is left
+SHARING_COST = 200 # extra cost of running along another line, once there is no other way
+SEARCH_LIMIT = 40000 # states a search may expand before it gives up
+
+# How far a searched path may get in the way of other lines.
+CLEAR, CROSSING, SHARING = range(3)
+
+# Moves on the grid, by the arm a stroke leaves a cell with when it makes them.
+_STEPS = {UP: (0, -1), DOWN: (0, 1), LEFT: (-1, 0), RIGHT: (1, 0)}
+_REVERSE = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}
+# The moves a path may make after each move: anything but straight back.
+_MOVES = {arm: tuple((move, *step) for move, step in _STEPS.items() if move != _REVERSE[arm]) for arm in _STEPS}
+
+
+class Occupancy:
+    """
+    Cells taken by the connectors drawn so far, each with its owner: the id of the
+    source step for the line of a single connector (other lines out of that step may
+    share it), ("merge", target id) for the lines of a merge, ("arrow", target id)
+    for an arrow head, and ("exit", box id) for the cells kept for the connectors
+    leaving a box.
+
+    When journal is a list, every cell claimed is appended to it so the claims can
+    be undone with release().
+    """
+
+    def __init__(self):
+        self.cells = {}
+        self.journal = None
+
+    def __len__(self):
+        return len(self.cells)
+
+    def claim(self, cell, owner):
+        """Gives a free cell to owner. A cell that is already taken keeps its owner."""
+        if cell in self.cells: return
+        self.cells[cell] = owner
+        if self.journal is not None: self.journal.append(cell)
+
+    def release(self, journal):
+        """Frees the cells claimed while journal was recording."""
+        for cell in journal: del self.cells[cell]
+
+
+def claim_exits(pos_data, lines):
+    """Keeps the cell below and the cell right of a placed box for the connectors that will leave it."""
+    x, y, w, h = pos_data['x'], pos_data['y'], pos_data['width'], pos_data['height']
+    target = pos_data['node']['id']
+    lines.claim((x + w // 2, y + h), ("exit", target)); lines.claim((x + w, y + h // 2), ("exit", target))
+
+
+def connector_ops(pos_data, sources_pos, index=None, vertical_spacing=VERTICAL_SPACING, horizontal_spacing=HORIZONTAL_SPACING, lines=None):
+    """
+    Returns the drawing operations of the connectors into a placed node from its
+    placed sources, as (x, y0, y1, text, True): they are drawn in join mode. index is
+    the PlacementIndex of the boxes placed so far and lines the Occupancy of the
+    connectors drawn so far; the connectors are routed clear of both and claimed in
+    lines. Without them the first shape (straight, or the usual merge bar) is drawn.
+    """
+    x, y, w, h, node = pos_data['x'], pos_data['y'], pos_data['width'], pos_data['height'], pos_data['node']
+    target = node['id']
+    routed = index is not None and lines is not None
+
+    if node['type'] == 'merge' or (node['is_end'] and len(sources_pos) > 1):
+        offsets = tuple((s['x'] + s['width'] // 2 - x, s['y'] + h - y) for s in sources_pos)
+        shapes = _merge_shapes(offsets, w, h, vertical_spacing)
+        owner, origin, heading = ("merge", target), (x, y), DOWN
+        starts = {(s['x'] + s['width'] // 2, s['y'] + h): ("exit", s['node']['id']) for s in sources_pos}
+    else:
+        s_pos = sources_pos[0]
+        sx, sy = s_pos['x'], s_pos['y']
+        if node['direction'] == 'down':
+            if sy + h >= y: return ()
+            shapes = _down_shapes(x - sx, y - sy, w, h, horizontal_spacing)
+            start, heading = (sx + w // 2, sy + h), DOWN
+        else:
+            if sx + w >= x: return ()
+            shapes = _right_shapes(x - sx, y - sy, w, h, horizontal_spacing)
+            start, heading = (sx + w, sy + h // 2), RIGHT
+        owner, origin = s_pos['node']['id'], (sx, sy)
+        starts = {start: ("exit", owner)}
+    if not routed:
+        return _shifted(_sketched(shapes[0]), *origin)
+
+    bounds = _window(pos_data, sources_pos, vertical_spacing, horizontal_spacing)
+    ox, oy = origin
+    for shape in shapes:
+        if _clear(shape, ox, oy, owner, starts, index, lines, bounds):
+            _claim(shape, ox, oy, owner, target, lines)
+            return _shifted(_sketched(shape), ox, oy)
+    paths = _search_paths(pos_data, starts, heading, owner, index, lines, bounds)
+    if paths is None:
+        # Boxed in: keep at least clear of the boxes, as routes always did.
+        shape = next((shape for shape in shapes if _clear(shape, ox, oy, owner, starts, index, Occupancy(), bounds)), shapes[0])
+        paths = tuple((tuple((ox + px, oy + py) for px, py in points), arm, arrow) for points, arm, arrow in shape)
+    _claim(paths, 0, 0, owner, target, lines)
+    return _shifted(_sketch(paths), 0, 0)
+
+
+def _shifted(ops, x, y):
+    return [(x + dx, y + dy0, y + dy1, text, True) for dx, dy0, dy1, text in ops]
+
+
+def _window(pos_data, sources_pos, vertical_spacing, horizontal_spacing):
+    """
+    The cells a route may use: the boxes it joins, with room for a lane beside them
+    and a row above and below. It stays inside the canvas padding (see
+    flowchart_renderer.canvas_size), so routes are never cut off.
+    """
+    w, h = pos_data['width'], pos_data['height']
+    boxes = [pos_data] + sources_pos
+    margin = horizontal_spacing + w // 2
+    return (max(0, min(b['x'] for b in boxes) - margin), max(0, min(b['y'] for b in boxes) - vertical_spacing),
+            max(b['x'] for b in boxes) + w - 1 + margin, max(b['y'] for b in boxes) + h - 1 + vertical_spacing)
+
+
+def _lanes(first, last):
+    """The columns first .. last, the middle one first and then outwards."""
+    middle = (first + last) // 2
+    return sorted(range(first, last + 1), key=lambda lane: (abs(lane - middle), lane))
+
+
+@lru_cache(maxsize=ROUTE_CACHE_SIZE)
+def _down_shapes(dx, dy, w, h, horizontal_spacing):
+    """
+    Shapes from a source at (0, 0) down to a target dx, dy away, best first: straight
+    down, then out of the bottom and down a lane in the gap beside the column into
+    the side of the target, then down such a lane into the top of the target.
+    """
+    c, m = w // 2, h // 2
+    shapes = [(([(c, h), (c, dy - 1)], UP, '▼'),)]
+    right_lanes = [lane for lane in _lanes(w + 1, w + horizontal_spacing - 2) if lane > dx + w]
+    left_lanes = [lane for lane in _lanes(1 - horizontal_spacing, -2) if lane < dx - 1]
+    turns = [row for row in (h, h + 1) if row < dy + m - 1]
+    for turn in turns:
+        stem = [(c, h)] + ([(c, turn)] if turn > h else [])
+        for lane in right_lanes:
+            shapes.append(((stem + [(lane, turn), (lane, dy + m - 1), (dx + w, dy + m - 1)], UP, '◄'),))
+        for lane in left_lanes:
+            shapes.append(((stem + [(lane, turn), (lane, dy + m), (dx - 1, dy + m)], UP, '►'),))
+    for turn in (row for row in turns if row < dy - 2):
+        stem = [(c, h)] + ([(c, turn)] if turn > h else [])
+        for lane in right_lanes + left_lanes:
+            shapes.append(((stem + [(lane, turn), (lane, dy - 2), (dx + c, dy - 2), (dx + c, dy - 1)], UP, '▼'),))
+    return tuple(_tidy(shape) for shape in shapes)
+
+
+@lru_cache(maxsize=ROUTE_CACHE_SIZE)
+def _right_shapes(dx, dy, w, h, horizontal_spacing):
+    """
+    Shapes from a source at (0, 0) to a target dx, dy away on its right, best first:
+    straight across, or for a target pushed lower, down a lane in the gap and into
+    its side, or along the row and down into its top.
+    """
+    c, m = w // 2, h // 2
+    if dy == 0:
+        return (_tidy((([(w, m), (dx - 1, m)], LEFT, '►'),)),)
+    shapes = [(([(w, m), (lane, m), (lane, dy + m), (dx - 1, dy + m)], LEFT, '►'),) for lane in _lanes(w + 1, dx - 2)]
+    if dy - 1 > m:
+        shapes.append((([(w, m), (dx + c, m), (dx + c, dy - 1)], LEFT, '▼'),))
+    if not shapes:
+        shapes.append((([(w, m), (dx - 1, m)], LEFT, '►'),))
+    return tuple(_tidy(shape) for shape in shapes)
+
+
+@lru_cache(maxsize=ROUTE_CACHE_SIZE)
+def _merge_shapes(sources, w, h, vertical_spacing):
+    """
+    Shapes of sources (bottom-centre offsets) into one bar above a target at (0, 0)
+    and down from the bar, best first: the bar on the row above the arrow head, then
+    on each row higher up that is still below every source.
+    """
+    target_x = w // 2
+    columns = sorted({sx for sx, _ in sources} | {target_x})
+    lowest = max(bottom for _, bottom in sources)
+    first = -(vertical_spacing // 2) - 1
+    shapes = []
+    for bar_y in [first] + list(range(first - 1, lowest - 1, -1)):
+        paths = [([(sx, min(bottom, bar_y)), (sx, bar_y)], UP, None) for sx, bottom in sources]
+        paths.append(([(columns[0], bar_y), (columns[-1], bar_y)], 0, None))
+        paths.append(([(target_x, bar_y), (target_x, -1)], 0, '▼'))
+        shapes.append(_tidy(paths))
+    return tuple(shapes)
+
+
+def _tidy(paths):
+    """Paths as hashable tuples, without repeated points."""
+    tidy = []
+    for points, arm, arrow in paths:
+        kept = [points[0]] + [point for previous, point in zip(points, points[1:]) if point != previous]
+        tidy.append((tuple(kept), arm, arrow))
+    return tuple(tidy)
+
+
+def _path_cells(points):
+    """Every cell the strokes between points run through, in order."""
+    x, y = points[0]
+    yield x, y
+    for x1, y1 in points[1:]:
+        step_x, step_y = (x1 > x) - (x1 < x), (y1 > y) - (y1 < y)
+        while (x, y) != (x1, y1):
+            x += step_x; y += step_y
+            yield x, y
+
+
+def _clear(shape, ox, oy, owner, starts, index, lines, bounds):
+    """
+    True if shape, moved by (ox, oy), stays in bounds, off every box, and only on
+    free cells or cells of owner. A start cell may be the source's kept exit; an
+    arrow head needs a cell of its own.
+    """
+    x0, y0, x1, y1 = bounds
+    held_by = lines.cells.get
+    for points, _, arrow in shape:
+        moved = [(ox + px, oy + py) for px, py in points]
+        for (ax, ay), (bx, by) in zip(moved, moved[1:] or moved):
+            if min(ax, bx) < x0 or max(ax, bx) > x1 or min(ay, by) < y0 or max(ay, by) > y1: return False
+            if index.boxes_in(min(ax, bx), min(ay, by), max(ax, bx), max(ay, by)): return False
+        for cell in _path_cells(moved):
+            held = held_by(cell)
+            if held is not None and held != owner and held != starts.get(cell): return False
+        if arrow:
+            held = held_by(moved[-1])
+            if held is not None and held != starts.get(moved[-1]): return False
+    return True
+
+
+def _claim(shape, ox, oy, owner, target, lines):
+    for points, _, arrow in shape:
+        cells = list(_path_cells([(ox + px, oy + py) for px, py in points]))
+        if arrow: lines.claim(cells.pop(), ("arrow", target))
+        for cell in cells: lines.claim(cell, owner)
+
+
+def _entries(pos_data):
+    """Where a connector may come into a box: arrow cell -> the move that reaches it, and the arrow head."""
+    x, y, w, h = pos_data['x'], pos_data['y'], pos_data['width'], pos_data['height']
+    # The right side is entered a row above the middle, which is kept for the box's own right exit.
+    return {(x + w // 2, y - 1): (DOWN, '▼'), (x - 1, y + h // 2): (RIGHT, '►'), (x + w, y + h // 2 - 1): (LEFT, '◄')}
+
+
+def _search_paths(pos_data, starts, heading, owner, index, lines, bounds):
+    """
+    Paths from every start cell into the target found by searching the grid, or None.
+    The start nearest the target is routed into it first, and the others join the
+    lines already found. Crossings are only allowed once no clear path exists, and
+    running along another line only once there is not even a path with crossings.
+    """
+    x0, y0, x1, y1 = bounds
+    w, h = index.node_width, index.node_height
+    blocked = set()
+    for bx, by in index.boxes_in(x0, y0, x1, y1):
+        for row in range(max(by, y0), min(by + h, y1 + 1)):
+            blocked.update((col, row) for col in range(max(bx, x0), min(bx + w, x1 + 1)))
+    entries = {cell: entry for cell, entry in _entries(pos_data).items() if cell not in blocked and cell not in lines.cells}
+    if not entries: return None
+    tx, ty = pos_data['x'] + pos_data['width'] // 2, pos_data['y']
+    order = sorted(starts, key=lambda cell: (abs(cell[0] - tx) + abs(cell[1] - ty), cell))
+    arm = UP if heading == DOWN else LEFT
+    for allowed in (CLEAR, CROSSING, SHARING):
+        paths, joins = [], set()
+        for start in order:
+            cells = _search(start, heading, {} if paths else entries, joins, owner, blocked, lines, bounds, allowed)
+            if cells is None: break
+            arrow = None if paths else entries[cells[-1]][1]
+            paths.append((_corners(cells), arm, arrow))
+            joins.update(cells[1:-1] if arrow else cells[1:])
+        else:
+            return tuple(paths)
+    return None
+
+
+def _search(start, heading, entries, joins, owner, blocked, lines, bounds, allowed=CLEAR):
+    """
+    Cells of a cheapest path from start, leaving it by heading, to an arrow cell of
+    entries (reached by its move) or to any cell of joins, or None. Each move costs a
+    cell and each turn TURN_COST more. With allowed=CROSSING the path may also go
+    straight over a line of another connector at CROSSING_COST, but never turn on
+    it, run along it or touch an arrow head or a kept exit; with allowed=SHARING it
+    may take any cell but an arrow head at SHARING_COST.
+
+    Every cell is only reached once, along its cheapest path so far, and keeps the
+    way that path came in. That can miss a path that reaches a cell more dearly but
+    turns less after it, which only makes a route a little longer, and it keeps the
+    search to one visit per cell.
+    """
+    x0, y0, x1, y1 = bounds
+    held_by = lines.cells.get
+    # Distance to the box around every goal cell: it never overestimates, so the
+    # search heads straight for the goal while it can.
+    goals = list(entries) + list(joins)
+    gx0, gy0 = min(x for x, _ in goals), min(y for _, y in goals)
+    gx1, gy1 = max(x for x, _ in goals), max(y for _, y in goals)
+
+    best = {start: 0}
+    came_from = {start: (None, heading)}
+    # Ties go to the path that got furthest, which keeps the search from fanning out
+    # over every equally good cell.
+    queue = [(0, 0, start)]
+    expanded = 0
+    while queue:
+        _, cost, cell = heapq.heappop(queue)
+        cost = -cost
+        if cost > best[cell]: continue
+        if cell != start and (cell in entries or cell in joins):
+            cells = [cell]
+            while came_from[cell][0] is not None:
+                cell = came_from[cell][0]
+                cells.append(cell)
+            return cells[::-1]
+        expanded += 1
+        if expanded > SEARCH_LIMIT: return None
+        x, y = cell
+        arm = came_from[cell][1]
+        held = held_by(cell)
+        over = allowed == CROSSING and cell != start and held is not None and held != owner
+        for move, step_x, step_y in _MOVES[arm]:
+            if over and move != arm: continue
+            nx, ny = x + step_x, y + step_y
+            nxt = (nx, ny)
+            if not (x0 <= nx <= x1 and y0 <= ny <= y1) or nxt in blocked: continue
+            step = cost + 1 if move == arm else cost + 1 + TURN_COST
+            entry = entries.get(nxt)
+            if entry is not None:
+                if move != entry[0]: continue
+            elif nxt not in joins:
+                held = held_by(nxt)
+                if held is not None and held != owner:
+                    if allowed == SHARING:
+                        if isinstance(held, tuple) and held[0] == "arrow": continue
+                        step += SHARING_COST
+                    else:
+                        # Only straight over a line running the other way, so the crossing reads as ┼.
+                        if allowed == CLEAR or isinstance(held, tuple) and held[0] != "merge": continue
+                        if held_by(cell) == held or held_by((nx + step_x, ny + step_y)) == held: continue
+                        step += CROSSING_COST
+            if step < best.get(nxt, step + 1):
+                best[nxt] = step
+                came_from[nxt] = (cell, move)
+                estimate = max(gx0 - nx, 0, nx - gx1) + max(gy0 - ny, 0, ny - gy1)
+                heapq.heappush(queue, (step + estimate, -step, nxt))
+    return None
+
+
+def _corners(cells):
+    """The points of a path of cells: its ends and the cells where it turns."""
+    points = [cells[0]]
+    for before, cell, after in zip(cells, cells[1:], cells[2:]):
+        if (cell[0] - before[0], cell[1] - before[1]) != (after[0] - cell[0], after[1] - cell[1]): points.append(cell)
+    points.append(cells[-1])
+    return tuple(points)
+
+
+def _sketch(paths):
+    """
+    Turns paths, each (points, arm at the first point, arrow head at the last point),
+    into drawing operations. Points shared by several strokes get the joined line
+    character, and the cells of a path are gathered into as few runs as possible.
+    """
+    arms, arrows = {}, {}
+    for points, start_arm, arrow in paths:
+        arms[points[0]] = arms.get(points[0], 0) | start_arm
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            if x0 == x1 and y0 != y1:
+                step = 1 if y1 > y0 else -1
+                arms[x0, y0] = arms.get((x0, y0), 0) | (DOWN if step > 0 else UP)
+                arms[x1, y1] = arms.get((x1, y1), 0) | (UP if step > 0 else DOWN)
+                for y in range(y0 + step, y1, step): arms[x0, y] = arms.get((x0, y), 0) | UP | DOWN
+            elif y0 == y1 and x0 != x1:
+                step = 1 if x1 > x0 else -1
+                arms[x0, y0] = arms.get((x0, y0), 0) | (RIGHT if step > 0 else LEFT)
+                arms[x1, y1] = arms.get((x1, y1), 0) | (LEFT if step > 0 else RIGHT)
+                for x in range(x0 + step, x1, step): arms[x, y0] = arms.get((x, y0), 0) | LEFT | RIGHT
+        if arrow: arrows[points[-1]] = arrow
+    cells = {cell: LINE_GLYPHS[mask] for cell, mask in arms.items() if mask}
+    cells.update(arrows)
+
+    # Vertical runs of one character become a single operation, the rest are joined along their rows.
+    ops, rows = [], {}
+    for (x, y), char in sorted(cells.items()):
+        if ops and ops[-1][0] == x and ops[-1][2] == y and ops[-1][3] == char:
+            ops[-1] = (x, ops[-1][1], y + 1, char)
+        else:
+            ops.append((x, y, y + 1, char))
+    runs = [op for op in ops if op[2] - op[1] > 1]
+    for x, y, _, char in sorted((op for op in ops if op[2] - op[1] == 1), key=lambda op: (op[1], op[0])):
+        run = rows.get(y)
+        if run is not None and run[0] + len(run[1]) == x:
+            rows[y] = (run[0], run[1] + char)
+        else:
+            if run is not None: runs.append((run[0], y, y + 1, run[1]))
+            rows[y] = (x, char)
+    runs += [(x, y, y + 1, text) for y, (x, text) in rows.items()]
+    return tuple(runs)
+
+
+# Fixed shapes are drawn over and over, so their drawing operations are worked out once.
+_sketched = lru_cache(maxsize=ROUTE_CACHE_SIZE)(_sketch)
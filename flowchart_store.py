@@ -0,0 +1,197 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Node Store
+# ------------------------------------------------------------
+"""
+The flowchart's node model.
+
+NodeStore keeps the steps in the order they were added, together with an id index,
+the child lists of every node and the sorted positions of the sink nodes (steps
+nothing connects from yet, the candidates for "End of Flowchart"). All of these
+are maintained as steps are appended or the last one is removed, so none of the
+builder's lookups have to scan the whole chart.
+
+Node records use __slots__ to stay small, and also answer node['key'] like the
+dicts the renderer has always been given.
+"""
+import bisect
+import itertools
+
+NODE_FIELDS = ("id", "text", "type", "connections", "direction", "isLoop", "loopTarget", "is_end")
+
+
+class Node:
+    """One flowchart step. Reads like the old node dicts: node['text'], node.get('is_end')."""
+    __slots__ = NODE_FIELDS
+
+    def __init__(self, id, text, type="regular", connections=(), direction=None,
+                 isLoop=False, loopTarget="", is_end=False):
+        self.id = id
+        self.text = list(text)
+        self.type = type
+        self.connections = list(connections)
+        self.direction = direction
+        self.isLoop = isLoop
+        self.loopTarget = loopTarget
+        self.is_end = is_end
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in NODE_FIELDS else default
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in NODE_FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data[field] for field in NODE_FIELDS if field in data})
+
+    def __repr__(self):
+        return f"Node({self.id!r}, {self.text!r})"
+
+
+class NodeStore:
+    """Ordered, id-indexed node list with maintained adjacency and sink set."""
+
+    ID_PREFIX = "node-"
+
+    def __init__(self, nodes=()):
+        self.clear()
+        self.extend(nodes)
+
+    def clear(self):
+        self._nodes = []
+        self._by_id = {}
+        self._positions = {} # node id -> index in the ordered list
+        self._children = {} # node id -> ids of the nodes connected from it
+        self._sink_positions = [] # sorted list positions of non-end nodes with no children
+        self._counters = [] # id counter before each append, restored by pop()
+        self.id_counter = 0
+
+    # --- Sequence protocol (what the renderer and the builder iterate over) ---
+    def __len__(self):
+        return len(self._nodes)
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def __getitem__(self, index):
+        return self._nodes[index]
+
+    def __contains__(self, node_id):
+        return node_id in self._by_id
+
+    # --- Lookups ---
+    def get(self, node_id, default=None):
+        return self._by_id.get(node_id, default)
+
+    def children(self, node_id):
+        return list(self._children.get(node_id, ()))
+
+    def parents(self, node_id):
+        return list(self._by_id[node_id].connections)
+
+    def sinks(self):
+        """Yields the non-end nodes that nothing connects from yet, in chart order."""
+        nodes = self._nodes
+        for position in self._sink_positions:
+            yield nodes[position]
+
+    def is_sink(self, node_id):
+        node = self._by_id.get(node_id)
+        return node is not None and not node.is_end and not self._children.get(node_id)
+
+    # --- Changes ---
+    def next_id(self):
+        return f"{self.ID_PREFIX}{self.id_counter + 1}"
+
+    def add(self, text, type="regular", connections=(), direction=None, isLoop=False, loopTarget="", is_end=False):
+        """Creates a node with the next free id, appends it and returns it."""
+        node = Node(self.next_id(), text, type, connections, direction, isLoop, loopTarget, is_end)
+        return self.append(node)
+
+    def append(self, node):
+        if node.id in self._by_id:
+            raise ValueError(f"Duplicate node id '{node.id}'.")
+        self._counters.append(self.id_counter)
+        number = node.id[len(self.ID_PREFIX):] if node.id.startswith(self.ID_PREFIX) else ""
+        if number.isdigit():
+            self.id_counter = max(self.id_counter, int(number))
+
+        for source_id in node.connections:
+            children = self._children.setdefault(source_id, [])
+            if not children and source_id in self._by_id:
+                self._remove_sink(source_id)
+            children.append(node.id)
+        self._by_id[node.id] = node
+        self._positions[node.id] = len(self._nodes)
+        self._nodes.append(node)
+        if not node.is_end and node.id not in self._children:
+            self._sink_positions.append(len(self._nodes) - 1)
+        return node
+
+    def extend(self, nodes):
+        """
+        Appends many nodes (Node objects or dicts) at once, ending in the same state as
+        append() for each of them but without maintaining the sink list node by node.
+        """
+        nodes = [node if isinstance(node, Node) else Node.from_dict(node) for node in nodes]
+        new_ids = {node.id for node in nodes}
+        if len(new_ids) != len(nodes) or not new_ids.isdisjoint(self._by_id):
+            seen = set(self._by_id)
+            for node in nodes:
+                if node.id in seen: raise ValueError(f"Duplicate node id '{node.id}'.")
+                seen.add(node.id)
+
+        start = len(self._nodes)
+        ids = [node.id for node in nodes]
+        self._by_id.update(zip(ids, nodes))
+        self._positions.update(zip(ids, range(start, start + len(nodes))))
+        prefix, prefix_length = self.ID_PREFIX, len(self.ID_PREFIX)
+        numbers = [int(node_id[prefix_length:]) if node_id.startswith(prefix) and node_id[prefix_length:].isdigit() else 0 for node_id in ids]
+        counters = list(itertools.accumulate(numbers, max, initial=self.id_counter))
+        self.id_counter = counters.pop()
+        self._counters.extend(counters)
+        children = self._children
+        for node_id, node in zip(ids, nodes):
+            for source_id in node.connections:
+                if source_id in children: children[source_id].append(node_id)
+                else: children[source_id] = [node_id]
+        self._nodes.extend(nodes)
+
+        all_nodes = self._nodes
+        self._sink_positions = [position for position in self._sink_positions if all_nodes[position].id not in children]
+        self._sink_positions.extend(position for position in range(start, len(all_nodes))
+                                    if not all_nodes[position].is_end and all_nodes[position].id not in children)
+
+    def pop(self):
+        """Removes and returns the last node, restoring the id counter from before it was added."""
+        node = self._nodes.pop()
+        del self._by_id[node.id]; del self._positions[node.id]
+        if self._sink_positions and self._sink_positions[-1] == len(self._nodes):
+            self._sink_positions.pop()
+        for source_id in node.connections:
+            children = self._children[source_id]
+            # The last node is always the newest child of each of its sources.
+            if children[-1] == node.id: children.pop()
+            else: children.remove(node.id)
+            if not children:
+                del self._children[source_id]
+                if self.is_sink(source_id):
+                    self._add_sink(source_id)
+        self._children.pop(node.id, None)
+        self.id_counter = self._counters.pop()
+        return node
+
+    def _remove_sink(self, node_id):
+        position = self._positions[node_id]
+        i = bisect.bisect_left(self._sink_positions, position)
+        if i < len(self._sink_positions) and self._sink_positions[i] == position:
+            del self._sink_positions[i]
+
+    def _add_sink(self, node_id):
+        bisect.insort(self._sink_positions, self._positions[node_id])
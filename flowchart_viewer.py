@@ -0,0 +1,132 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Virtualized Output Panel
+# ------------------------------------------------------------
+"""
+A read-only chart viewer that only ever holds the visible part of the chart.
+
+Tk's Text widget slows down badly once it holds megabytes of unwrapped text, so
+instead of inserting the whole chart the viewer asks its row source for the rows
+and columns that fit in the window, and fetches again when the user scrolls or
+resizes. The scrollbars are driven by the source's full size.
+
+A row source is any object with width and height attributes (in characters) and a
+rows(start, stop, col_start, col_stop) method returning the text of rows start ..
+stop - 1, cut to columns col_start .. col_stop - 1. The builder shows the
+flowchart_canvas.CanvasSnapshot each background render hands back, and the
+flowchart_file.SavedRender of an opened chart until that is replaced. A source is
+read on the Tk thread only, so it must not change while it is shown.
+"""
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+WHEEL_ROWS = 3 # Rows scrolled per mouse-wheel notch
+WHEEL_COLUMNS = 6 # Columns scrolled per Shift+wheel notch
+
+
+class ChartViewer(ttk.Frame):
+    """Output panel showing a window onto a row source, with its own scrollbars."""
+
+    def __init__(self, master, font=("Consolas", 10), **text_options):
+        super().__init__(master)
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.text = tk.Text(self, wrap=tk.NONE, font=font, **text_options)
+        self.text.grid(row=0, column=0, sticky="nsew")
+        self.vbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.vbar.grid(row=0, column=1, sticky="ns")
+        self.hbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.xview)
+        self.hbar.grid(row=1, column=0, sticky="ew")
+
+        self._font = tkfont.Font(self, font=font)
+        self.source = None
+        self.message = ""
+        self.top = self.left = 0
+        self.visible_rows, self.visible_columns = int(text_options.get("height", 25)), int(text_options.get("width", 80))
+
+        self.text.bind("<Configure>", self._on_configure)
+        self.text.bind("<MouseWheel>", self._on_wheel)
+        self.text.bind("<Shift-MouseWheel>", self._on_shift_wheel)
+        self.text.bind("<Button-4>", lambda e: self.yview("scroll", -WHEEL_ROWS, "units"))
+        self.text.bind("<Button-5>", lambda e: self.yview("scroll", WHEEL_ROWS, "units"))
+        self.show_message("")
+
+    # --- What is shown ---
+    def show_message(self, message):
+        """Replaces the chart with a plain message."""
+        self.source, self.message = None, message
+        self.top = self.left = 0
+        self.refresh()
+
+    def show(self, source):
+        """Shows a row source, keeping the current scroll position where possible."""
+        self.source, self.message = source, ""
+        self.refresh()
+
+    def refresh(self):
+        """Redraws the visible window. Costs O(visible rows x visible columns), whatever the chart size."""
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        if self.source is None:
+            self.text.insert("1.0", self.message)
+            self.vbar.set(0.0, 1.0); self.hbar.set(0.0, 1.0)
+        else:
+            self._clamp()
+            rows = self.source.rows(self.top, self.top + self.visible_rows, self.left, self.left + self.visible_columns)
+            self.text.insert("1.0", "\n".join(rows))
+            self.vbar.set(*self._fractions(self.top, self.visible_rows, self.source.height))
+            self.hbar.set(*self._fractions(self.left, self.visible_columns, self.source.width))
+        self.text.config(state=tk.DISABLED)
+
+    # --- Scrolling (same protocol as Text.yview / Text.xview, so scrollbars can drive it) ---
+    def yview(self, *args):
+        if self.source is not None:
+            self.top = self._scroll(args, self.top, self.visible_rows, self.source.height)
+            self.refresh()
+
+    def xview(self, *args):
+        if self.source is not None:
+            self.left = self._scroll(args, self.left, self.visible_columns, self.source.width)
+            self.refresh()
+
+    def _scroll(self, args, position, page, total):
+        if not args: return position
+        if args[0] == "moveto":
+            return int(float(args[1]) * total)
+        if args[0] == "scroll":
+            step = page if args[2] == "pages" else 1
+            return position + int(args[1]) * step
+        return position
+
+    def _clamp(self):
+        self.top = max(0, min(self.top, self.source.height - self.visible_rows))
+        self.left = max(0, min(self.left, self.source.width - self.visible_columns))
+
+    @staticmethod
+    def _fractions(start, page, total):
+        if total <= 0: return 0.0, 1.0
+        return start / total, min(1.0, (start + page) / total)
+
+    # --- Events ---
+    def _on_configure(self, event):
+        # One extra row and column so a partly visible line at the edge is filled too.
+        rows = event.height // max(1, self._font.metrics("linespace")) + 1
+        columns = event.width // max(1, self._font.measure("0")) + 1
+        if (rows, columns) != (self.visible_rows, self.visible_columns):
+            self.visible_rows, self.visible_columns = rows, columns
+            self.refresh()
+
+    @staticmethod
+    def _notches(event):
+        # Windows reports multiples of 120 per notch, macOS small deltas.
+        if abs(event.delta) >= 120: return event.delta // 120
+        return (event.delta > 0) - (event.delta < 0)
+
+    def _on_wheel(self, event):
+        self.yview("scroll", -self._notches(event) * WHEEL_ROWS, "units")
+        return "break"
+
+    def _on_shift_wheel(self, event):
+        self.xview("scroll", -self._notches(event) * WHEEL_COLUMNS, "units")
+        return "break"
@@ -0,0 +1,9 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Test Setup
+# ------------------------------------------------------------
+"""Makes the modules at the repository root and the benchmark modules importable."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
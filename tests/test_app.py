@@ -0,0 +1,162 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - App Construction Tests
+# ------------------------------------------------------------
+"""
+Builds the real FlowchartBuilderApp on stand-in Tk widgets, so the constructor and
+the add / delete / undo / copy / export actions and profiling run without a display.
+"""
+import io
+
+import pytest
+
+import flowchart_builder_python_12 as builder
+import flowchart_renderer
+from flowchart_renderer import render_flowchart, write_flowchart
+
+
+class FakeWidget:
+    """Accepts every widget call. Variables and entries keep their value in .value."""
+
+    def __init__(self, *args, value="", **options):
+        self.value, self.options = value, options
+
+    def get(self, *args):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+    def insert(self, index, text):
+        self.value = self.value + text
+
+    def delete(self, *args):
+        self.value = ""
+
+    def __getitem__(self, key):
+        return self.options.get(key, "")
+
+    def __setitem__(self, key, value):
+        self.options[key] = value
+
+    def config(self, **options):
+        self.options.update(options)
+    configure = config
+
+    def after(self, ms, func=None, *args):
+        return "after#"
+
+    def after_idle(self, func, *args):
+        return "after#"
+
+    def __getattr__(self, name):
+        if name.startswith("__"): raise AttributeError(name)
+        return lambda *args, **kwargs: None
+
+
+class FakeTkModule:
+    """Stands in for tkinter and tkinter.ttk: classes are FakeWidget, constants their lower-case name."""
+
+    def __getattr__(self, name):
+        return FakeWidget if name[:1].isupper() and not name.isupper() else name.lower()
+
+
+@pytest.fixture
+def app(monkeypatch):
+    for name in ("tk", "ttk"): monkeypatch.setattr(builder, name, FakeTkModule())
+    for name in ("ChartViewer", "StepPicker"): monkeypatch.setattr(builder, name, FakeWidget)
+    return builder.FlowchartBuilderApp(FakeWidget())
+
+
+def shown(app):
+    return app.renderer.wait().text()
+
+
+def test_app_constructs(app):
+    assert app.profiler is not None and app.profile_var.get() == app.profiler.enabled
+    assert len(app.nodes) == 0 and not app.renderer.busy() and not app.history.can_undo()
+
+
+def add_steps(app, *labels):
+    app.start_node_text_input.value = "Start"
+    app.add_start_node(); app._flush_refresh()
+    for label in labels:
+        app.next_node_text_input.value = label
+        app.source_node_combobox.value = app._node_option(app.nodes[-1])
+        app.add_next_node(); app._flush_refresh()
+
+
+def test_add_delete_undo_redo(app):
+    add_steps(app, "Load data", "Clean data")
+    assert [node.text[0] for node in app.nodes] == ["Start", "Load data", "Clean data"]
+    assert shown(app) == render_flowchart(list(app.nodes))
+    app.delete_last_node(); app._flush_refresh()
+    assert len(app.nodes) == 2 and shown(app) == render_flowchart(list(app.nodes))
+    app.undo(); app._flush_refresh()
+    assert len(app.nodes) == 3 and shown(app) == render_flowchart(list(app.nodes))
+    app.redo(); app._flush_refresh()
+    assert len(app.nodes) == 2
+
+
+def test_profiling_toggle_traces_actions(app, tmp_path):
+    app.profiler.trace_dir = str(tmp_path)
+    app.profile_var.set(True); app._toggle_profiling()
+    add_steps(app)
+    app.renderer.wait()
+    assert app.profiler.enabled and list(tmp_path.glob("*.trace.json"))
+
+
+def test_toggling_options_keeps_picker_selections(app):
+    add_steps(app, "Load data", "Clean data")
+    first = app._node_option(app.nodes[0])
+    app.source_node_combobox.value = first
+    app.is_loop_var.set(True); app._options_changed(); app._flush_refresh()
+    app.loop_target_combobox.value = first
+    app.node_type_var.set("merge"); app._options_changed(); app._flush_refresh()
+    app.node_type_var.set("regular"); app._options_changed(); app._flush_refresh()
+    assert app.source_node_combobox.value == first and app.loop_target_combobox.value == first
+
+    # Once the chart changes the pickers offer the newest step again.
+    app.next_node_text_input.value = "Train model"
+    app.add_next_node(); app._flush_refresh()
+    assert app.source_node_combobox.value == app._node_option(app.nodes[-1])
+
+
+def test_copy_and_save_wait_for_the_render_without_blocking(app, monkeypatch, tmp_path):
+    copied = []
+    app.master.clipboard_append = copied.append
+    add_steps(app, "Load data", "Clean data")
+    app.copy_to_clipboard()
+    path = tmp_path / "chart.json"
+    monkeypatch.setattr(builder.filedialog, "asksaveasfilename", lambda **options: str(path))
+    app.save_chart()
+    shown(app) # delivers the render, as the next poll would
+    assert copied == [render_flowchart(list(app.nodes)).strip()]
+    nodes, render = builder.load_chart(str(path))
+    assert [node.text for node in nodes] == [node.text for node in app.nodes]
+    assert render.text() == render_flowchart(list(app.nodes))
+
+
+def test_export_writes_the_rendered_snapshot(app, monkeypatch, tmp_path):
+    add_steps(app, "Load data", "Clean data")
+    expected = io.StringIO()
+    write_flowchart(list(app.nodes), expected, strip=True)
+    def no_full_render(*args, **kwargs): raise AssertionError("export rendered the chart again")
+    monkeypatch.setattr(flowchart_renderer, "iter_rows", no_full_render)
+    path = tmp_path / "chart.txt"
+    monkeypatch.setattr(builder.filedialog, "asksaveasfilename", lambda **options: str(path))
+    app.export_to_txt()
+    shown(app) # delivers the render, as the next poll would
+    assert path.read_text(encoding="utf-8") == expected.getvalue()
+    assert "successfully saved" in app.status_text_var.get()
+
+
+def test_render_errors_go_to_the_status_bar(app, monkeypatch):
+    def fail(*args): raise RuntimeError("out of canvas")
+    monkeypatch.setattr(app.renderer._renderer, "replace", fail)
+    copied = []
+    app.master.clipboard_append = copied.append
+    add_steps(app, "Load data")
+    app.copy_to_clipboard()
+    app.renderer.wait()
+    assert "Failed to render the flowchart: out of canvas" in app.status_text_var.get()
+    assert copied == []
@@ -0,0 +1,82 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Render Cache Tests
+# ------------------------------------------------------------
+import sys
+
+from bench_placement import synthetic_chart
+from flowchart_cache import RenderCache, CachedRender, cache_key, common_length, state_digest, ENTRY_OVERHEAD
+from flowchart_canvas import Canvas, CanvasSnapshot
+from flowchart_history import ChartState, EMPTY
+from flowchart_store import NodeStore
+
+
+def test_equal_content_gives_equal_digests():
+    first, second = ChartState.of(NodeStore(synthetic_chart(50, seed=1))), ChartState.of(NodeStore(synthetic_chart(50, seed=1)))
+    assert first is not second and cache_key(first) == cache_key(second)
+    assert common_length(first, second) == 50
+    assert common_length(first.ancestor(20), second) == 20
+    assert state_digest(EMPTY) == b""
+
+
+def test_any_field_change_gives_another_digest():
+    nodes = NodeStore(synthetic_chart(10, seed=2))
+    base = state_digest(ChartState.of(nodes))
+    for field, value in [("text", ["Other"]), ("connections", ["node-1", "node-2"]), ("direction", "right"),
+                         ("type", "merge"), ("isLoop", True), ("loopTarget", "Start"), ("is_end", True)]:
+        changed = NodeStore(synthetic_chart(10, seed=2))
+        if field == "direction" and changed[5].direction == value: value = "down"
+        setattr(changed[5], field, value)
+        state = ChartState.of(changed)
+        assert state_digest(state) != base, field
+        assert common_length(state, ChartState.of(nodes)) == 5
+
+
+def snapshots(count, height=300, width=40):
+    """Snapshots of a canvas taken after every small edit, sharing their unchanged rows."""
+    canvas, previous, result = Canvas(width, height), None, []
+    for n in range(count):
+        canvas.dirty = set()
+        canvas.write(n % width, (n * 37) % height, "#")
+        previous = CanvasSnapshot.of(canvas, previous, canvas.dirty)
+        result.append(previous)
+    return result
+
+
+def held_bytes(snapshots):
+    """Bytes of the distinct tuples and rows the snapshots hold, walked the slow way."""
+    seen, stack = {}, [snapshot.root for snapshot in snapshots]
+    while stack:
+        part = stack.pop()
+        if id(part) in seen: continue
+        seen[id(part)] = sys.getsizeof(part)
+        if type(part) is tuple: stack.extend(child for child in part if child is not None)
+    return sum(seen.values())
+
+
+def test_shared_rows_are_counted_once():
+    cache = RenderCache(budget=10**9)
+    taken = snapshots(40)
+    for n, snapshot in enumerate(taken):
+        cache.put(n, CachedRender(snapshot, None))
+    assert cache.size == held_bytes(taken) + len(taken) * ENTRY_OVERHEAD
+    assert cache.size < 2 * held_bytes(taken[:1]) # 40 snapshots cost far less than 40 copies
+
+
+def test_budget_bounds_what_the_entries_hold():
+    taken = snapshots(60)
+    budget = held_bytes(taken[:1]) + 2000
+    cache = RenderCache(budget)
+    for n, snapshot in enumerate(taken):
+        cache.put(n, CachedRender(snapshot, None))
+        kept = [cache._entries[key].snapshot for key in cache._entries]
+        assert cache.size == held_bytes(kept) + len(kept) * ENTRY_OVERHEAD <= budget
+    assert cache.evictions and cache.get(59) is not None and cache.get(0) is None
+
+    cache.put(59, CachedRender(taken[59], None)) # putting a key again replaces its entry
+    assert cache.size == held_bytes([taken[59]] + [cache._entries[key].snapshot for key in cache._entries if key != 59]) + len(cache) * ENTRY_OVERHEAD
+
+
+def test_entry_over_budget_is_not_kept():
+    cache = RenderCache(budget=100)
+    cache.put("big", CachedRender(snapshots(1)[0], None))
+    assert len(cache) == 0 and cache.size == 0
@@ -0,0 +1,106 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Canvas Tests
+# ------------------------------------------------------------
+import random
+
+import pytest
+
+from bench_canvas import legacy_draw
+from chart_generator import generate
+from flowchart_canvas import Canvas, CanvasSnapshot, LINE_ARMS, join_line
+from flowchart_layout import place_nodes
+from flowchart_renderer import render_flowchart
+
+GLYPHS = "".join(LINE_ARMS) + "▼►ab "
+
+
+class ListGrid:
+    """The list-of-lists grid generate_flowchart drew on, one draw_char call per cell."""
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.grid = [[' ' for _ in range(width)] for _ in range(height)]
+
+    def draw_char(self, x, y, char, join=False):
+        if 0 <= y < self.height and 0 <= x < self.width:
+            old = self.grid[y][x]
+            self.grid[y][x] = join_line(old, char) if join and old != ' ' else char
+
+    def text(self):
+        return "\n".join("".join(row) for row in self.grid)
+
+
+def random_ops(rng, width, height, count):
+    """Operations in the (x, y0, y1, text, join) form Canvas.draw takes, some off the edges."""
+    for _ in range(count):
+        x, y0 = rng.randrange(-5, width + 5), rng.randrange(-3, height + 3)
+        if rng.random() < 0.5: # a horizontal run
+            yield x, y0, y0 + 1, "".join(rng.choice(GLYPHS) for _ in range(rng.randrange(1, 12))), rng.random() < 0.5
+        else: # a vertical line
+            yield x, y0, y0 + rng.randrange(1, 10), rng.choice(GLYPHS), rng.random() < 0.5
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_canvas_matches_the_list_grid(seed):
+    rng = random.Random(seed)
+    width, height = rng.randrange(1, 60), rng.randrange(1, 40)
+    canvas, grid = Canvas(width, height), ListGrid(width, height)
+    for op in random_ops(rng, width, height, 400):
+        canvas.draw([op])
+        x, y0, y1, text, join = op
+        for y in range(y0, y1):
+            for dx, char in enumerate(text): grid.draw_char(x + dx, y, char, join)
+    assert canvas.text() == grid.text()
+    assert CanvasSnapshot.of(canvas).text() == grid.text()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_restore_undoes_every_write(seed):
+    rng = random.Random(seed)
+    canvas = Canvas(40, 30)
+    canvas.draw(random_ops(rng, 40, 30, 200))
+    before = canvas.text()
+    canvas.journal = journal = []
+    canvas.draw(random_ops(rng, 40, 30, 200))
+    canvas.journal = None
+    canvas.restore(journal)
+    assert canvas.text() == before
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_snapshots_follow_the_canvas_as_it_grows_and_shrinks(seed):
+    rng = random.Random(seed)
+    canvas, snapshot, taken = Canvas(30, 10), None, []
+    for _ in range(60):
+        canvas.dirty = set()
+        canvas.resize(30, max(1, canvas.height + rng.randrange(-40, 60)))
+        canvas.draw(random_ops(rng, 30, canvas.height, 5))
+        snapshot = CanvasSnapshot.of(canvas, snapshot, canvas.dirty)
+        taken.append((snapshot, canvas.text()))
+    # Earlier snapshots are not changed by the ones taken after them.
+    for snapshot, text in taken:
+        assert snapshot.text() == text and snapshot.height == text.count("\n") + 1
+        assert snapshot.rows(3, 7, 5, 9) == [row[5:9] for row in text.split("\n")[3:7]]
+
+
+@pytest.mark.parametrize("shape", ["chain", "fan", "mixed"])
+def test_boxes_draw_as_on_the_list_grid(shape):
+    nodes = [dict(node, connections=[]) for node in generate(shape, 40, 1)]
+    assert render_flowchart(nodes) == legacy_draw(*place_nodes(nodes))
+
+
+@pytest.mark.parametrize("shape", ["chain", "fan", "ladder", "loops", "mixed"])
+def test_charts_draw_as_on_the_list_grid(shape):
+    # Connectors are routed now, so the legacy grid is drawn without them: every cell
+    # it draws must match, and every blank one may only hold a line or an arrow head.
+    nodes = generate(shape, 120, 5)
+    node_positions, max_x, max_y = place_nodes(nodes)
+    bare = {node_id: dict(pos, node=dict(pos['node'], connections=[])) for node_id, pos in node_positions.items()}
+    rows, legacy = render_flowchart(nodes).split("\n"), legacy_draw(bare, max_x, max_y).split("\n")
+    assert [len(row) for row in rows] == [len(row) for row in legacy]
+    for y, (row, legacy_row) in enumerate(zip(rows, legacy)):
+        for x, (char, legacy_char) in enumerate(zip(row, legacy_row)):
+            if legacy_char != " ":
+                assert char == legacy_char, (x, y)
+            else:
+                assert char == " " or char in LINE_ARMS or char in "▼►◄", (x, y, char)
@@ -0,0 +1,36 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Synthetic Chart Tests
+# ------------------------------------------------------------
+import pytest
+
+from chart_generator import generate, SHAPES
+from flowchart_renderer import render_flowchart
+from flowchart_store import NodeStore
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("size", [1, 2, 3, 50])
+def test_charts_are_well_formed(shape, size):
+    nodes = generate(shape, size, seed=1)
+    assert len(nodes) == size and [node["id"] for node in nodes] == [f"node-{n}" for n in range(1, size + 1)]
+    seen = set()
+    for node in nodes:
+        # Every step connects from steps before it, the way the builder adds them.
+        assert set(node["connections"]) <= seen and bool(node["connections"]) == (node["id"] != "node-1")
+        assert len(node["connections"]) == (2 if node["type"] == "merge" else min(len(seen), 1))
+        seen.add(node["id"])
+    assert len(NodeStore(nodes)) == size and render_flowchart(nodes)
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_same_seed_gives_the_same_chart(shape):
+    assert generate(shape, 80, seed=7) == generate(shape, 80, seed=7)
+
+
+def test_seed_changes_the_mixed_chart():
+    assert generate("mixed", 80, seed=1) != generate("mixed", 80, seed=2)
+
+
+def test_unknown_shape_is_an_error():
+    with pytest.raises(ValueError, match="Unknown chart shape"):
+        generate("spiral", 10)
@@ -0,0 +1,85 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Command Line Renderer Tests
+# ------------------------------------------------------------
+import json
+import os
+import tracemalloc
+
+import flowchart_cli
+from bench_placement import synthetic_chart
+from flowchart_renderer import render_flowchart
+
+
+def write_chart(path, nodes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"nodes": nodes}), encoding="utf-8")
+
+
+def test_progress_lines_carry_the_throughput(tmp_path, capsys):
+    charts = {tmp_path / "in" / f"chart{n}.json": synthetic_chart(10 + n, seed=n) for n in range(3)}
+    for path, nodes in charts.items(): write_chart(path, nodes)
+    assert flowchart_cli.main([str(path) for path in charts] + ["-o", str(tmp_path / "out")]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split("]")[0] for line in lines] == ["[1", "[2", "[3"]
+    assert all(line.endswith(" charts/s)") for line in lines)
+    for path, nodes in charts.items():
+        assert (tmp_path / "out" / (path.stem + ".txt")).read_text(encoding="utf-8") == render_flowchart(nodes)
+
+
+def test_same_name_in_two_directories_is_an_error(tmp_path, capsys):
+    first, second = tmp_path / "a" / "chart.json", tmp_path / "b" / "chart.json"
+    write_chart(first, synthetic_chart(12, seed=1))
+    write_chart(second, synthetic_chart(15, seed=2))
+    out = tmp_path / "out"
+    assert flowchart_cli.main([str(first), str(second), str(first), "-o", str(out), "-q"]) == 1
+    err = capsys.readouterr().err
+    assert f"Error: {second}: " in err and "already the output of" in err
+    assert "Rendered 1 chart(s)" in err and "1 failed" in err
+    # The first file's output is not overwritten by the second.
+    assert (out / "chart.txt").read_text(encoding="utf-8") == render_flowchart(synthetic_chart(12, seed=1))
+
+
+def test_directories_keep_their_relative_paths(tmp_path):
+    write_chart(tmp_path / "in" / "a" / "chart.json", synthetic_chart(8, seed=3))
+    write_chart(tmp_path / "in" / "b" / "chart.json", synthetic_chart(9, seed=4))
+    assert flowchart_cli.main([str(tmp_path / "in"), "-o", str(tmp_path / "out"), "-q"]) == 0
+    assert (tmp_path / "out" / "a" / "chart.txt").exists() and (tmp_path / "out" / "b" / "chart.txt").exists()
+
+
+def test_walked_files_clash_with_named_files_and_other_walks(tmp_path, capsys):
+    for folder, seed in (("a", 1), ("b", 2), ("c", 3)): write_chart(tmp_path / folder / "sub" / "chart.json", synthetic_chart(6, seed=seed))
+    write_chart(tmp_path / "a" / "top.json", synthetic_chart(5, seed=4))
+    write_chart(tmp_path / "named" / "top.json", synthetic_chart(7, seed=5))
+    out = tmp_path / "out"
+    args = [str(tmp_path / "a"), str(tmp_path / "named" / "top.json"), str(tmp_path / "b"), str(tmp_path / "a" / "top.json")]
+    assert flowchart_cli.main(args + ["-o", str(out), "-q"]) == 1
+    err = capsys.readouterr().err
+    assert f"Error: {tmp_path / 'named' / 'top.json'}: " in err
+    assert f"Error: {tmp_path / 'b' / 'sub' / 'chart.json'}: " in err
+    assert "Rendered 2 chart(s)" in err and "2 failed" in err # a/top.json named again is not a clash
+    assert (out / "sub" / "chart.txt").read_text(encoding="utf-8") == render_flowchart(synthetic_chart(6, seed=1))
+    assert (out / "top.txt").read_text(encoding="utf-8") == render_flowchart(synthetic_chart(5, seed=4))
+
+
+def test_many_walked_files_take_no_memory_to_check(tmp_path):
+    def jobs(count):
+        for n in range(count):
+            name = os.path.join(f"dir{n // 1000}", f"chart{n}")
+            yield os.path.join("in", name + ".json"), os.path.join("out", name + ".txt"), "in"
+    reported = []
+    tracemalloc.start()
+    passed = sum(1 for _ in flowchart_cli.skip_collisions(jobs(20000), lambda *args: reported.append(args)))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert passed == 20000 and not reported
+    assert peak < 200 * 1024 # remembering every output path would take megabytes
+
+
+def test_a_bad_file_does_not_stop_the_others(tmp_path, capsys):
+    good, bad = tmp_path / "good.json", tmp_path / "bad.json"
+    write_chart(good, synthetic_chart(5))
+    bad.write_text("[{\"id\": \"a\", \"text\": 3}]", encoding="utf-8")
+    assert flowchart_cli.main([str(bad), str(good), str(tmp_path / "missing.json"), "-q"]) == 1
+    err = capsys.readouterr().err
+    assert f"Error: {bad}: " in err and "missing.json" in err and "Rendered 1 chart(s)" in err
+    assert (tmp_path / "good.txt").exists()
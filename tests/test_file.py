@@ -0,0 +1,96 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Chart File Tests
+# ------------------------------------------------------------
+import struct
+
+import pytest
+
+from bench_placement import synthetic_chart
+from flowchart_file import save_chart, load_chart, ChartFileError, FORMAT_VERSION
+from flowchart_io import DefinitionError
+from flowchart_renderer import iter_rows
+from flowchart_store import NodeStore
+
+
+RIGHT_SHARES = [0.0, 0.3, 0.7]
+
+
+def chart(right_share):
+    store = NodeStore(synthetic_chart(40, seed=3, right_share=right_share))
+    store.add(["End of Flowchart"], connections=[node.id for node in store.sinks()], direction="down", is_end=True)
+    return store
+
+
+@pytest.mark.parametrize("extension", [".ufc", ".json"])
+@pytest.mark.parametrize("right_share", RIGHT_SHARES)
+def test_round_trip_keeps_nodes_and_render(tmp_path, right_share, extension):
+    nodes = chart(right_share)
+    path = str(tmp_path / f"chart{extension}")
+    save_chart(path, nodes)
+    loaded, render = load_chart(path)
+    assert [node.to_dict() for node in loaded] == [node.to_dict() for node in nodes]
+    assert [node.id for node in loaded.sinks()] == [node.id for node in nodes.sinks()]
+    assert loaded.next_id() == nodes.next_id()
+    rows = list(iter_rows(nodes))
+    assert render.height == len(rows)
+    assert render.rows(0, render.height) == rows
+    assert render.rows(3, 9, 5, 30) == [row[5:30] for row in rows[3:9]]
+    render.close()
+
+
+@pytest.mark.parametrize("extension", [".ufc", ".json"])
+def test_render_is_dropped_for_other_layout_options(tmp_path, extension):
+    path = str(tmp_path / f"chart{extension}")
+    save_chart(path, chart(0.0))
+    loaded, render = load_chart(path, node_width=31)
+    assert render is None and len(loaded) == 41
+
+
+@pytest.mark.parametrize("extension", [".ufc", ".json"])
+def test_render_of_an_older_version_is_dropped(tmp_path, extension):
+    path = tmp_path / f"chart{extension}"
+    nodes = chart(0.3)
+    save_chart(str(path), nodes)
+    data = path.read_bytes()
+    if extension == ".ufc":
+        older = data[:8] + struct.pack("<H", FORMAT_VERSION - 1) + data[10:]
+    else:
+        older = data.replace(b'"version": %d' % FORMAT_VERSION, b'"version": %d' % (FORMAT_VERSION - 1), 1)
+    assert older != data
+    path.write_bytes(older)
+    loaded, render = load_chart(str(path))
+    assert render is None
+    assert [node.to_dict() for node in loaded] == [node.to_dict() for node in nodes]
+
+
+def test_newer_binary_versions_are_refused(tmp_path):
+    path = tmp_path / "chart.ufc"
+    save_chart(str(path), chart(0.0))
+    data = path.read_bytes()
+    path.write_bytes(data[:8] + struct.pack("<H", FORMAT_VERSION + 1) + data[10:])
+    with pytest.raises(ChartFileError, match="version"):
+        load_chart(str(path))
+
+
+def test_empty_chart(tmp_path):
+    path = str(tmp_path / "empty.ufc")
+    save_chart(path, NodeStore())
+    loaded, render = load_chart(path)
+    assert len(loaded) == 0 and render.height == 0
+
+
+@pytest.mark.parametrize("content", [b"UFCHART\0\x01", b"not a chart", b"\xff\xfe{\x00",
+                                     b'{"layout": [80], "nodes": []}', b'{"layout": {"node_width": "25"}, "nodes": []}',
+                                     b'{"layout": {"node_width": 2}, "nodes": []}'])
+def test_damaged_files_raise_chart_file_errors(tmp_path, content):
+    path = tmp_path / "bad.ufc"
+    path.write_bytes(content)
+    with pytest.raises(ChartFileError):
+        load_chart(str(path))
+
+
+def test_invalid_nodes_raise_definition_errors(tmp_path):
+    path = tmp_path / "bad.json"
+    path.write_text('{"nodes": [{"id": "node-1", "text": 5}]}', encoding="utf-8")
+    with pytest.raises(DefinitionError, match="node-1"):
+        load_chart(str(path))
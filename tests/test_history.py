@@ -0,0 +1,72 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Undo History Tests
+# ------------------------------------------------------------
+from flowchart_history import ChartState, History, EMPTY, path_between
+from flowchart_store import Node
+
+
+def steps(*labels):
+    return [Node(f"node-{n}", [label]) for n, label in enumerate(labels, 1)]
+
+
+def apply(state, target):
+    """The nodes of state after following path_between(state, target)."""
+    pops, appended = path_between(state, target)
+    nodes = state.nodes()
+    return nodes[:len(nodes) - pops] + appended
+
+
+def test_states_share_their_earlier_steps():
+    a, b, c = steps("A", "B", "C")
+    ab = EMPTY.push(a).push(b)
+    abc = ab.push(c)
+    assert abc.parent is ab and abc.length == 3
+    assert abc.nodes() == [a, b, c] and abc.nodes(1) == [b, c]
+    assert abc.ancestor(1).nodes() == [a]
+    assert ChartState.of([a, b]).nodes() == [a, b]
+
+
+def test_path_between_pops_back_to_the_common_state():
+    a, b, c, d = steps("A", "B", "C", "D")
+    ab = EMPTY.push(a).push(b)
+    abc, abd = ab.push(c), ab.push(d)
+    assert path_between(abc, abd) == (1, [d])
+    assert path_between(abc, ab) == (1, [])
+    assert path_between(ab, abc) == (0, [c])
+    assert path_between(abc, abc) == (0, [])
+    assert path_between(abc, EMPTY) == (3, [])
+    for source in (EMPTY, ab, abc, abd):
+        for target in (EMPTY, ab, abc, abd):
+            assert apply(source, target) == target.nodes()
+
+
+def test_path_between_states_with_no_common_steps():
+    first, second = ChartState.of(steps("A", "B")), ChartState.of(steps("A", "B", "C"))
+    pops, appended = path_between(first, second)
+    assert pops == 2 and appended == second.nodes()
+
+
+def test_undo_and_redo():
+    a, b, c = steps("A", "B", "C")
+    history = History()
+    assert not history.can_undo() and history.undo() is None
+    states = [EMPTY.push(a)]
+    states.append(states[-1].push(b))
+    for state in states: history.record(state)
+    assert history.undo() is states[0]
+    assert history.undo() is EMPTY
+    assert history.undo() is None
+    assert history.redo() is states[0] and history.redo() is states[1]
+    assert history.redo() is None and not history.can_redo()
+
+    assert history.undo() is states[0]
+    history.record(states[0].push(c)) # a new edit drops what could be redone
+    assert not history.can_redo()
+    assert history.current.nodes() == [a, c]
+    assert history.undo() is states[0]
+
+
+def test_ended_state():
+    end = Node("node-2", ["End of Flowchart"], connections=["node-1"], direction="down", is_end=True)
+    state = ChartState.of(steps("A") + [end])
+    assert state.ended and not state.parent.ended and not EMPTY.ended
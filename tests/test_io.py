@@ -0,0 +1,39 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Definition File Tests
+# ------------------------------------------------------------
+import json
+
+import pytest
+
+from flowchart_io import load_definition, normalize_nodes, DefinitionError
+
+
+def test_nodes_get_defaults_and_wrapped_text(tmp_path):
+    path = tmp_path / "chart.json"
+    path.write_text(json.dumps({"nodes": [
+        {"id": 1, "text": "Load the data from every regional warehouse"},
+        {"id": "2", "text": ["Clean data"], "connections": [1], "direction": "right"},
+    ]}), encoding="utf-8")
+    first, second = load_definition(str(path))
+    assert first["id"] == "1" and first["direction"] is None and len(first["text"]) == 2
+    assert second == {"id": "2", "text": ["Clean data"], "connections": ["1"], "direction": "right",
+                      "type": "regular", "isLoop": False, "loopTarget": "", "is_end": False}
+
+
+@pytest.mark.parametrize("raw, message", [
+    ({"text": "No id"}, "needs an 'id'"),
+    ({"id": "a", "text": 3}, "'text' must be a string or a list of strings"),
+    ({"id": "a", "connections": "node-1"}, "'connections' must be a list of node ids"),
+    ({"id": "a", "connections": [True]}, "'connections' must be a list of node ids"),
+    ({"id": "a", "type": None}, "'type' must be a string"),
+    ({"id": "a", "isLoop": "yes"}, "'isLoop' must be true or false"),
+    ({"id": "a", "connections": ["b"], "direction": "up"}, "'direction' must be one of down, right"),
+])
+def test_wrong_field_types_are_reported(raw, message):
+    with pytest.raises(DefinitionError, match=message):
+        normalize_nodes([{"id": "b"}, raw])
+
+
+def test_duplicate_ids_are_reported():
+    with pytest.raises(DefinitionError, match="Duplicate node id 'a'"):
+        normalize_nodes({"nodes": [{"id": "a"}, {"id": "a"}]})
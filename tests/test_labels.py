@@ -0,0 +1,81 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Node Label Tests
+# ------------------------------------------------------------
+import random
+import textwrap
+
+import pytest
+
+from flowchart_canvas import Canvas
+from flowchart_labels import box_ops, wrap_cached, wrap_many, wrap_text
+
+EDGE_CASES = [
+    "", " ", "   ", "\n", "a\n\nb", "word", "x" * 21, "x" * 22, "x" * 23, "x" * 64,
+    "exactly twenty-one c", "exactly twenty-one ch", "exactly twenty-one cha",
+    "trailing spaces     ", "   leading spaces", "a " * 30, "tab\tseparated\twords here",
+    "supercalifragilisticexpialidocious word", "mixed-hyphenated-words-that-run-past-the-width",
+    "non\x0bprintable", "naïve café ünïcode wörds and so on", "line one\nline two is longer than the width",
+]
+
+
+def textwrap_reference(text, width):
+    """The wrapping the builder did before memoization: textwrap on every line."""
+    return [wrapped for line in text.split('\n') for wrapped in textwrap.wrap(line, width=width, break_long_words=True)]
+
+
+@pytest.mark.parametrize("width", [1, 5, 21])
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_wrap_text_matches_textwrap(text, width):
+    assert wrap_text(text, width) == textwrap_reference(text, width)
+    assert wrap_text(text, width) == textwrap_reference(text, width) # and again from the cache
+
+
+def test_wrap_text_matches_textwrap_on_random_labels():
+    rng = random.Random(0)
+    words = ["a", "step", "loaded", "x" * 25, "  ", "\t", "-", "data-set", "é"]
+    for _ in range(2000):
+        text = " ".join(rng.choice(words) for _ in range(rng.randrange(0, 12)))
+        width = rng.randrange(1, 30)
+        assert wrap_text(text, width) == textwrap_reference(text, width), (text, width)
+
+
+def test_wrap_many_matches_wrap_text_and_returns_fresh_lists():
+    texts = EDGE_CASES + EDGE_CASES[::-1]
+    wrapped = wrap_many(texts, 21)
+    assert wrapped == [textwrap_reference(text, 21) for text in texts]
+    wrapped[5].append("changed")
+    assert wrap_text(texts[5], 21) == textwrap_reference(texts[5], 21)
+    assert wrap_cached(texts[5], 21) is wrap_cached(texts[5], 21)
+
+
+def draw_box_cells(grid, x, y, w, h, text_lines):
+    """A box drawn cell by cell, the way generate_flowchart drew it before box_ops."""
+    def draw_char(cx, cy, char):
+        if 0 <= cy < len(grid) and 0 <= cx < len(grid[0]): grid[cy][cx] = char
+    draw_char(x, y, '┌'); draw_char(x + w - 1, y, '┐'); draw_char(x, y + h - 1, '└'); draw_char(x + w - 1, y + h - 1, '┘')
+    for i in range(1, w - 1): draw_char(x + i, y, '─'); draw_char(x + i, y + h - 1, '─')
+    for i in range(1, h - 1): draw_char(x, y + i, '│'); draw_char(x + w - 1, y + i, '│')
+    start_y = y + (h - len(text_lines)) // 2
+    for line_num, line in enumerate(text_lines):
+        for i, char in enumerate(line[:w - 2].center(w - 2)):
+            draw_char(x + 1 + i, start_y + line_num, char)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_cached_box_rows_draw_like_the_cell_by_cell_box(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        w, h = rng.randrange(3, 30), rng.randrange(3, 8)
+        text_lines = tuple(rng.choice(["", "Start", "x" * 40, "Load data", "*Loop to: Start", "a b"])
+                           for _ in range(rng.randrange(0, h + 2)))
+        width, height = w + 4, h + 6
+        x, y = rng.randrange(-2, 4), rng.randrange(-2, 4)
+        # Something already drawn under the box must show through where the box leaves it.
+        background = ["".join(rng.choice(".:│─") for _ in range(width)) for _ in range(height)]
+        canvas = Canvas(width, height)
+        canvas.draw((0, row, row + 1, text, False) for row, text in enumerate(background))
+        canvas.draw((x + dx, y + dy0, y + dy1, text, False) for dx, dy0, dy1, text in box_ops(text_lines, w, h))
+        grid = [list(row) for row in background]
+        draw_box_cells(grid, x, y, w, h, text_lines)
+        assert canvas.text() == "\n".join("".join(row) for row in grid), (text_lines, w, h, x, y)
+        assert box_ops(text_lines, w, h) is box_ops(text_lines, w, h)
@@ -0,0 +1,48 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Placement Tests
+# ------------------------------------------------------------
+import random
+
+import pytest
+
+from bench_placement import legacy_place_nodes, layout_key, synthetic_chart
+from flowchart_layout import PlacementIndex, place_nodes
+from flowchart_renderer import IncrementalRenderer, iter_node_ops, layout_positions
+
+
+@pytest.mark.parametrize("size", [1, 150, 400])
+@pytest.mark.parametrize("seed", range(3))
+def test_indexed_placement_matches_the_collision_loop(size, seed):
+    nodes = synthetic_chart(size, seed)
+    positions, max_x, max_y = place_nodes(nodes)
+    legacy_positions, legacy_max_x, legacy_max_y = legacy_place_nodes(nodes)
+    assert layout_key(positions) == layout_key(legacy_positions)
+    assert (max_x, max_y) == (legacy_max_x, legacy_max_y)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_renderer_and_exports_place_as_the_collision_loop(seed):
+    nodes = synthetic_chart(400, seed)
+    legacy_positions, _, _ = legacy_place_nodes(nodes)
+    renderer = IncrementalRenderer()
+    renderer.update(nodes)
+    assert layout_key(layout_positions(renderer.layout)) == layout_key(legacy_positions)
+    assert layout_key({pos['node']['id']: pos for pos, _ in iter_node_ops(nodes)}) == layout_key(legacy_positions)
+
+
+def test_free_y_matches_the_collision_loop_on_scattered_boxes():
+    rng = random.Random(7)
+    index, boxes = PlacementIndex(), []
+    w, h = index.node_width, index.node_height
+    for _ in range(300):
+        x, y = rng.randrange(0, 400, 3), rng.randrange(0, 300)
+        # The legacy rule: move below the first placed box it overlaps, and start over.
+        expected, collided = y, True
+        while collided:
+            collided = False
+            for bx, by in boxes:
+                if not (x + w < bx or x > bx + w or expected + h < by or expected > by + h):
+                    expected, collided = by + h + 1, True
+                    break
+        assert index.find_free_y(x, y) == expected
+        index.add(x, expected); boxes.append((x, expected))
@@ -0,0 +1,49 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Step Picker Tests
+# ------------------------------------------------------------
+from flowchart_picker import StepIndex
+from flowchart_store import Node
+
+
+def option(node):
+    return f"{node.text[0]} ({node.id})"
+
+
+def index_of(*labels):
+    index = StepIndex(option)
+    index.extend(Node(f"node-{n}", [label]) for n, label in enumerate(labels, 1))
+    return index
+
+
+def test_search_matches_label_prefixes_case_insensitively():
+    index = index_of("Load data", "clean data", "Log rows", "Train", "  load backup")
+    assert index.search("lo") == ["  load backup (node-5)", "Load data (node-1)", "Log rows (node-3)"]
+    assert index.search(" LOAD ") == ["  load backup (node-5)", "Load data (node-1)"]
+    assert index.search("x") == []
+
+
+def test_search_limit_and_empty_query():
+    index = index_of(*(f"Step {n}" for n in range(1, 101)))
+    assert len(index.search("step", limit=7)) == 7
+    assert index.search("Step 10") == ["Step 10 (node-10)", "Step 100 (node-100)"]
+    assert index.search("", limit=3) == ["Step 100 (node-100)", "Step 99 (node-99)", "Step 98 (node-98)"]
+    assert index.recent(0) == []
+
+
+def test_equal_labels_are_kept_in_chart_order():
+    index = index_of("Check", "Other", "check")
+    assert index.search("check") == ["Check (node-1)", "check (node-3)"]
+    assert index.find("CHECK").id == "node-3"
+    assert index.find("Che") is None
+
+
+def test_append_and_pop_keep_the_index_in_step():
+    index, nodes = StepIndex(option), [Node(f"node-{n}", [f"Step {n % 3}"]) for n in range(1, 10)]
+    for node in nodes: index.append(node)
+    assert index.search("step 1") == [option(node) for node in nodes if node.text[0] == "Step 1"]
+    while len(index) > 4:
+        index.pop()
+    assert index.search("step") == [option(node) for node in sorted(nodes[:4], key=lambda node: (node.text[0], int(node.id[5:])))]
+    assert index.find("Step 2").id == "node-2"
+    index.clear()
+    assert len(index) == 0 and index.search("") == []
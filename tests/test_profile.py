@@ -0,0 +1,48 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Profiling Tests
+# ------------------------------------------------------------
+import json
+import threading
+
+from flowchart_profile import ActionTrace, Profiler
+
+
+def test_spans_from_several_threads_are_all_kept(tmp_path):
+    trace = ActionTrace("Add Step")
+    spans_per_thread, stop, together = 2000, threading.Event(), threading.Barrier(4)
+
+    def add_spans():
+        together.wait()
+        for n in range(spans_per_thread):
+            trace.add_span("draw", 0.0, 0.001)
+            if n % 100 == 0: trace.count(nodes=n)
+        together.wait() # all alive until the end, so no thread id is reused
+
+    def read():
+        while not stop.is_set():
+            trace.summary(); trace.dump(str(tmp_path / "trace.json"))
+
+    reader = threading.Thread(target=read)
+    workers = [threading.Thread(target=add_spans, name=f"worker-{n}") for n in range(4)]
+    reader.start()
+    for worker in workers: worker.start()
+    for worker in workers: worker.join()
+    stop.set(); reader.join()
+
+    assert abs(trace.totals["draw"] - 4 * spans_per_thread * 0.001) < 1e-6
+    spans = [event for event in trace.events if event["ph"] == "X"]
+    names = {event["args"]["name"] for event in trace.events if event["ph"] == "M"}
+    assert len(spans) == 4 * spans_per_thread and {f"worker-{n}" for n in range(4)} <= names
+
+
+def test_profiler_writes_chrome_traces(tmp_path):
+    assert Profiler(enabled=False).start("Add Step") is None
+    profiler = Profiler(enabled=True, trace_dir=str(tmp_path))
+    trace = profiler.start("Add Step")
+    with trace.span("layout", nodes=3): pass
+    trace.count(nodes=3)
+    assert trace.summary().startswith("Add Step: ") and "layout" in trace.summary() and "nodes 3" in trace.summary()
+    with open(profiler.finish(trace), encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["otherData"] == {"action": "Add Step", "counters": {"nodes": 3}}
+    assert [event["name"] for event in data["traceEvents"] if event["ph"] == "X"] == ["layout"]
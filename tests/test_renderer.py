@@ -0,0 +1,44 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Renderer Tests
+# ------------------------------------------------------------
+import io
+import random
+
+import pytest
+
+from bench_placement import synthetic_chart
+from flowchart_renderer import IncrementalRenderer, iter_rows, render_flowchart, write_flowchart
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_appends_and_pops_match_a_render_flowchart(seed):
+    rng = random.Random(seed)
+    nodes = synthetic_chart(80, seed)
+    renderer, count = IncrementalRenderer(), 0
+    for _ in range(40):
+        # Like the builder: add or delete a few steps at the end of the list.
+        count = max(0, min(len(nodes), count + rng.choice((-3, -1, 1, 1, 2, 5))))
+        change = renderer.update(nodes[:count])
+        assert renderer.text() == render_flowchart(nodes[:count]), count
+        assert change.full or all(row < renderer.height for row in change.rows)
+
+
+def test_replaced_nodes_with_equal_content_are_redrawn():
+    nodes = synthetic_chart(30, 4)
+    renderer = IncrementalRenderer()
+    renderer.update(nodes)
+    edited = nodes[:20] + [dict(node, text=["Edited"]) for node in nodes[20:]]
+    renderer.update(edited)
+    assert renderer.text() == render_flowchart(edited)
+
+
+@pytest.mark.parametrize("size", [0, 1, 60])
+@pytest.mark.parametrize("right_share", [0.0, 0.3, 0.7])
+def test_streamed_rows_match_the_rendered_text(size, right_share):
+    nodes = synthetic_chart(size, 3, right_share)
+    text = render_flowchart(nodes)
+    assert "\n".join(iter_rows(nodes)) == text
+    for strip in (False, True):
+        f = io.StringIO()
+        write_flowchart(nodes, f, strip=strip)
+        assert f.getvalue() == (text.strip() if strip else text)
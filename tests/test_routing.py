@@ -0,0 +1,98 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Connector Routing Tests
+# ------------------------------------------------------------
+import pytest
+
+from chart_generator import generate
+from flowchart_renderer import IncrementalRenderer, iter_node_ops, render_flowchart
+
+ARROWS = "▼►◄"
+CHARTS = [("mixed", 25, 3), ("mixed", 60, 0), ("mixed", 60, 1), ("mixed", 120, 2), ("mixed", 200, 4),
+          ("ladder", 60, 0), ("fan", 60, 0)]
+
+
+def connector_cells(nodes):
+    """
+    Cell -> [(target id, its sources)] for every connector cell drawn, the placed
+    boxes, and the cells of each box (by id) that connectors drawn before it had
+    already taken: a box is placed without looking at the lines, as it always was.
+    """
+    cells, boxes, landed = {}, [], {}
+    for pos_data, ops in iter_node_ops(nodes):
+        node = pos_data['node']
+        boxes.append(pos_data)
+        x, y, w, h = pos_data['x'], pos_data['y'], pos_data['width'], pos_data['height']
+        covered = [(col, row) for row in range(y, y + h) for col in range(x, x + w)] + exits(pos_data)
+        landed[node['id']] = {cell for cell in covered if cell in cells}
+        for x, y0, y1, text, join in ops:
+            if not join: continue
+            for y in range(y0, y1):
+                for dx in range(len(text)):
+                    cells.setdefault((x + dx, y), []).append((node['id'], set(node['connections'])))
+    return cells, boxes, landed
+
+
+def exits(pos_data):
+    x, y, w, h = pos_data['x'], pos_data['y'], pos_data['width'], pos_data['height']
+    return [(x + w // 2, y + h), (x + w, y + h // 2)]
+
+
+@pytest.mark.parametrize("shape, size, seed", CHARTS)
+def test_connectors_never_share_a_cell(shape, size, seed):
+    nodes = generate(shape, size, seed)
+    rows = render_flowchart(nodes).split("\n")
+    cells, _, landed = connector_cells(nodes)
+    under_boxes = set().union(*landed.values())
+    for (x, y), owners in cells.items():
+        if (x, y) in under_boxes: continue
+        for (first, first_sources), (second, second_sources) in zip(owners, owners[1:]):
+            if first == second: continue
+            # Lines out of one step branch off each other; any other meeting has to be a plain crossing.
+            assert first_sources & second_sources or rows[y][x] == "┼", (x, y, first, second, rows[y][x])
+            assert rows[y][x] not in ARROWS, (x, y, first, second)
+
+
+@pytest.mark.parametrize("shape, size, seed", CHARTS)
+def test_no_arrow_or_box_covers_an_exit(shape, size, seed):
+    nodes = generate(shape, size, seed)
+    rows = render_flowchart(nodes).split("\n")
+    cells, boxes, landed = connector_cells(nodes)
+    for pos_data in boxes:
+        x, y, w, h = pos_data['x'], pos_data['y'], pos_data['width'], pos_data['height']
+        # Only a line drawn before the box was placed may run under it or its exits.
+        before = landed[pos_data['node']['id']]
+        for exit_x, exit_y in exits(pos_data):
+            if (exit_x, exit_y) in before: continue
+            assert rows[exit_y][exit_x] not in ARROWS, (pos_data['node']['id'], exit_x, exit_y)
+        under = {(col, row) for row in range(y, y + h) for col in range(x, x + w) if (col, row) in cells}
+        assert under <= before, pos_data['node']['id']
+
+
+def test_lanes_are_not_shared():
+    # 4 -> 10 and 10 -> 15 both used to run down column 60, hiding 10's exit under the ◄ of 4 -> 10.
+    nodes = generate("mixed", 25, 3)
+    rows = render_flowchart(nodes).split("\n")
+    cells, boxes, _ = connector_cells(nodes)
+    step_10 = next(pos for pos in boxes if pos['node']['id'] == "node-10")
+    exit_cell = (step_10['x'] + step_10['width'], step_10['y'] + step_10['height'] // 2)
+    assert [target for target, _ in cells[exit_cell]] == ["node-15"]
+    assert rows[exit_cell[1]][exit_cell[0]] == "─"
+
+
+def test_exits_of_the_start_are_kept():
+    # The start has no sources, but the lines into node-5 used to cross its bottom exit.
+    nodes = generate("mixed", 5, 20)
+    rows = render_flowchart(nodes).split("\n")
+    cells, boxes, _ = connector_cells(nodes)
+    exit_cell = exits(boxes[0])[0]
+    assert all("node-1" in sources for _, sources in cells[exit_cell])
+    assert rows[exit_cell[1]][exit_cell[0]] == "├"
+
+
+def test_undo_routes_like_a_fresh_render():
+    nodes = generate("mixed", 120, 5)
+    renderer = IncrementalRenderer()
+    renderer.update(nodes)
+    for keep in (90, 41, 7, 120):
+        renderer.update(nodes[:keep])
+        assert renderer.text() == render_flowchart(nodes[:keep]), keep
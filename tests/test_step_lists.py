@@ -0,0 +1,125 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Step List Tests
+# ------------------------------------------------------------
+import pytest
+
+from flowchart_io import parse_outline, parse_edge_list, parse_steps, is_edge_list, load_definition, DefinitionError
+
+
+def shape(nodes):
+    """(label, sources by label, type, direction, loop note, is_end) of every node."""
+    labels = {node["id"]: node["text"][0] for node in nodes}
+    return [(node["text"][0], [labels[s_id] for s_id in node["connections"]], node["type"], node["direction"],
+             node["loopTarget"], node["is_end"]) for node in nodes]
+
+
+def test_outline_branches_merges_loops_and_end():
+    nodes = parse_outline("""
+        # a comment
+        Load data
+        Clean data
+            Log rejected rows
+            Notify owner
+        Train model <- Clean data, Notify owner
+        Evaluate ~> Train model
+        END
+    """)
+    assert shape(nodes) == [
+        ("Load data", [], "regular", None, "", False),
+        ("Clean data", ["Load data"], "regular", "down", "", False),
+        ("Log rejected rows", ["Clean data"], "regular", "right", "", False),
+        ("Notify owner", ["Log rejected rows"], "regular", "down", "", False),
+        ("Train model", ["Clean data", "Notify owner"], "merge", "down", "", False),
+        ("Evaluate", ["Train model"], "regular", "down", "Train model", False),
+        ("End of Flowchart", ["Evaluate"], "regular", "down", "", True),
+    ]
+    assert [node["id"] for node in nodes] == [f"node-{n}" for n in range(1, 8)]
+
+
+def test_outline_end_collects_every_unconnected_step():
+    nodes = parse_outline("Start\n    > Right\n| Down\nEND")
+    assert shape(nodes)[-1] == ("End of Flowchart", ["Right", "Down"], "regular", "down", "", True)
+    assert shape(nodes)[2][:4] == ("Down", ["Start"], "regular", "down")
+
+
+def test_outline_names_refer_to_steps():
+    nodes = parse_outline("Check @first\nCheck @second <- @first\nDone <- first\nEnd <- @second, Done")
+    assert [sources for _, sources, *_ in shape(nodes)] == [[], ["Check"], ["Check"], ["Check", "Done"]]
+    assert nodes[2]["connections"] == ["node-1"] and nodes[3]["connections"] == ["node-2", "node-3"]
+
+
+@pytest.mark.parametrize("text, message", [
+    ("Start\nNext <- Missing", "no earlier step called 'Missing'"),
+    ("Start\nEND\nAfter", "comes after the end"),
+    ("Start\n<- Start", "needs some text"),
+    ("", "no steps"),
+])
+def test_outline_errors(text, message):
+    with pytest.raises(DefinitionError, match=message):
+        parse_outline(text)
+
+
+def test_edge_list_orders_steps_by_their_sources():
+    nodes = parse_edge_list("""
+        Train model -> Evaluate
+        Load data -> Clean data
+        Clean data => Log rejected rows
+        Clean data, Log rejected rows -> Train model
+        Evaluate ~> Load data
+        Evaluate -> END
+        Unused step
+    """)
+    assert shape(nodes) == [
+        ("Load data", [], "regular", None, "", False),
+        ("Clean data", ["Load data"], "regular", "down", "", False),
+        ("Log rejected rows", ["Clean data"], "regular", "right", "", False),
+        ("Train model", ["Clean data", "Log rejected rows"], "merge", "down", "", False),
+        ("Evaluate", ["Train model"], "regular", "down", "Load data", False),
+        ("Unused step", [], "regular", None, "", False),
+        ("End of Flowchart", ["Evaluate"], "regular", "down", "", True),
+    ]
+
+
+def test_edge_list_bare_end_collects_every_unconnected_step():
+    nodes = parse_edge_list("A -> B\nA => C\nD\nEND")
+    assert shape(nodes)[-1] == ("End of Flowchart", ["B", "C", "D"], "regular", "down", "", True)
+    assert [node["text"] for node in nodes].count(["END"]) == 0
+    assert shape(parse_edge_list("A -> B\nB -> END\nC\nEND"))[-1][1] == ["B", "C"]
+
+
+def test_edge_list_cycles_are_rejected():
+    with pytest.raises(DefinitionError, match="go round in a circle"):
+        parse_edge_list("A -> B\nB -> C\nC -> B")
+
+
+@pytest.mark.parametrize("text, message", [
+    ("A -> END\nEND -> B", "nothing can follow the end"),
+    ("A -> ", "needs a step on both sides"),
+    ("-> B", "needs a step on both sides"),
+    (", -> B", "needs a step on both sides"),
+])
+def test_edge_list_errors(text, message):
+    with pytest.raises(DefinitionError, match=message):
+        parse_edge_list(text)
+
+
+def test_parse_steps_tells_the_formats_apart(tmp_path):
+    assert is_edge_list("A -> B") and is_edge_list("A => B")
+    assert not is_edge_list("A\nB ~> A\n# x -> y")
+    assert shape(parse_steps("A -> B")) == shape(parse_outline("A\nB"))
+    path = tmp_path / "steps.txt"
+    path.write_text("A\nB\nEND\n", encoding="utf-8")
+    assert shape(load_definition(str(path))) == shape(parse_outline("A\nB\nEND"))
+
+
+def test_load_definition_rejects_files_that_are_not_utf8(tmp_path):
+    path = tmp_path / "steps.txt"
+    path.write_bytes(b"A -> B\n\xff\xfe")
+    with pytest.raises(DefinitionError, match="UTF-8"):
+        load_definition(str(path))
+
+
+def test_long_labels_are_wrapped_to_two_lines():
+    label = "a very long step label that will not fit on one line of the box at all"
+    node = parse_outline(label, node_width=25)[0]
+    assert 1 < len(node["text"]) <= 2 and all(len(line) <= 21 for line in node["text"])
@@ -0,0 +1,73 @@
+# sandy.g.cabanes
+# Title: Flowchart Builder - Node Store Tests
+# ------------------------------------------------------------
+import pytest
+
+from flowchart_store import Node, NodeStore
+
+
+def sink_ids(store):
+    return [node.id for node in store.sinks()]
+
+
+def test_sinks_follow_appends_and_pops():
+    store = NodeStore()
+    start = store.add(["Start"])
+    a = store.add(["A"], connections=[start.id], direction="down")
+    b = store.add(["B"], connections=[start.id], direction="right")
+    assert sink_ids(store) == [a.id, b.id]
+    store.add(["Merge"], type="merge", connections=[a.id, b.id])
+    assert sink_ids(store) == ["node-4"]
+    store.pop()
+    assert sink_ids(store) == [a.id, b.id]
+    store.pop(); store.pop()
+    assert sink_ids(store) == [start.id]
+
+
+def test_end_nodes_are_never_sinks():
+    store = NodeStore()
+    start = store.add(["Start"])
+    store.add(["End"], connections=[start.id], is_end=True)
+    assert sink_ids(store) == []
+    assert not store.is_sink("node-2")
+
+
+def test_pop_restores_id_counter():
+    store = NodeStore()
+    store.add(["Start"])
+    store.append(Node("node-7", ["Imported"], connections=["node-1"], direction="down"))
+    assert store.next_id() == "node-8"
+    store.pop()
+    assert store.next_id() == "node-2"
+    assert store.add(["Again"]).id == "node-2"
+
+
+def test_loading_a_list_matches_appending_one_by_one():
+    dicts = [{"id": "node-1", "text": ["Start"]},
+             {"id": "node-5", "text": ["A"], "connections": ["node-1"], "direction": "down"},
+             {"id": "x", "text": ["B"], "connections": ["node-1"], "direction": "right"},
+             {"id": "node-3", "text": ["End"], "connections": ["node-5"], "is_end": True}]
+    bulk = NodeStore(dicts)
+    single = NodeStore()
+    for data in dicts: single.append(Node.from_dict(data))
+    assert sink_ids(bulk) == sink_ids(single) == ["x"]
+    assert bulk.id_counter == single.id_counter == 5
+    assert bulk.children("node-1") == ["node-5", "x"]
+    while bulk:
+        assert bulk.pop().id == single.pop().id
+        assert (sink_ids(bulk), bulk.id_counter) == (sink_ids(single), single.id_counter)
+
+
+def test_duplicate_ids_are_rejected():
+    store = NodeStore([{"id": "node-1", "text": ["Start"]}])
+    with pytest.raises(ValueError):
+        store.append(Node("node-1", ["Again"]))
+    with pytest.raises(ValueError):
+        store.extend([{"id": "node-2", "text": ["A"]}, {"id": "node-2", "text": ["B"]}])
+
+
+def test_nodes_read_like_dicts():
+    node = Node("node-1", ["Start"])
+    assert node["text"] == ["Start"] and node.get("is_end") is False
+    with pytest.raises(KeyError):
+        node["missing"]